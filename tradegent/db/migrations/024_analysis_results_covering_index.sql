@@ -0,0 +1,18 @@
+-- Migration 024: Covering index for latest analysis result per ticker
+-- Created: 2026-10-16
+-- Purpose: Serve Phase 3 _enrich_past_analyses() lookups
+--   SELECT recommendation, confidence FROM nexus.analysis_results
+--   WHERE ticker = %s ORDER BY created_at DESC LIMIT 1
+-- with an Index Only Scan instead of a heap fetch per search result.
+--
+-- Verify with:
+--   EXPLAIN (ANALYZE, BUFFERS)
+--   SELECT recommendation, confidence FROM nexus.analysis_results
+--   WHERE ticker = 'NVDA' ORDER BY created_at DESC LIMIT 1;
+
+CREATE INDEX IF NOT EXISTS idx_analysis_results_ticker_created_covering
+    ON nexus.analysis_results (ticker, created_at DESC)
+    INCLUDE (recommendation, confidence);
+
+COMMENT ON INDEX nexus.idx_analysis_results_ticker_created_covering IS
+    'Covering index for latest recommendation/confidence per ticker (Phase 3 enrichment)';
@@ -0,0 +1,19 @@
+-- Migration 025: Content-hash ledger for Phase 2 graph extraction
+-- Created: 2026-10-16
+-- Purpose: Let _phase2_dual_ingest() skip extract_text()/extract_document()
+-- when the exact same file content has already been extracted. Extraction is
+-- an LLM call and deterministic on content, so re-ingesting an unchanged file
+-- only needs a primary-key lookup.
+
+CREATE TABLE IF NOT EXISTS nexus.graph_extracted (
+    doc_hash CHAR(64) PRIMARY KEY,
+    doc_id VARCHAR(255) NOT NULL,
+    entities INTEGER NOT NULL DEFAULT 0,
+    relations INTEGER NOT NULL DEFAULT 0,
+    extracted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_graph_extracted_doc_id ON nexus.graph_extracted(doc_id);
+
+COMMENT ON TABLE nexus.graph_extracted IS
+    'SHA-256 of documents already run through graph extraction (Phase 2 dedup)';
@@ -0,0 +1,18 @@
+-- Migration 026: Content-hash ledger for RAG ingest of analysis/trade documents
+-- Created: 2026-10-17
+-- Purpose: Let kb_ingest_analysis() callers skip re-embedding a document whose
+-- exact content was already ingested (e.g. a scanner refresh re-running a
+-- ticker and producing identical output). Embedding dominates ingest cost, so
+-- an unchanged document only needs a primary-key lookup.
+
+CREATE TABLE IF NOT EXISTS nexus.rag_ingested (
+    content_hash CHAR(32) PRIMARY KEY,
+    ticker VARCHAR(10) NOT NULL,
+    doc_path TEXT NOT NULL,
+    ingested_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_rag_ingested_ticker ON nexus.rag_ingested(ticker);
+
+COMMENT ON TABLE nexus.rag_ingested IS
+    'BLAKE2b-128 of documents already embedded into RAG (legacy/execution ingest dedup)';
@@ -0,0 +1,22 @@
+-- Migration 027: Ordered partial index for active watchlist listings
+-- Created: 2026-10-17
+-- Purpose: Serve get_active_watchlist() / `watchlist-db list`
+--   SELECT * FROM nexus.watchlist WHERE status = 'active'
+--   ORDER BY priority DESC, created_at DESC
+-- by walking the index in order instead of sorting every active entry.
+--
+-- nexus.task_queue gets no new index: get_pending_tasks() orders by an aged
+-- priority expression that depends on now(), which no btree can serve, and the
+-- pending rows are already covered by idx_task_queue_pending.
+--
+-- Verify with:
+--   EXPLAIN (ANALYZE, BUFFERS)
+--   SELECT * FROM nexus.watchlist WHERE status = 'active'
+--   ORDER BY priority DESC, created_at DESC;
+
+CREATE INDEX IF NOT EXISTS idx_watchlist_active_priority_created
+    ON nexus.watchlist (priority DESC, created_at DESC)
+    WHERE status = 'active';
+
+COMMENT ON INDEX nexus.idx_watchlist_active_priority_created IS
+    'Ordered scan for active watchlist listings (priority, newest first)';
@@ -0,0 +1,12 @@
+-- Migration 028: Opt-in output reuse for custom schedules
+-- Created: 2026-10-17
+-- Purpose: run_due_schedules() reuses a custom prompt's first successful
+-- output for the rest of the day only when the schedule is marked idempotent.
+-- Custom schedules that repeat during the day to pick up new data (or that
+-- rely on the Claude run's side effects) keep the default and run every time.
+
+ALTER TABLE nexus.schedules
+ADD COLUMN IF NOT EXISTS idempotent BOOLEAN NOT NULL DEFAULT false;
+
+COMMENT ON COLUMN nexus.schedules.idempotent IS
+    'Custom prompt output is stable within a day; reuse the first successful output';
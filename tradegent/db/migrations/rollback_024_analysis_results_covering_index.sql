@@ -0,0 +1,5 @@
+-- Rollback: 024_analysis_results_covering_index.sql
+-- Description: Remove covering index for latest analysis result per ticker
+-- Date: 2026-10-16
+
+DROP INDEX IF EXISTS nexus.idx_analysis_results_ticker_created_covering;
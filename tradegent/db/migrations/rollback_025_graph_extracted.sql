@@ -0,0 +1,5 @@
+-- Rollback: 025_graph_extracted.sql
+-- Description: Remove Phase 2 graph extraction content-hash ledger
+-- Date: 2026-10-16
+
+DROP TABLE IF EXISTS nexus.graph_extracted;
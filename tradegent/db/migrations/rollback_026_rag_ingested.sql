@@ -0,0 +1,5 @@
+-- Rollback: 026_rag_ingested.sql
+-- Description: Remove RAG ingest content-hash ledger
+-- Date: 2026-10-17
+
+DROP TABLE IF EXISTS nexus.rag_ingested;
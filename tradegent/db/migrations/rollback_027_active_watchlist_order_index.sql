@@ -0,0 +1,5 @@
+-- Rollback: 027_active_watchlist_order_index.sql
+-- Description: Remove ordered partial index for active watchlist listings
+-- Date: 2026-10-17
+
+DROP INDEX IF EXISTS nexus.idx_watchlist_active_priority_created;
@@ -0,0 +1,5 @@
+-- Rollback: 028_schedule_idempotent.sql
+-- Description: Remove opt-in output reuse flag for custom schedules
+-- Date: 2026-10-17
+
+ALTER TABLE nexus.schedules DROP COLUMN IF EXISTS idempotent;
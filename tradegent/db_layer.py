@@ -9,11 +9,12 @@ Falls back to psycopg2 sync if async not available.
 import json
 import logging
 import os
+import threading
 import time as time_module
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 from zoneinfo import ZoneInfo
 
 from dotenv import load_dotenv
@@ -133,20 +134,71 @@ class Schedule:
     consecutive_fails: int
     max_consecutive_fails: int
     comments: str | None
+    idempotent: bool = False
 
 
 # ─── Database Connection ─────────────────────────────────────────────────────
 
 
+class _ConnectionPool:
+    """
+    Process-wide cache of idle connections, keyed by DSN.
+
+    Short-lived NexusDB instances (one per worker thread, counter flush or
+    ledger check) lease a connection here instead of opening a new backend
+    each time. Connections are only ever used by one NexusDB at a time.
+    """
+
+    def __init__(self, max_idle: int):
+        self.max_idle = max_idle
+        self._idle: dict[str, list[psycopg.Connection]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, dsn: str) -> psycopg.Connection | None:
+        """Return an idle connection for dsn, or None if there is none."""
+        with self._lock:
+            idle = self._idle.get(dsn, [])
+            while idle:
+                conn = idle.pop()
+                if not conn.closed:
+                    return conn
+        return None
+
+    def put(self, dsn: str, conn: psycopg.Connection) -> None:
+        """Return a connection; it is closed instead if broken or the pool is full."""
+        if conn.closed:
+            return
+        try:
+            if conn.info.transaction_status != psycopg.pq.TransactionStatus.IDLE:
+                conn.rollback()
+        except Exception:
+            conn.close()
+            return
+        with self._lock:
+            idle = self._idle.setdefault(dsn, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+
+_pool = _ConnectionPool(int(os.getenv("PG_POOL_MAX_IDLE", "8")))
+
+
 class NexusDB:
     """Synchronous database access layer for the Nexus Light platform."""
 
-    def __init__(self, dsn: str | None = None):
+    def __init__(self, dsn: str | None = None, pooled: bool = False):
         self.dsn = dsn or get_dsn()
+        self.pooled = pooled
         self._conn: psycopg.Connection | None = None
 
     def connect(self) -> "NexusDB":
-        """Establish database connection."""
+        """Establish database connection (reusing an idle one if pooled)."""
+        if self.pooled:
+            self._conn = _pool.get(self.dsn)
+            if self._conn is not None:
+                return self
         self._conn = psycopg.connect(self.dsn, row_factory=dict_row)
         session_tz = get_db_timezone_name()
         with self._conn.cursor() as cur:
@@ -156,7 +208,10 @@ class NexusDB:
 
     def close(self):
         if self._conn:
-            self._conn.close()
+            if self.pooled:
+                _pool.put(self.dsn, self._conn)
+            else:
+                self._conn.close()
             self._conn = None
 
     def __enter__(self):
@@ -171,6 +226,13 @@ class NexusDB:
             self.connect()
         return self._conn
 
+    def copy_csv(self, query: str, params: list | None, out: BinaryIO) -> None:
+        """Stream a SELECT to out as CSV with a header row via COPY TO STDOUT."""
+        with self.conn.cursor() as cur:
+            with cur.copy(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", params) as copy:
+                for data in copy:
+                    out.write(data)
+
     # ─── Stocks ──────────────────────────────────────────────────────────
 
     def get_enabled_stocks(
@@ -825,6 +887,7 @@ class NexusDB:
             consecutive_fails=row.get("consecutive_fails", 0),
             max_consecutive_fails=row.get("max_consecutive_fails", 3),
             comments=row.get("comments"),
+            idempotent=row.get("idempotent", False),
         )
 
     # ─── Settings ──────────────────────────────────────────────────────
@@ -977,20 +1040,34 @@ class NexusDB:
             )
         self.conn.commit()
 
+    _SERVICE_COUNTERS = frozenset({
+        "analyses_total",
+        "executions_total",
+        "errors_total",
+        "today_analyses",
+        "today_executions",
+        "today_errors",
+    })
+
     def increment_service_counter(self, counter: str):
         """Increment a service counter: analyses_total, executions_total, errors_total."""
-        valid = {
-            "analyses_total",
-            "executions_total",
-            "errors_total",
-            "today_analyses",
-            "today_executions",
-            "today_errors",
-        }
-        if counter not in valid:
+        self.increment_service_counters([counter])
+
+    def increment_service_counters(self, counters: list[str]):
+        """Increment several service counters in one UPDATE and one commit."""
+        self.add_service_counters(dict.fromkeys(counters, 1))
+
+    def add_service_counters(self, deltas: dict[str, int]):
+        """Add accumulated deltas to service counters in one UPDATE and one commit."""
+        valid = {c: n for c, n in deltas.items() if c in self._SERVICE_COUNTERS and n}
+        if not valid:
             return
+        assignments = ", ".join(f"{c} = {c} + %s" for c in valid)
         with self.conn.cursor() as cur:
-            cur.execute(f"UPDATE nexus.service_status SET {counter} = {counter} + 1 WHERE id = 1")
+            cur.execute(
+                f"UPDATE nexus.service_status SET {assignments} WHERE id = 1",
+                list(valid.values()),
+            )
         self.conn.commit()
 
     def get_service_status(self) -> dict | None:
@@ -1210,6 +1287,22 @@ class NexusDB:
             row = cur.fetchone()
         return dict(row) if row else None
 
+    def get_active_watchlist_tickers(
+        self, tickers: list[str], watchlist_id: int | None = None
+    ) -> set[str]:
+        """Return which of tickers already have an active entry, optionally in a named list."""
+        if not tickers:
+            return set()
+        query = "SELECT DISTINCT ticker FROM nexus.watchlist WHERE ticker = ANY(%s) AND status = 'active'"
+        params: list[Any] = [[t.upper() for t in tickers]]
+        if watchlist_id is not None:
+            query += " AND watchlist_id = %s"
+            params.append(watchlist_id)
+
+        with self.conn.cursor() as cur:
+            cur.execute(query, params)
+            return {r["ticker"] for r in cur.fetchall()}
+
     def get_active_watchlist(self, watchlist_id: int | None = None) -> list[dict]:
         """Get all active watchlist entries, optionally for a named list."""
         query = "SELECT * FROM nexus.watchlist WHERE status = 'active'"
@@ -1293,38 +1386,56 @@ class NexusDB:
             raise RuntimeError(f"Failed to create watchlist: {name}")
         return dict(row)
 
+    _WATCHLIST_INSERT = """
+        INSERT INTO nexus.watchlist (
+            watchlist_id, ticker, entry_trigger, entry_price,
+            invalidation, invalidation_price, expires_at, priority,
+            source, source_analysis, notes
+        )
+        VALUES (
+            %(watchlist_id)s, %(ticker)s, %(entry_trigger)s, %(entry_price)s,
+            %(invalidation)s, %(invalidation_price)s, %(expires_at)s, %(priority)s,
+            %(source)s, %(source_analysis)s, %(notes)s
+        )
+    """
+
+    @staticmethod
+    def _watchlist_entry_params(entry: dict) -> dict:
+        return {
+            "watchlist_id": entry.get("watchlist_id"),
+            "ticker": entry.get("ticker", "").upper(),
+            "entry_trigger": entry.get("entry_trigger"),
+            "entry_price": entry.get("entry_price"),
+            "invalidation": entry.get("invalidation"),
+            "invalidation_price": entry.get("invalidation_price"),
+            "expires_at": entry.get("expires_at"),
+            "priority": entry.get("priority", "medium"),
+            "source": entry.get("source"),
+            "source_analysis": entry.get("source_analysis"),
+            "notes": entry.get("notes"),
+        }
+
     def add_watchlist_entry(self, entry: dict) -> int:
         """Add new watchlist entry. Returns entry ID."""
         with self.conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO nexus.watchlist (
-                    watchlist_id, ticker, entry_trigger, entry_price,
-                    invalidation, invalidation_price, expires_at, priority,
-                    source, source_analysis, notes
-                )
-                VALUES (
-                    %(watchlist_id)s, %(ticker)s, %(entry_trigger)s, %(entry_price)s,
-                    %(invalidation)s, %(invalidation_price)s, %(expires_at)s, %(priority)s,
-                    %(source)s, %(source_analysis)s, %(notes)s
-                )
-                RETURNING id
-            """, {
-                "watchlist_id": entry.get("watchlist_id"),
-                "ticker": entry.get("ticker", "").upper(),
-                "entry_trigger": entry.get("entry_trigger"),
-                "entry_price": entry.get("entry_price"),
-                "invalidation": entry.get("invalidation"),
-                "invalidation_price": entry.get("invalidation_price"),
-                "expires_at": entry.get("expires_at"),
-                "priority": entry.get("priority", "medium"),
-                "source": entry.get("source"),
-                "source_analysis": entry.get("source_analysis"),
-                "notes": entry.get("notes"),
-            })
+            cur.execute(
+                self._WATCHLIST_INSERT + " RETURNING id", self._watchlist_entry_params(entry)
+            )
             entry_id = cur.fetchone()["id"]
         self.conn.commit()
         return entry_id
 
+    def add_watchlist_entries(self, entries: list[dict]) -> int:
+        """Add several watchlist entries in one batch and one commit. Returns the count."""
+        if not entries:
+            return 0
+        with self.conn.cursor() as cur:
+            cur.executemany(
+                self._WATCHLIST_INSERT, [self._watchlist_entry_params(e) for e in entries]
+            )
+        self.conn.commit()
+        return len(entries)
+
     def update_watchlist_status(self, ticker: str, status: str) -> None:
         """Update watchlist entry status."""
         with self.conn.cursor() as cur:
@@ -1343,6 +1454,23 @@ class NexusDB:
             )
         self.conn.commit()
 
+    def bulk_mark_watchlist_expired(self, ids: list[int]) -> list[dict]:
+        """Mark several watchlist entries expired in one UPDATE. Returns the updated (id, ticker) rows."""
+        if not ids:
+            return []
+        with self.conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE nexus.watchlist SET status = 'expired', updated_at = now()
+                WHERE id = ANY(%s) AND status != 'expired'
+                RETURNING id, ticker
+                """,
+                [ids]
+            )
+            updated = cur.fetchall()
+        self.conn.commit()
+        return updated
+
     def get_expired_watchlist(self) -> list[dict]:
         """Get watchlist entries that have expired."""
         with self.conn.cursor() as cur:
@@ -1375,8 +1503,8 @@ class NexusDB:
         self.conn.commit()
         return trade_id
 
-    def close_trade(self, trade_id: int, exit_price: float, exit_reason: str) -> None:
-        """Close a trade and calculate P&L."""
+    def close_trade(self, trade_id: int, exit_price: float, exit_reason: str) -> dict | None:
+        """Close a trade and calculate P&L. Returns {ticker, pnl_pct}, or None if not found."""
         with self.conn.cursor() as cur:
             cur.execute("""
                 UPDATE nexus.trades SET
@@ -1388,8 +1516,11 @@ class NexusDB:
                     pnl_pct = ((%(exit_price)s - entry_price) / NULLIF(entry_price, 0)) * 100,
                     updated_at = now()
                 WHERE id = %(trade_id)s
+                RETURNING ticker, pnl_pct
             """, {"exit_price": exit_price, "exit_reason": exit_reason, "trade_id": trade_id})
+            row = cur.fetchone()
         self.conn.commit()
+        return row
 
     def get_trade(self, trade_id: int) -> dict | None:
         """Get trade by ID."""
@@ -1662,15 +1793,56 @@ class NexusDB:
         log.info(f"Queued task {task_id}: {task_type} for {ticker or 'N/A'}")
         return task_id
 
+    def queue_tasks_bulk(self, rows: list[tuple[str, str | None, str, int]]) -> list[int]:
+        """
+        Queue several (task_type, ticker, prompt, priority) tasks in one batch.
+
+        Uses a pipelined executemany with one commit; cooldowns are not
+        applied, so use queue_task() for deduplicated work. Returns the task
+        IDs in input order.
+        """
+        if not rows:
+            return []
+        with self.conn.cursor() as cur:
+            cur.executemany(
+                """
+                INSERT INTO nexus.task_queue (task_type, ticker, prompt, priority)
+                VALUES (%s, %s, %s, %s)
+                RETURNING id
+                """,
+                [
+                    [task_type, ticker.upper() if ticker else None, prompt, priority]
+                    for task_type, ticker, prompt, priority in rows
+                ],
+                returning=True,
+            )
+            task_ids = []
+            while True:
+                task_ids.append(cur.fetchone()["id"])
+                if not cur.nextset():
+                    break
+        self.conn.commit()
+
+        log.info(f"Queued {len(task_ids)} tasks")
+        return task_ids
+
+    # Waiting tasks gain one priority point per hour (capped at +5) so a steady
+    # stream of high-priority work cannot starve older low-priority tasks
+    _AGED_PRIORITY_ORDER = """
+        ORDER BY priority
+            + LEAST(EXTRACT(EPOCH FROM (now() - created_at)) / 3600.0, 5) DESC,
+            created_at ASC
+    """
+
     def get_pending_tasks(self, limit: int = 10) -> list[dict]:
-        """Get pending tasks ordered by priority."""
+        """Get pending tasks ordered by aged priority (same order process-queue uses)."""
         with self.conn.cursor() as cur:
-            cur.execute("""
-                SELECT * FROM nexus.task_queue
-                WHERE status = 'pending'
-                ORDER BY priority DESC, created_at ASC
-                LIMIT %s
-            """, [limit])
+            cur.execute(
+                "SELECT * FROM nexus.task_queue WHERE status = 'pending'"
+                + self._AGED_PRIORITY_ORDER
+                + "LIMIT %s",
+                [limit],
+            )
             return [dict(r) for r in cur.fetchall()]
 
     def mark_task_started(self, task_id: int) -> None:
@@ -1684,15 +1856,36 @@ class NexusDB:
 
     def mark_task_completed(self, task_id: int, error: str | None = None) -> None:
         """Mark task as completed or failed."""
-        status = 'failed' if error else 'completed'
+        self.mark_tasks_completed([(task_id, error)])
+
+    def mark_tasks_completed(
+        self,
+        outcomes: list[tuple[int, str | None]],
+        retry_ids: list[int] | None = None,
+        delay_minutes: int = 15,
+    ) -> None:
+        """Record (task_id, error) outcomes, then schedule retry_ids, in one commit."""
+        if not outcomes and not retry_ids:
+            return
         with self.conn.cursor() as cur:
-            cur.execute("""
+            cur.executemany("""
                 UPDATE nexus.task_queue SET
                     status = %s,
                     completed_at = now(),
                     error_message = %s
                 WHERE id = %s
-            """, [status, error, task_id])
+            """, [['failed' if error else 'completed', error, task_id] for task_id, error in outcomes])
+            if retry_ids:
+                cur.execute("""
+                    UPDATE nexus.task_queue SET
+                        status = 'pending',
+                        retry_count = retry_count + 1,
+                        next_retry_at = now() + ((%s * power(2, retry_count)) || ' minutes')::interval,
+                        error_message = NULL,
+                        started_at = NULL,
+                        completed_at = NULL
+                    WHERE id = ANY(%s) AND retry_count < COALESCE(max_retries, 3)
+                """, [delay_minutes, list(retry_ids)])
         self.conn.commit()
 
     def get_task_queue_stats(self) -> dict:
@@ -1753,7 +1946,7 @@ class NexusDB:
         return len(stuck)
 
     def get_pending_or_retryable_tasks(self, limit: int = 10) -> list[dict]:
-        """Get pending tasks OR failed tasks ready for retry."""
+        """Get pending tasks OR failed tasks ready for retry, ordered by aged priority."""
         with self.conn.cursor() as cur:
             cur.execute("""
                 SELECT * FROM nexus.task_queue
@@ -1761,9 +1954,7 @@ class NexusDB:
                    OR (status = 'failed'
                        AND retry_count < COALESCE(max_retries, 3)
                        AND (next_retry_at IS NULL OR next_retry_at <= now()))
-                ORDER BY priority DESC, created_at ASC
-                LIMIT %s
-            """, [limit])
+            """ + self._AGED_PRIORITY_ORDER + "LIMIT %s", [limit])
             return [dict(r) for r in cur.fetchall()]
 
     # ─── ADK Run State Methods ─────────────────────────────────────────────
@@ -2049,6 +2240,69 @@ class NexusDB:
         self.conn.commit()
         return archived
 
+    def confirm_detected_trade(
+        self, trade_id: int, thesis: str | None = None, entry_price: float | None = None
+    ) -> dict | None:
+        """
+        Confirm a detected trade in one statement, optionally setting thesis/entry price.
+
+        Returns {source_type, id, ticker}; id and ticker are None when the trade
+        exists but is not detected. Returns None if the trade does not exist.
+        """
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                WITH target AS (
+                    SELECT source_type FROM nexus.trades WHERE id = %s
+                ),
+                confirmed AS (
+                    UPDATE nexus.trades SET
+                        source_type = 'confirmed',
+                        thesis = COALESCE(%s, thesis),
+                        entry_price = COALESCE(%s, entry_price),
+                        updated_at = now()
+                    WHERE id = %s AND source_type = 'detected'
+                    RETURNING id, ticker
+                )
+                SELECT target.source_type, confirmed.id, confirmed.ticker
+                FROM target LEFT JOIN confirmed ON true
+            """, [trade_id, thesis, entry_price, trade_id])
+            row = cur.fetchone()
+        self.conn.commit()
+        return row
+
+    def reject_detected_trade(self, trade_id: int, reason: str | None = None) -> dict | None:
+        """
+        Archive a detected trade in one statement (delete + archive insert).
+
+        Returns {source_type, id, ticker}; id and ticker are None when the trade
+        exists but is not detected. Returns None if the trade does not exist.
+        """
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                WITH target AS (
+                    SELECT source_type FROM nexus.trades WHERE id = %s
+                ),
+                moved AS (
+                    DELETE FROM nexus.trades
+                    WHERE id = %s AND source_type = 'detected'
+                    RETURNING *
+                ),
+                archived AS (
+                    INSERT INTO nexus.trades_archive
+                        (id, ticker, entry_date, entry_price, entry_size, direction,
+                         thesis, source_type, source_analysis, archive_reason)
+                    SELECT id, ticker, entry_date, entry_price, entry_size, direction,
+                           thesis, source_type, source_analysis, %s
+                    FROM moved
+                    RETURNING id, ticker
+                )
+                SELECT target.source_type, archived.id, archived.ticker
+                FROM target LEFT JOIN archived ON true
+            """, [trade_id, trade_id, reason])
+            row = cur.fetchone()
+        self.conn.commit()
+        return row
+
     def record_position_detection(self, ticker: str, size: float, trade_id: int,
                                    full_symbol: str | None = None) -> int | None:
         """Record a position detection for idempotency tracking.
@@ -2215,10 +2469,13 @@ class NexusDB:
     # ─── Analysis Lineage Methods (IPLAN-001) ─────────────────────────────────────
 
     def get_pending_post_earnings_reviews(self) -> list[dict]:
-        """Get earnings analyses that need post-earnings review."""
+        """Get earnings analyses that need post-earnings review (with display-ready date text)."""
         with self.conn.cursor() as cur:
             cur.execute("""
-                SELECT * FROM nexus.analysis_lineage
+                SELECT *,
+                       to_char(earnings_date, 'YYYY-MM-DD') AS earnings_date_str,
+                       to_char(current_analysis_date, 'YYYY-MM-DD HH24:MI:SS') AS analysis_dt_str
+                FROM nexus.analysis_lineage
                 WHERE analysis_type = 'earnings-analysis'
                 AND earnings_date < CURRENT_DATE
                 AND earnings_date >= CURRENT_DATE - INTERVAL '7 days'
@@ -2229,10 +2486,13 @@ class NexusDB:
             return [dict(r) for r in cur.fetchall()]
 
     def get_expired_forecasts(self) -> list[dict]:
-        """Get analyses with expired forecast_valid_until."""
+        """Get analyses with expired forecast_valid_until (with display-ready date text)."""
         with self.conn.cursor() as cur:
             cur.execute("""
-                SELECT * FROM nexus.analysis_lineage
+                SELECT *,
+                       to_char(forecast_valid_until, 'YYYY-MM-DD') AS valid_until_str,
+                       to_char(current_analysis_date, 'YYYY-MM-DD HH24:MI:SS') AS analysis_dt_str
+                FROM nexus.analysis_lineage
                 WHERE forecast_valid_until < CURRENT_DATE
                 AND current_status = 'active'
                 ORDER BY forecast_valid_until DESC
@@ -2483,6 +2743,80 @@ class NexusDB:
             """, [cooldown_key])
             return cur.fetchone() is not None
 
+    # ─── Graph Extraction Ledger (Migration 025) ──────────────────────────────────
+
+    def get_graph_extraction(self, doc_hash: str) -> dict | None:
+        """Get the recorded entity/relation counts for content with this SHA-256, if extracted."""
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "SELECT entities, relations FROM nexus.graph_extracted WHERE doc_hash = %s",
+                [doc_hash],
+            )
+            return cur.fetchone()
+
+    def mark_graph_extracted(
+        self, doc_hash: str, doc_id: str, entities: int, relations: int
+    ) -> None:
+        """Record a completed graph extraction for content with this SHA-256."""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO nexus.graph_extracted (doc_hash, doc_id, entities, relations)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (doc_hash) DO NOTHING
+            """, [doc_hash, doc_id, entities, relations])
+        self.conn.commit()
+
+    def clear_graph_extracted(self) -> int:
+        """Forget all recorded graph extractions (after a graph reset). Returns rows removed."""
+        with self.conn.cursor() as cur:
+            cur.execute("DELETE FROM nexus.graph_extracted")
+            count = cur.rowcount
+        self.conn.commit()
+        return count
+
+    # ─── RAG Ingest Ledger (Migration 026) ────────────────────────────────────────
+
+    def is_content_ingested(self, content_hash: str) -> bool:
+        """Check whether a document with this content hash was already embedded."""
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "SELECT 1 FROM nexus.rag_ingested WHERE content_hash = %s",
+                [content_hash],
+            )
+            return cur.fetchone() is not None
+
+    def mark_content_ingested(self, content_hash: str, ticker: str, doc_path: str) -> None:
+        """Record a completed RAG ingest for a document with this content hash."""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO nexus.rag_ingested (content_hash, ticker, doc_path)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (content_hash) DO NOTHING
+            """, [content_hash, ticker, doc_path])
+        self.conn.commit()
+
+    def clear_rag_ingested(self, doc_id: str | None = None) -> int:
+        """
+        Forget recorded RAG ingests so the content is embedded again.
+
+        With a doc_id, only rows for that document's file are removed (call
+        before deleting it from nexus.rag_documents); without one, all rows
+        are removed (after a RAG reset). Returns rows removed.
+        """
+        with self.conn.cursor() as cur:
+            if doc_id is None:
+                cur.execute("DELETE FROM nexus.rag_ingested")
+            else:
+                cur.execute("""
+                    DELETE FROM nexus.rag_ingested
+                    WHERE doc_path IN (
+                        SELECT file_path FROM nexus.rag_documents WHERE doc_id = %s
+                    )
+                """, [doc_id])
+            count = cur.rowcount
+        self.conn.commit()
+        return count
+
     # ═══════════════════════════════════════════════════════════════════════════
     # Knowledge Base Methods (Migration 009)
     # ═══════════════════════════════════════════════════════════════════════════
@@ -3830,13 +4164,11 @@ class NexusDB:
 
         candidates = data.get("candidates", [])
         if candidates and not top_ticker:
-            # Sort by score descending and get first
-            sorted_candidates = sorted(candidates, key=lambda x: x.get("score", 0), reverse=True)
-            if sorted_candidates:
-                top = sorted_candidates[0]
-                top_ticker = top.get("ticker")
-                top_score = top.get("score")
-                top_action = top.get("action", "analyze" if (top.get("score") or 0) >= 7.5 else "watch")
+            # Highest score (first one on ties); no sorted copy needed
+            top = max(candidates, key=lambda x: x.get("score", 0))
+            top_ticker = top.get("ticker")
+            top_score = top.get("score")
+            top_action = top.get("action", "analyze" if (top.get("score") or 0) >= 7.5 else "watch")
 
         try:
             with self.conn.cursor() as cur:
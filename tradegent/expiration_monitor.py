@@ -72,13 +72,17 @@ class ExpirationMonitor:
             """)
             return [dict(r) for r in cur.fetchall()]
 
-    def process_expirations(self, get_stock_price_fn=None) -> dict:
+    def process_expirations(self, get_stock_price_fn=None, get_stock_prices_fn=None) -> dict:
         """
         Process expired options: auto-close with appropriate action.
 
         Args:
             get_stock_price_fn: Optional function to get stock price for ITM detection.
                                 Signature: (ticker: str) -> float | None
+            get_stock_prices_fn: Optional batch variant, called once with every
+                                 distinct underlying; takes precedence over
+                                 get_stock_price_fn.
+                                 Signature: (tickers: list[str]) -> dict[str, float]
 
         Returns:
             Dict with counts: {expired_worthless: N, needs_review: N, errors: N}
@@ -91,6 +95,15 @@ class ExpirationMonitor:
 
         expired = self.get_expired()
 
+        if get_stock_prices_fn and expired:
+            tickers = sorted({opt["option_underlying"] for opt in expired})
+            try:
+                prices = get_stock_prices_fn(tickers)
+            except Exception as e:
+                log.warning(f"Batch price lookup failed for {len(tickers)} underlyings: {e}")
+                prices = {}
+            get_stock_price_fn = prices.get
+
         for opt in expired:
             try:
                 trade_id = opt["id"]
@@ -5,12 +5,16 @@ import json
 import logging
 import os
 import re
+import threading
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import UTC, datetime
 from pathlib import Path
 
 import requests
 import yaml
 from ratelimit import limits, sleep_and_retry
+from requests.adapters import HTTPAdapter
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
 try:
@@ -37,6 +41,14 @@ from .prompts import ENTITY_EXTRACTION_PROMPT, RELATION_EXTRACTION_PROMPT
 
 log = logging.getLogger(__name__)
 
+# Serializes JSONL appends when documents are extracted concurrently
+_log_lock = threading.Lock()
+
+# Shared keep-alive session for extractor calls (several per document)
+_http_session = requests.Session()
+_http_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
 # Load configuration
 _config_path = Path(__file__).parent / "config.yaml"
 _config: dict = {}
@@ -95,6 +107,7 @@ def extract_document(
     extractor: str | None = None,
     commit: bool = True,
     dry_run: bool = False,
+    graph: TradingGraph | None = None,
 ) -> ExtractionResult:
     """
     Extract entities and relationships from a YAML document.
@@ -115,6 +128,7 @@ def extract_document(
         extractor: LLM backend (ollama, claude-api, openrouter)
         commit: Whether to commit to Neo4j
         dry_run: If True, don't commit even if commit=True
+        graph: Open TradingGraph to commit through (opens one if None)
 
     Returns:
         ExtractionResult with entities and relations
@@ -220,7 +234,7 @@ def extract_document(
     # Commit to Neo4j
     if commit and not dry_run:
         try:
-            _commit_to_graph(result)
+            _commit_to_graph(result, graph)
             result.committed = True
         except GraphUnavailableError as e:
             log.warning(f"Graph unavailable, queuing for retry: {e}")
@@ -235,6 +249,50 @@ def extract_document(
     return result
 
 
+def extract_documents(
+    file_paths: Iterable[str],
+    extractor: str | None = None,
+    commit: bool = True,
+    dry_run: bool = False,
+    workers: int = 1,
+) -> Iterator[tuple[str, ExtractionResult | ExtractionError]]:
+    """
+    Extract many documents through one Neo4j driver.
+
+    Yields (file_path, result) per file; a document that fails extraction
+    yields its ExtractionError instead of aborting the batch. If Neo4j is
+    down at the start, each document falls back to the pending-commit queue.
+    With workers > 1, documents run concurrently and yield in completion order.
+    """
+    graph = None
+    if commit and not dry_run:
+        try:
+            graph = TradingGraph()
+            graph.connect()
+        except GraphUnavailableError as e:
+            log.warning(f"Graph unavailable, commits will be queued: {e}")
+            graph = None
+
+    def _extract_one(file_path: str) -> ExtractionResult | ExtractionError:
+        try:
+            return extract_document(file_path, extractor, commit, dry_run, graph)
+        except ExtractionError as e:
+            return e
+
+    try:
+        if workers <= 1:
+            for file_path in file_paths:
+                yield file_path, _extract_one(file_path)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="graph-extract") as ex:
+                futures = {ex.submit(_extract_one, f): f for f in file_paths}
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+    finally:
+        if graph is not None:
+            graph.close()
+
+
 def extract_text(
     text: str,
     doc_type: str,
@@ -406,7 +464,7 @@ def _call_ollama_rate_limited(prompt: str, model: str, timeout: int) -> str:
     if gen_options:
         payload["options"] = gen_options
 
-    response = requests.post(
+    response = _http_session.post(
         f"{base_url}/api/generate",
         json=payload,
         timeout=timeout,
@@ -497,7 +555,7 @@ def _call_cloud_llm(prompt: str, extractor: str, timeout: int) -> str:
             .get("claude_api", {})
             .get("model", "claude-sonnet-4-20250514")
         )
-        response = requests.post(
+        response = _http_session.post(
             "https://api.anthropic.com/v1/messages",
             headers={
                 "x-api-key": api_key,
@@ -522,7 +580,7 @@ def _call_cloud_llm(prompt: str, extractor: str, timeout: int) -> str:
             .get("openrouter", {})
             .get("model", "anthropic/claude-3-5-sonnet")
         )
-        response = requests.post(
+        response = _http_session.post(
             "https://openrouter.ai/api/v1/chat/completions",
             headers={
                 "Authorization": f"Bearer {api_key}",
@@ -542,7 +600,7 @@ def _call_cloud_llm(prompt: str, extractor: str, timeout: int) -> str:
     elif extractor == "openai":
         api_key = os.getenv("OPENAI_API_KEY", "")
         model = _config.get("extraction", {}).get("openai", {}).get("model", "gpt-4o-mini")
-        response = requests.post(
+        response = _http_session.post(
             "https://api.openai.com/v1/chat/completions",
             headers={
                 "Authorization": f"Bearer {api_key}",
@@ -626,63 +684,86 @@ def _apply_confidence_thresholds(result: ExtractionResult) -> ExtractionResult:
     return result
 
 
-def _commit_to_graph(result: ExtractionResult) -> None:
-    """Commit extraction result to Neo4j."""
-    with TradingGraph() as graph:
-        # Create document node
-        graph.merge_node(
-            "Document",
-            "id",
-            {
-                "id": result.source_doc_id,
-                "file_path": result.source_file_path,
-                "doc_type": result.source_doc_type,
-                "extraction_version": result.extraction_version,
-                "extracted_at": result.extracted_at.isoformat(),
-            },
-        )
-
-        # Create entity nodes
-        for entity in result.entities:
-            key_prop = "symbol" if entity.type == "Ticker" else "name"
-            if entity.type in ("Analysis", "Trade", "Learning", "Document"):
-                key_prop = "id"
+def _node_key(entity_type: str) -> str:
+    """Key property used to MERGE nodes of an entity type."""
+    if entity_type in ("Analysis", "Trade", "Learning", "Document"):
+        return "id"
+    return "symbol" if entity_type == "Ticker" else "name"
 
-            props = {
-                key_prop: entity.value,
-                "extraction_version": result.extraction_version,
-            }
-            props.update(entity.properties)
 
-            if entity.needs_review:
-                props["needs_review"] = True
-
-            graph.merge_node(entity.type, key_prop, props)
+def _commit_to_graph(result: ExtractionResult, graph: TradingGraph | None = None) -> None:
+    """
+    Commit extraction result to Neo4j.
 
-            # Link to document
-            graph.merge_relation(
-                (entity.type, key_prop, entity.value),
-                "EXTRACTED_FROM",
-                ("Document", "id", result.source_doc_id),
+    All writes for the document run in one transaction, one UNWIND statement
+    per node label / relationship shape. A caller committing many documents
+    passes its open graph to reuse the driver.
+    """
+    if graph is None:
+        with TradingGraph() as graph:
+            _commit_to_graph(result, graph)
+        return
+
+    nodes: dict[tuple[str, str], list[dict]] = {}
+    links: dict[tuple[str, str], list[tuple]] = {}
+    relations: dict[tuple, list[tuple]] = {}
+
+    for entity in result.entities:
+        key_prop = _node_key(entity.type)
+        props = {
+            key_prop: entity.value,
+            "extraction_version": result.extraction_version,
+        }
+        props.update(entity.properties)
+
+        if entity.needs_review:
+            props["needs_review"] = True
+
+        nodes.setdefault((entity.type, key_prop), []).append(props)
+        # Link to document
+        links.setdefault((entity.type, key_prop), []).append(
+            (
+                entity.value,
+                result.source_doc_id,
                 {"confidence": entity.confidence, "evidence": entity.evidence[:200]},
             )
+        )
+
+    for rel in result.relations:
+        # Document is not an id-keyed endpoint for extracted relations
+        from_key = "name" if rel.from_entity.type == "Document" else _node_key(rel.from_entity.type)
+        to_key = "name" if rel.to_entity.type == "Document" else _node_key(rel.to_entity.type)
+        shape = (rel.from_entity.type, from_key, rel.relation, rel.to_entity.type, to_key)
+        relations.setdefault(shape, []).append(
+            (rel.from_entity.value, rel.to_entity.value, rel.properties)
+        )
+
+    with graph.transaction() as tx:
+        # Create document node
+        graph.merge_nodes(
+            "Document",
+            "id",
+            [
+                {
+                    "id": result.source_doc_id,
+                    "file_path": result.source_file_path,
+                    "doc_type": result.source_doc_type,
+                    "extraction_version": result.extraction_version,
+                    "extracted_at": result.extracted_at.isoformat(),
+                }
+            ],
+            tx,
+        )
+
+        # Create entity nodes, then link them to the document
+        for (label, key_prop), props_list in nodes.items():
+            graph.merge_nodes(label, key_prop, props_list, tx)
+        for (label, key_prop), rows in links.items():
+            graph.merge_relations((label, key_prop), "EXTRACTED_FROM", ("Document", "id"), rows, tx)
 
         # Create relationships
-        for rel in result.relations:
-            from_key = "symbol" if rel.from_entity.type == "Ticker" else "name"
-            to_key = "symbol" if rel.to_entity.type == "Ticker" else "name"
-
-            if rel.from_entity.type in ("Analysis", "Trade", "Learning"):
-                from_key = "id"
-            if rel.to_entity.type in ("Analysis", "Trade", "Learning"):
-                to_key = "id"
-
-            graph.merge_relation(
-                (rel.from_entity.type, from_key, rel.from_entity.value),
-                rel.relation,
-                (rel.to_entity.type, to_key, rel.to_entity.value),
-                rel.properties,
-            )
+        for (from_label, from_key, rel_type, to_label, to_key), rows in relations.items():
+            graph.merge_relations((from_label, from_key), rel_type, (to_label, to_key), rows, tx)
 
 
 def _queue_pending_commit(result: ExtractionResult) -> None:
@@ -690,7 +771,7 @@ def _queue_pending_commit(result: ExtractionResult) -> None:
     log_path = Path(_config.get("logging", {}).get("pending_commits", "logs/pending_commits.jsonl"))
     log_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(log_path, "a") as f:
+    with _log_lock, open(log_path, "a") as f:
         f.write(
             json.dumps(
                 {
@@ -712,7 +793,7 @@ def _log_extraction(result: ExtractionResult) -> None:
     )
     log_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(log_path, "a") as f:
+    with _log_lock, open(log_path, "a") as f:
         f.write(
             json.dumps(
                 {
@@ -2,6 +2,8 @@
 
 import logging
 import os
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any
 
@@ -300,6 +302,65 @@ class TradingGraph:
                 props=props or {},
             )
 
+    # --- Batched Writes ---
+
+    @contextmanager
+    def transaction(self) -> Iterator[Any]:
+        """Explicit write transaction; commits on clean exit, rolls back on error."""
+        with self._driver.session(database=self.database) as session:
+            with session.begin_transaction() as tx:
+                yield tx
+                tx.commit()
+
+    def merge_nodes(self, label: str, key_prop: str, props_list: list[dict], tx: Any) -> None:
+        """
+        MERGE many nodes of one label with a single UNWIND statement.
+
+        Rows missing key_prop are skipped, as in merge_node.
+        """
+        rows = [
+            {"key_value": props[key_prop], "props": props}
+            for props in props_list
+            if props.get(key_prop) is not None
+        ]
+        if not rows:
+            return
+        tx.run(
+            f"""
+            UNWIND $rows AS row
+            MERGE (n:{label} {{{key_prop}: row.key_value}})
+            SET n += row.props
+            """,
+            rows=rows,
+        )
+
+    def merge_relations(
+        self,
+        from_node: tuple[str, str],  # (label, key_prop)
+        rel_type: str,
+        to_node: tuple[str, str],
+        rows: list[tuple[Any, Any, dict | None]],  # (from_value, to_value, props)
+        tx: Any,
+    ) -> None:
+        """MERGE many relationships of one shape with a single UNWIND statement."""
+        if not rows:
+            return
+        from_label, from_key = from_node
+        to_label, to_key = to_node
+        tx.run(
+            f"""
+            UNWIND $rows AS row
+            MATCH (a:{from_label} {{{from_key}: row.from_value}})
+            MATCH (b:{to_label} {{{to_key}: row.to_value}})
+            MERGE (a)-[r:{rel_type}]->(b)
+            SET r += row.props
+            """,
+            rows=[
+                {"from_value": f, "to_value": t, "props": props or {}}
+                for f, t, props in rows
+            ],
+        )
+
     # --- Query Operations ---
 
     def find_related(self, symbol: str, depth: int = 2) -> list[dict]:
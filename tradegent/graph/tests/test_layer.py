@@ -156,6 +156,41 @@ class TestMergeRelation:
         assert "SET r += $props" in call_args[0][0]
 
 
+class TestBatchedWrites:
+    """Tests for UNWIND-batched writes inside one transaction."""
+
+    @patch("graph.layer.GraphDatabase")
+    def test_merge_nodes_single_unwind_and_commit(self, mock_db):
+        mock_driver = MagicMock()
+        mock_session = MagicMock()
+        mock_tx = MagicMock()
+        mock_driver.session.return_value.__enter__ = MagicMock(return_value=mock_session)
+        mock_driver.session.return_value.__exit__ = MagicMock(return_value=False)
+        mock_session.begin_transaction.return_value.__enter__ = MagicMock(return_value=mock_tx)
+        mock_session.begin_transaction.return_value.__exit__ = MagicMock(return_value=False)
+        mock_db.driver.return_value = mock_driver
+
+        with TradingGraph() as graph:
+            with graph.transaction() as tx:
+                graph.merge_nodes(
+                    "Ticker",
+                    "symbol",
+                    [{"symbol": "NVDA"}, {"name": "no key"}, {"symbol": "AMD"}],
+                    tx,
+                )
+
+        mock_tx.run.assert_called_once()
+        query, kwargs = mock_tx.run.call_args[0][0], mock_tx.run.call_args[1]
+        assert "UNWIND $rows AS row" in query
+        assert [r["key_value"] for r in kwargs["rows"]] == ["NVDA", "AMD"]
+        mock_tx.commit.assert_called_once()
+
+    def test_merge_relations_empty_is_noop(self):
+        tx = MagicMock()
+        TradingGraph().merge_relations(("Ticker", "symbol"), "X", ("Sector", "name"), [], tx)
+        tx.run.assert_not_called()
+
+
 class TestQueries:
     """Tests for query operations."""
 
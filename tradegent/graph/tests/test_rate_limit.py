@@ -16,7 +16,7 @@ class TestRateLimitDecorator:
         # Check the function has rate limit wrapper attributes
         assert hasattr(_call_ollama_rate_limited, "__wrapped__")
 
-    @patch("graph.extract.requests.post")
+    @patch("graph.extract._http_session.post")
     @patch(
         "graph.extract._config",
         {
@@ -18,19 +18,31 @@ Usage:
     python orchestrator.py db-init                            # initialize database schema
 """
 
+import atexit
+import collections
+import hashlib
+import heapq
+import importlib
+import io
 import json
 import logging
 import math
 import os
+import queue
 import re
+import select
+import shutil
 import signal
 import subprocess
 import sys
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed, Future
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from enum import Enum
+from functools import cached_property
+from operator import itemgetter
 from pathlib import Path
 from typing import Any, Callable, Optional
 
@@ -44,6 +56,26 @@ except ImportError:
     # Script mode fallback (entrypoint: python orchestrator.py)
     from adk_runtime.env import load_runtime_env
 
+try:
+    import orjson
+
+    def _json_dumps(obj: Any) -> str:
+        """Serialize to JSON text via orjson (C extension)."""
+        return orjson.dumps(obj).decode()
+
+    def _json_loads(data: str | bytes) -> Any:
+        """Parse JSON via orjson; retry with stdlib for what orjson rejects (NaN, big ints)."""
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data)
+except ImportError:
+    def _json_dumps(obj: Any) -> str:
+        """Serialize to JSON text (stdlib fallback when orjson is not installed)."""
+        return json.dumps(obj)
+
+    _json_loads = json.loads
+
 # Load .env file before any database connections
 _env_path = load_runtime_env(Path(__file__).parent / ".env")
 
@@ -738,6 +770,39 @@ class Settings:
         """Fall back to sequential execution on ThreadPoolExecutor failure."""
         return self._get_bool("parallel_fallback_to_sequential", None, True)
 
+    @property
+    def watchlist_parallelism(self) -> int:
+        """Worker count for watchlist batches (0 = use max_concurrent_runs)."""
+        return int(self._get("watchlist_parallelism", None, 0))
+
+    @property
+    def scanner_pipeline_parallelism(self) -> int:
+        """Worker count for scanner auto-analyze batches (0 = use max_concurrent_runs)."""
+        return int(self._get("scanner_pipeline_parallelism", None, 0))
+
+    @property
+    def skill_use_claude_code(self) -> bool:
+        """Run monitoring skills through Claude Code instead of the Python handlers."""
+        return self._get_bool("skill_use_claude_code", "skills", False)
+
+    @property
+    def detected_position_auto_create_trade(self) -> bool:
+        return self._get_bool("detected_position_auto_create_trade", "skills", True)
+
+    @property
+    def invalidation_alerts_enabled(self) -> bool:
+        return self._get_bool("invalidation_alerts_enabled", "skills", True)
+
+    @property
+    def batch_by_analysis_type(self) -> bool:
+        """Dispatch watchlist runs grouped by analysis type (same prompts/KB lookups back to back)."""
+        return self._get_bool("batch_by_analysis_type", None, False)
+
+    @property
+    def phase_overlap_enabled(self) -> bool:
+        """Overlap Phase 1 of the next ticker with Phase 2 of the current one."""
+        return self._get_bool("phase_overlap_enabled", None, True)
+
     @property
     def auto_execute_enabled(self) -> bool:
         return self._get_bool("auto_execute_enabled", None, False)
@@ -846,6 +911,21 @@ class AnalysisType(Enum):
     POSTMORTEM = "postmortem"
 
 
+# Value → member, avoiding the Enum call path in per-stock loops
+_ATYPE_BY_VALUE = {t.value: t for t in AnalysisType}
+
+
+def _as_analysis_type(value: str) -> AnalysisType:
+    """AnalysisType(value) via a dict lookup; raises ValueError like the Enum call."""
+    try:
+        return _ATYPE_BY_VALUE[value]
+    except KeyError:
+        raise ValueError(f"{value!r} is not a valid AnalysisType") from None
+
+# Pseudo-tickers for portfolio/scan runs: no stock row, no post-analysis work
+_SKIP_TICKERS = frozenset({"PORTFOLIO", "SCAN"})
+
+
 @dataclass
 class AnalysisResult:
     ticker: str
@@ -858,6 +938,7 @@ class AnalysisResult:
     raw_output: str
     parsed_json: dict | None = None
     gate_result: str = "FAIL"
+    chain_data: "AnalysisChainData | None" = None  # Built from parsed_json at write time
 
 
 @dataclass
@@ -878,6 +959,36 @@ class SynthesisContext:
         return not self.has_history and not self.has_graph_data
 
 
+@dataclass
+class PrefetchedPhases:
+    """Phase 1/2 output produced ahead of the pipeline by the overlapped batch driver."""
+    result: AnalysisResult
+    ingest_result: dict
+
+
+@dataclass
+class PipelineContext:
+    """
+    Per-pipeline lookups shared by analysis, watchlist add and execution.
+
+    `stock` is loaded on first access and reused for the rest of the run;
+    callers that write the row drop it with `del ctx.stock`.
+    """
+    db: "NexusDB"
+    ticker: str
+
+    @cached_property
+    def stock(self) -> Stock | None:
+        return self.db.get_stock(self.ticker)
+
+
+def _pipeline_stock(db: "NexusDB", ticker: str, ctx: PipelineContext | None) -> Stock | None:
+    """Stock row for ticker, from the pipeline context when one applies."""
+    if ctx is not None and ctx.ticker == ticker:
+        return ctx.stock
+    return db.get_stock(ticker)
+
+
 # Confidence adjustment rules for Phase 4 synthesis
 CONFIDENCE_MODIFIERS = {
     "no_history": -10,             # No past analyses: reduce 10%
@@ -1158,6 +1269,23 @@ End with JSON:
 
 # ─── Git Push ────────────────────────────────────────────────────────────────
 
+# Absolute executable path, `-C` instead of cwd= and close_fds=False keep
+# subprocess on its posix_spawn path rather than fork+exec of this process.
+_GIT_BIN = shutil.which("git") or "git"
+
+
+def _run_git(
+    repo_path: Path, args: list[str], timeout: int, env: dict | None = None
+) -> subprocess.CompletedProcess:
+    """Run a git command against repo_path, capturing output as bytes."""
+    return subprocess.run(
+        [_GIT_BIN, "-C", str(repo_path), *args],
+        capture_output=True,
+        timeout=timeout,
+        env=env,
+        close_fds=False,
+    )
+
 
 def git_push_analysis(filepath: Path, commit_message: str | None = None) -> bool:
     """
@@ -1190,46 +1318,27 @@ def git_push_analysis(filepath: Path, commit_message: str | None = None) -> bool
 
     try:
         # Git add
-        result = subprocess.run(
-            ["git", "add", str(rel_path)],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
+        result = _run_git(repo_path, ["add", str(rel_path)], timeout=30)
         if result.returncode != 0:
-            log.warning(f"Git add failed: {result.stderr}")
+            log.warning(f"Git add failed: {result.stderr.decode('utf-8', 'replace')}")
             return False
 
         # Git commit
-        result = subprocess.run(
-            ["git", "commit", "-m", commit_message],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
+        result = _run_git(repo_path, ["commit", "-m", commit_message], timeout=30)
         if result.returncode != 0:
-            if "nothing to commit" in result.stdout or "nothing to commit" in result.stderr:
+            if b"nothing to commit" in result.stdout + result.stderr:
                 log.debug("Nothing to commit (file unchanged)")
                 return True
-            log.warning(f"Git commit failed: {result.stderr}")
+            log.warning(f"Git commit failed: {result.stderr.decode('utf-8', 'replace')}")
             return False
 
         # Git push with SSH fix for conda environment
         env = os.environ.copy()
         env["GIT_SSH_COMMAND"] = "LD_LIBRARY_PATH= /usr/bin/ssh"
 
-        result = subprocess.run(
-            ["git", "push"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=60,
-            env=env,
-        )
+        result = _run_git(repo_path, ["push"], timeout=60, env=env)
         if result.returncode != 0:
-            log.warning(f"Git push failed: {result.stderr}")
+            log.warning(f"Git push failed: {result.stderr.decode('utf-8', 'replace')}")
             return False
 
         log.info(f"  ✓ Pushed to GitHub: {rel_path}")
@@ -1245,6 +1354,20 @@ def git_push_analysis(filepath: Path, commit_message: str | None = None) -> bool
 
 # ─── Core Functions ──────────────────────────────────────────────────────────
 
+# (epoch minute, formatted stamp); replaced as one tuple so threads never see a torn pair
+_ts_minute_cache: tuple[int, str] = (-1, "")
+
+
+def _ts_minute() -> str:
+    """Local-time file stamp (%Y%m%dT%H%M), formatted once per minute."""
+    global _ts_minute_cache
+    minute = int(time.time() // 60)
+    cached_minute, stamp = _ts_minute_cache
+    if minute != cached_minute:
+        stamp = datetime.fromtimestamp(minute * 60).strftime("%Y%m%dT%H%M")
+        _ts_minute_cache = (minute, stamp)
+    return stamp
+
 
 def call_claude_code(
     prompt: str,
@@ -1278,6 +1401,33 @@ def call_claude_code(
         return _call_claude_code_untraced(prompt, allowed_tools, label, timeout)
 
 
+# Output of custom schedules marked idempotent, keyed by (prompt, tools, label,
+# day). Such a prompt that fires several times a day reuses its first
+# successful output; failures (empty output) are not cached so the next tick
+# retries. Other custom schedules always call Claude.
+_CUSTOM_OUTPUT_CACHE_MAX = 128
+_custom_output_cache: dict[tuple[str, str, str, date], str] = {}
+_custom_output_cache_lock = threading.Lock()
+
+
+def _call_claude_cached(prompt: str, allowed_tools: str, label: str) -> str:
+    """call_claude_code with per-day memoization of non-empty output."""
+    key = (prompt, allowed_tools, label, now_tradegent().date())
+    with _custom_output_cache_lock:
+        cached = _custom_output_cache.get(key)
+    if cached is not None:
+        log.info(f"[{label}] Reusing today's output for identical prompt")
+        return cached
+
+    output = call_claude_code(prompt, allowed_tools, label)
+    if output:
+        with _custom_output_cache_lock:
+            if len(_custom_output_cache) >= _CUSTOM_OUTPUT_CACHE_MAX:
+                _custom_output_cache.pop(next(iter(_custom_output_cache)), None)
+            _custom_output_cache[key] = output
+    return output
+
+
 def _extract_tool_usage_counts(text: str) -> dict[str, int]:
     """Best-effort extraction of tool name mentions from Claude output."""
     counts: dict[str, int] = {}
@@ -1438,6 +1588,52 @@ def _call_claude_code_untraced(
         return ""
 
 
+_GATE_TAIL_BYTES = 8192
+
+
+def _extract_json_slice(data: bytes) -> bytes | None:
+    """
+    Return the body of the last fenced ```json block in raw file bytes.
+
+    Scans backwards for the fence markers only, so callers can hand the slice
+    straight to the JSON parser without decoding or regex-scanning the whole file.
+    """
+    start = data.rfind(b"```json")
+    if start == -1:
+        return None
+    body_start = data.find(b"\n", start)
+    if body_start == -1:
+        return None
+    body_end = data.find(b"```", body_start)
+    if body_end == -1:
+        return None
+    return data[body_start + 1 : body_end]
+
+
+def _gate_failed(data: bytes) -> bool:
+    """Decide the Do Nothing gate from the analysis JSON block, else text markers."""
+    analysis_json = None
+    json_slice = _extract_json_slice(data)
+    if json_slice:
+        try:
+            analysis_json = _json_loads(json_slice)
+        except json.JSONDecodeError:
+            pass
+    if isinstance(analysis_json, dict) and "gate_passed" in analysis_json:
+        gate_failed = analysis_json["gate_passed"] is False
+    else:
+        gate_failed = b'"gate_passed": false' in data
+    return gate_failed or "GATE: ❌ FAIL".encode() in data
+
+
+def _read_tail(path: Path, size: int) -> bytes:
+    """Read at most the last `size` bytes of a file."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - size))
+        return f.read()
+
+
 def parse_json_block(text: str) -> dict | None:
     """Extract the last JSON block from output."""
     # Try fenced JSON blocks first
@@ -1463,28 +1659,61 @@ def parse_json_block(text: str) -> dict | None:
                     break
     if matches:
         try:
-            return json.loads(matches[-1])
+            return _json_loads(matches[-1])
         except json.JSONDecodeError as e:
             log.warning(f"JSON parse error: {e}")
     return None
 
 
-def kb_ingest_analysis(filepath: Path, metadata: dict):
-    """Ingest analysis document into RAG (pgvector) for semantic search."""
+def kb_ingest_analysis(filepath: Path, metadata: dict) -> bool:
+    """Ingest analysis document into RAG (pgvector) for semantic search.
+
+    Returns True when the document was embedded without error.
+    """
     if not cfg.kb_ingest_enabled:
-        return
+        return False
     try:
         from rag.embed import embed_document
 
         result = embed_document(str(filepath))
         if result.error_message:
             log.warning(f"RAG ingest warning: {result.error_message}")
-        else:
-            log.debug(f"RAG ingest: {result.doc_id} ({result.chunk_count} chunks)")
+            return False
+        log.debug(f"RAG ingest: {result.doc_id} ({result.chunk_count} chunks)")
+        return True
     except ImportError:
         log.debug("RAG module not available, skipping ingest")
     except Exception as e:
         log.warning(f"RAG ingest failed: {e}")
+    return False
+
+
+def _kb_ingest_once(db: "NexusDB", filepath: Path, content: str, metadata: dict) -> None:
+    """
+    Ingest a document unless identical content was already embedded.
+
+    Re-runs that reproduce the same output (scanner refreshes) would otherwise
+    pay embedding cost twice. The ledger is only written after a successful
+    ingest; if it is unreachable, ingest runs as before. `rag reset` and
+    `rag delete` clear the matching ledger rows.
+    """
+    if not cfg.kb_ingest_enabled or not content:
+        return
+    content_hash = hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+    try:
+        if db.is_content_ingested(content_hash):
+            log.info(f"RAG ingest skipped: content unchanged ({filepath.name})")
+            return
+    except Exception as e:
+        log.debug(f"RAG ingest ledger unavailable: {e}")
+        _safe_db_rollback(db, "is_content_ingested")
+
+    if kb_ingest_analysis(filepath, metadata):
+        try:
+            db.mark_content_ingested(content_hash, metadata.get("ticker", ""), str(filepath))
+        except Exception as e:
+            log.debug(f"Failed to record RAG ingest: {e}")
+            _safe_db_rollback(db, "mark_content_ingested")
 
 
 # ─── Knowledge Base Context ──────────────────────────────────────────────────
@@ -1550,6 +1779,44 @@ def kb_ingest_file(file_path: str) -> dict:
 # ─── 4-Phase Workflow Functions ───────────────────────────────────────────────
 
 
+# RAG/Graph callables resolved on first use. A missing module is cached as None
+# so later phases skip the import attempt instead of re-raising ImportError.
+_kb_callables: dict[tuple[str, str], Callable | None] = {}
+
+
+def _kb_callable(module_name: str, attr: str) -> Callable | None:
+    """Return a knowledge-base function by module/attribute name, or None if unavailable."""
+    key = (module_name, attr)
+    if key in _kb_callables:
+        return _kb_callables[key]
+    try:
+        func = getattr(importlib.import_module(module_name), attr)
+    except (ImportError, AttributeError):
+        func = None
+    _kb_callables[key] = func
+    return func
+
+
+# Shared pool for _run_with_timeout, created on first use. Calls made from one
+# of its own threads (e.g. phases inside a timeout-bounded schedule task) get a
+# one-off executor instead, so nested waits can never exhaust the pool.
+_PHASE_POOL_PREFIX = "phase-pool"
+_PHASE_POOL_WORKERS = 16  # room for parallel pipelines plus a few hung timed-out calls
+_phase_pool: ThreadPoolExecutor | None = None
+_phase_pool_lock = threading.Lock()
+
+
+def _get_phase_pool() -> ThreadPoolExecutor:
+    global _phase_pool
+    with _phase_pool_lock:
+        if _phase_pool is None:
+            _phase_pool = ThreadPoolExecutor(
+                max_workers=_PHASE_POOL_WORKERS,
+                thread_name_prefix=_PHASE_POOL_PREFIX,
+            )
+        return _phase_pool
+
+
 def _run_with_timeout(func, timeout: int, phase_name: str, *args, **kwargs):
     """
     Execute a function with timeout. Returns (result, error).
@@ -1563,9 +1830,10 @@ def _run_with_timeout(func, timeout: int, phase_name: str, *args, **kwargs):
     Returns:
         tuple: (result, None) on success, (None, error_message) on failure
     """
-    from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+    from concurrent.futures import TimeoutError as FuturesTimeoutError
 
-    executor = ThreadPoolExecutor(max_workers=1)
+    nested = threading.current_thread().name.startswith(_PHASE_POOL_PREFIX)
+    executor = ThreadPoolExecutor(max_workers=1) if nested else _get_phase_pool()
     future = executor.submit(func, *args, **kwargs)
     try:
         result = future.result(timeout=timeout)
@@ -1581,8 +1849,75 @@ def _run_with_timeout(func, timeout: int, phase_name: str, *args, **kwargs):
         log.error(f"[{phase_name}] Failed: {e}")
         return None, str(e)
     finally:
-        # Do not wait for timed-out work; cancel futures where possible.
-        executor.shutdown(wait=False, cancel_futures=True)
+        if nested:
+            # Do not wait for timed-out work; cancel futures where possible.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _start_phase3(
+    trace_id: str,
+    ticker: str,
+    analysis_type: AnalysisType,
+    result: AnalysisResult,
+    db: "NexusDB",
+) -> Future:
+    """
+    Start Phase 3 in the background so it overlaps Phase 2.
+
+    Retrieval only needs the new doc_id to exclude it from history, and
+    Phase 2 indexes Markdown under the file stem, so the phases are independent.
+    The future resolves to `_run_with_timeout`'s (result, error) pair.
+    """
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="phase3")
+    future = pool.submit(
+        _run_with_timeout,
+        _phase3_retrieve_history,
+        cfg.phase3_timeout,
+        f"{trace_id}/P3",
+        ticker,
+        analysis_type,
+        result.filepath.stem,
+        db,
+    )
+    pool.shutdown(wait=False)
+    return future
+
+
+def _finish_phase3(history_future: Future):
+    """Collect Phase 3 output started by `_start_phase3`. Returns (context, error)."""
+    return history_future.result()
+
+
+def _analysis_filepath(ticker: str, analysis_type: AnalysisType) -> tuple[Path, str]:
+    """Build the Stage 1 markdown output path. Returns (filepath, timestamp)."""
+    timestamp = _ts_minute()
+    return cfg.analyses_dir / f"{ticker}_{analysis_type.value}_{timestamp}.md", timestamp
+
+
+def _analysis_result_from_output(
+    ticker: str, analysis_type: AnalysisType, filepath: Path, output: str
+) -> AnalysisResult:
+    """Build the Stage 1 AnalysisResult from Claude output and its JSON block."""
+    p = parse_json_block(output) or {}
+    chain_data = None
+    if p:
+        try:
+            chain_data = _chain_data_from_dict(p, filepath)
+        except Exception as e:
+            log.debug(f"Chain data not built for {filepath.name}: {e}")
+    return AnalysisResult(
+        ticker=ticker,
+        type=analysis_type,
+        filepath=filepath,
+        gate_passed=p.get("gate_passed", False),
+        gate_result=p.get("gate_result", "FAIL"),
+        recommendation=p.get("recommendation", "UNKNOWN"),
+        confidence=p.get("confidence", 0),
+        expected_value=p.get("expected_value_pct", 0.0),
+        raw_output=output,
+        parsed_json=p or None,
+        chain_data=chain_data,
+    )
 
 
 def _phase1_fresh_analysis(
@@ -1591,15 +1926,15 @@ def _phase1_fresh_analysis(
     analysis_type: AnalysisType,
     schedule_id: int | None = None,
     invocation_source: str = "runtime",
+    ctx: PipelineContext | None = None,
 ) -> AnalysisResult | None:
     """
     Phase 1: Run analysis WITHOUT historical context injection.
 
     This produces an unbiased analysis that can be compared to history.
     """
-    timestamp = datetime.now().strftime("%Y%m%dT%H%M")
-    filepath = cfg.analyses_dir / f"{ticker}_{analysis_type.value}_{timestamp}.md"
-    stock = db.get_stock(ticker) if ticker != "PORTFOLIO" else None
+    filepath, _ = _analysis_filepath(ticker, analysis_type)
+    stock = _pipeline_stock(db, ticker, ctx) if ticker != "PORTFOLIO" else None
 
     log.info(f"[P1] Fresh analysis for {ticker} (kb_enabled=False)")
 
@@ -1628,20 +1963,50 @@ def _phase1_fresh_analysis(
         return None
 
     filepath.write_text(output)
-    parsed = parse_json_block(output)
+    return _analysis_result_from_output(ticker, analysis_type, filepath, output)
 
-    return AnalysisResult(
-        ticker=ticker,
-        type=analysis_type,
-        filepath=filepath,
-        gate_passed=parsed.get("gate_passed", False) if parsed else False,
-        gate_result=(parsed.get("gate_result", "FAIL") if parsed else "FAIL"),
-        recommendation=parsed.get("recommendation", "UNKNOWN") if parsed else "UNKNOWN",
-        confidence=parsed.get("confidence", 0) if parsed else 0,
-        expected_value=parsed.get("expected_value_pct", 0.0) if parsed else 0.0,
-        raw_output=output,
-        parsed_json=parsed,
-    )
+
+def _extract_graph_once(doc_hash: str, doc_id: str, extract: Callable[[], Any]) -> dict:
+    """
+    Run graph extraction unless identical content was already extracted.
+
+    Extraction is an LLM call and deterministic on content, so the SHA-256 of
+    the document is checked against nexus.graph_extracted first; a hit returns
+    the recorded counts with "cached" set. If the ledger is unreachable,
+    extraction runs as before. `graph reset` clears the ledger.
+    """
+    ledger: NexusDB | None = None
+    try:
+        try:
+            ledger = NexusDB(pooled=True).connect()
+            known = ledger.get_graph_extraction(doc_hash)
+            if known:
+                log.info(f"[P2] Graph skipped: content unchanged ({doc_id})")
+                return {
+                    "entities": known["entities"],
+                    "relations": known["relations"],
+                    "cached": True,
+                }
+        except Exception as e:
+            log.debug(f"[P2] Graph extraction ledger unavailable: {e}")
+            if ledger:
+                ledger.close()
+            ledger = None
+
+        result = extract()
+        graph = {"entities": len(result.entities), "relations": len(result.relations)}
+        if ledger and not getattr(result, "error_message", None):
+            try:
+                ledger.mark_graph_extracted(
+                    doc_hash, doc_id, graph["entities"], graph["relations"]
+                )
+            except Exception as e:
+                log.debug(f"[P2] Failed to record graph extraction: {e}")
+                _safe_db_rollback(ledger, "mark_graph_extracted")
+        return graph
+    finally:
+        if ledger:
+            ledger.close()
 
 
 def _phase2_dual_ingest(filepath: Path) -> dict:
@@ -1684,86 +2049,138 @@ def _phase2_dual_ingest(filepath: Path) -> dict:
             return results
 
         # RAG embedding using embed_text for Markdown
-        try:
-            from rag.embed import embed_text
-
-            result = embed_text(
-                text=content,
-                doc_id=doc_id,
-                doc_type=doc_type,
-                ticker=ticker,
-            )
-            results["rag"] = {"chunks": result.chunk_count}
-            results["doc_id"] = result.doc_id
-            log.info(f"[P2] RAG embedded (text): {result.chunk_count} chunks")
-        except ImportError:
+        embed_text = _kb_callable("rag.embed", "embed_text")
+        if embed_text is None:
             results["errors"].append("RAG: module not available")
             log.warning("[P2] RAG module not available")
-        except Exception as e:
-            results["errors"].append(f"RAG: {e}")
-            log.warning(f"[P2] RAG embedding failed: {e}")
+        else:
+            try:
+                result = embed_text(
+                    text=content,
+                    doc_id=doc_id,
+                    doc_type=doc_type,
+                    ticker=ticker,
+                )
+                results["rag"] = {"chunks": result.chunk_count}
+                results["doc_id"] = result.doc_id
+                log.info(f"[P2] RAG embedded (text): {result.chunk_count} chunks")
+            except Exception as e:
+                results["errors"].append(f"RAG: {e}")
+                log.warning(f"[P2] RAG embedding failed: {e}")
 
         # Graph extraction using extract_text for Markdown
-        try:
-            from graph.extract import extract_text
-
-            result = extract_text(
-                text=content,
-                doc_type=doc_type,
-                doc_id=doc_id,
-            )
-            results["graph"] = {
-                "entities": len(result.entities),
-                "relations": len(result.relations),
-            }
-            log.info(f"[P2] Graph indexed (text): {len(result.entities)} entities, {len(result.relations)} relations")
-        except ImportError:
+        extract_text = _kb_callable("graph.extract", "extract_text")
+        if extract_text is None:
             results["errors"].append("Graph: module not available")
             log.warning("[P2] Graph module not available")
-        except Exception as e:
-            results["errors"].append(f"Graph: {e}")
-            log.warning(f"[P2] Graph extraction failed: {e}")
+        else:
+            try:
+                results["graph"] = _extract_graph_once(
+                    hashlib.sha256(content.encode()).hexdigest(),
+                    doc_id,
+                    lambda: extract_text(text=content, doc_type=doc_type, doc_id=doc_id),
+                )
+                if not results["graph"].get("cached"):
+                    log.info(
+                        f"[P2] Graph indexed (text): {results['graph']['entities']} entities, "
+                        f"{results['graph']['relations']} relations"
+                    )
+            except Exception as e:
+                results["errors"].append(f"Graph: {e}")
+                log.warning(f"[P2] Graph extraction failed: {e}")
     else:
         # YAML files use document-based functions
         # RAG embedding (do first to get doc_id)
-        try:
-            from rag.embed import embed_document
-
-            result = embed_document(str(filepath))
-            results["rag"] = {"chunks": result.chunk_count}
-            results["doc_id"] = result.doc_id
-            log.info(f"[P2] RAG embedded: {result.chunk_count} chunks")
-        except ImportError:
+        embed_document = _kb_callable("rag.embed", "embed_document")
+        if embed_document is None:
             results["errors"].append("RAG: module not available")
             log.warning("[P2] RAG module not available")
-        except Exception as e:
-            results["errors"].append(f"RAG: {e}")
-            log.warning(f"[P2] RAG embedding failed: {e}")
+        else:
+            try:
+                result = embed_document(str(filepath))
+                results["rag"] = {"chunks": result.chunk_count}
+                results["doc_id"] = result.doc_id
+                log.info(f"[P2] RAG embedded: {result.chunk_count} chunks")
+            except Exception as e:
+                results["errors"].append(f"RAG: {e}")
+                log.warning(f"[P2] RAG embedding failed: {e}")
 
         # Graph extraction
-        try:
-            from graph.extract import extract_document
-
-            result = extract_document(str(filepath), commit=True)
-            results["graph"] = {
-                "entities": len(result.entities),
-                "relations": len(result.relations),
-            }
-            log.info(f"[P2] Graph indexed: {len(result.entities)} entities, {len(result.relations)} relations")
-        except ImportError:
+        extract_document = _kb_callable("graph.extract", "extract_document")
+        if extract_document is None:
             results["errors"].append("Graph: module not available")
             log.warning("[P2] Graph module not available")
-        except Exception as e:
-            results["errors"].append(f"Graph: {e}")
-            log.warning(f"[P2] Graph extraction failed: {e}")
+        else:
+            try:
+                results["graph"] = _extract_graph_once(
+                    hashlib.sha256(filepath.read_bytes()).hexdigest(),
+                    doc_id,
+                    lambda: extract_document(str(filepath), commit=True),
+                )
+                if not results["graph"].get("cached"):
+                    log.info(
+                        f"[P2] Graph indexed: {results['graph']['entities']} entities, "
+                        f"{results['graph']['relations']} relations"
+                    )
+            except Exception as e:
+                results["errors"].append(f"Graph: {e}")
+                log.warning(f"[P2] Graph extraction failed: {e}")
 
-    # Push any pending changes to GitHub
+    # Push any pending changes to GitHub (off the critical path)
     if cfg.git_push_enabled:
-        git_push_knowledge_repo()
+        queue_git_push()
 
     return results
 
 
+# Background knowledge-repo push: Phase 2 only enqueues; a daemon worker waits
+# a few seconds so back-to-back analyses share one commit + push.
+_GIT_PUSH_COALESCE_SECONDS = 5.0
+_git_push_queue: "queue.Queue[Path]" = queue.Queue()
+_git_push_worker: threading.Thread | None = None
+_git_push_worker_lock = threading.Lock()
+
+
+def _git_push_loop() -> None:
+    """Consume push requests, coalescing everything queued within the window."""
+    while True:
+        _git_push_queue.get()
+        time.sleep(_GIT_PUSH_COALESCE_SECONDS)
+        pending = 1
+        while True:
+            try:
+                _git_push_queue.get_nowait()
+                pending += 1
+            except queue.Empty:
+                break
+        try:
+            git_push_knowledge_repo()
+        except Exception as e:
+            log.warning(f"[Git] Background push failed: {e}")
+        finally:
+            for _ in range(pending):
+                _git_push_queue.task_done()
+
+
+def queue_git_push() -> None:
+    """Request a knowledge-repo push without blocking the caller."""
+    global _git_push_worker
+    with _git_push_worker_lock:
+        if _git_push_worker is None or not _git_push_worker.is_alive():
+            _git_push_worker = threading.Thread(
+                target=_git_push_loop, name="git-push", daemon=True
+            )
+            _git_push_worker.start()
+    _git_push_queue.put(cfg.knowledge_repo_path)
+
+
+@atexit.register
+def _flush_git_push_queue() -> None:
+    """Let a queued push finish before the process exits (one-shot CLI runs)."""
+    if _git_push_worker is not None and _git_push_worker.is_alive():
+        _git_push_queue.join()
+
+
 def git_push_knowledge_repo(commit_message: str | None = None) -> bool:
     """
     Push all pending changes in the knowledge repo to GitHub.
@@ -1780,31 +2197,19 @@ def git_push_knowledge_repo(commit_message: str | None = None) -> bool:
 
     try:
         # Check for changes
-        result = subprocess.run(
-            ["git", "status", "--porcelain"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
+        result = _run_git(repo_path, ["status", "--porcelain"], timeout=30)
         if not result.stdout.strip():
             log.debug("[Git] No changes to push")
             return True
 
         # Count changes
-        changes = [l for l in result.stdout.strip().split("\n") if l.strip()]
+        changes = [l for l in result.stdout.splitlines() if l.strip()]
         log.info(f"[Git] {len(changes)} file(s) to push")
 
         # Git add all changes
-        result = subprocess.run(
-            ["git", "add", "-A"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
+        result = _run_git(repo_path, ["add", "-A"], timeout=30)
         if result.returncode != 0:
-            log.warning(f"[Git] Add failed: {result.stderr}")
+            log.warning(f"[Git] Add failed: {result.stderr.decode('utf-8', 'replace')}")
             return False
 
         # Generate commit message
@@ -1813,33 +2218,20 @@ def git_push_knowledge_repo(commit_message: str | None = None) -> bool:
             commit_message = f"Auto-commit analyses ({ts})"
 
         # Git commit
-        result = subprocess.run(
-            ["git", "commit", "-m", commit_message],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
+        result = _run_git(repo_path, ["commit", "-m", commit_message], timeout=30)
         if result.returncode != 0:
-            if "nothing to commit" in result.stdout or "nothing to commit" in result.stderr:
+            if b"nothing to commit" in result.stdout + result.stderr:
                 return True
-            log.warning(f"[Git] Commit failed: {result.stderr}")
+            log.warning(f"[Git] Commit failed: {result.stderr.decode('utf-8', 'replace')}")
             return False
 
         # Git push with SSH fix
         env = os.environ.copy()
         env["GIT_SSH_COMMAND"] = "LD_LIBRARY_PATH= /usr/bin/ssh"
 
-        result = subprocess.run(
-            ["git", "push"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            timeout=60,
-            env=env,
-        )
+        result = _run_git(repo_path, ["push"], timeout=60, env=env)
         if result.returncode != 0:
-            log.warning(f"[Git] Push failed: {result.stderr}")
+            log.warning(f"[Git] Push failed: {result.stderr.decode('utf-8', 'replace')}")
             return False
 
         log.info(f"  ✓ Pushed {len(changes)} file(s) to GitHub")
@@ -1863,6 +2255,9 @@ def _enrich_past_analyses(vector_results: list, db: "NexusDB") -> list[dict]:
 
     Returns:
         List of enriched dicts with recommendation, confidence, date fields
+
+    The per-ticker lookup is served index-only by
+    idx_analysis_results_ticker_created_covering (migration 024).
     """
     enriched = []
     for result in vector_results:
@@ -1921,9 +2316,23 @@ def _phase3_retrieve_history(
     """
     log.info(f"[P3] Retrieving history for {ticker} (exclude={current_doc_id})")
 
-    try:
-        from rag.hybrid import get_hybrid_context, get_bias_warnings, get_strategy_recommendations
+    get_hybrid_context = _kb_callable("rag.hybrid", "get_hybrid_context")
+    get_bias_warnings = _kb_callable("rag.hybrid", "get_bias_warnings")
+    get_strategy_recommendations = _kb_callable("rag.hybrid", "get_strategy_recommendations")
+    if get_hybrid_context is None or get_bias_warnings is None or get_strategy_recommendations is None:
+        log.warning("[P3] RAG/Graph modules not available")
+        return SynthesisContext(
+            ticker=ticker,
+            past_analyses=[],
+            graph_context={},
+            bias_warnings=[],
+            strategy_recommendations=[],
+            has_history=False,
+            history_count=0,
+            has_graph_data=False,
+        )
 
+    try:
         hybrid = get_hybrid_context(
             ticker=ticker,
             query=f"{analysis_type.value} analysis historical patterns",
@@ -1970,18 +2379,6 @@ def _phase3_retrieve_history(
             has_graph_data=has_graph,
         )
 
-    except ImportError:
-        log.warning("[P3] RAG/Graph modules not available")
-        return SynthesisContext(
-            ticker=ticker,
-            past_analyses=[],
-            graph_context={},
-            bias_warnings=[],
-            strategy_recommendations=[],
-            has_history=False,
-            history_count=0,
-            has_graph_data=False,
-        )
     except Exception as e:
         log.warning(f"[P3] Failed to retrieve history: {e}")
         return SynthesisContext(
@@ -2063,6 +2460,16 @@ def _calculate_adjusted_confidence(
     Returns:
         tuple: (adjusted_confidence: int, modifiers_applied: dict)
     """
+    # Cold start (no history, no graph, no biases) - the common first-analysis
+    # case has a fixed outcome, so skip the branch walk below.
+    if historical.is_first_analysis and not historical.bias_warnings:
+        modifiers = {
+            "first_analysis": CONFIDENCE_MODIFIERS["no_history"],
+            "no_graph": CONFIDENCE_MODIFIERS["no_graph_context"],
+        }
+        adjusted = original_confidence + sum(modifiers.values())
+        return max(0, min(100, adjusted)), modifiers
+
     modifiers = {}
     adjustment = 0
 
@@ -2128,126 +2535,98 @@ def _format_synthesis_section(
     modifiers: dict,
 ) -> str:
     """Generate markdown synthesis section to append to analysis file."""
-    lines = [
-        "",
-        "---",
-        "",
-        "## Historical Comparison (Auto-Generated)",
-        "",
-    ]
+    buf = io.StringIO()
+    write = buf.write
+
+    # Every line is written with a leading newline so the section starts with a
+    # blank separator line and has no trailing newline (same as "\n".join()).
+    write("\n---\n\n## Historical Comparison (Auto-Generated)\n")
 
     if historical.is_first_analysis:
         # First analysis case
-        lines.extend([
-            f"*This is the first analysis for {ticker}*",
-            "",
-            "> **Note**: No historical data available. Confidence adjusted accordingly.",
-            "> Future analyses will benefit from comparison with this baseline.",
-            "",
-            "### Knowledge Graph",
-            "",
-        ])
+        write(f"\n*This is the first analysis for {ticker}*\n")
+        write("\n> **Note**: No historical data available. Confidence adjusted accordingly.")
+        write("\n> Future analyses will benefit from comparison with this baseline.\n")
+        write("\n### Knowledge Graph\n")
         if not historical.has_graph_data:
-            lines.append("*No graph context available yet.*")
-        lines.append("")
+            write("\n*No graph context available yet.*")
+        write("\n")
     else:
         # Has historical data
-        lines.append(f"*Synthesized from {historical.history_count} past analyses*")
-        lines.append("")
+        write(f"\n*Synthesized from {historical.history_count} past analyses*\n")
 
         # Past recommendations table
         if historical.past_analyses:
-            lines.extend([
-                "### Past Recommendations",
-                "",
-                "| Date | Recommendation | Confidence |",
-                "|------|----------------|------------|",
-            ])
+            write("\n### Past Recommendations\n")
+            write("\n| Date | Recommendation | Confidence |")
+            write("\n|------|----------------|------------|")
             for analysis in historical.past_analyses[:5]:  # Limit to 5
                 date_val = analysis.get("date", "N/A")
                 rec = analysis.get("recommendation", "N/A")
                 conf = analysis.get("confidence", "N/A")
                 conf_str = f"{conf}%" if isinstance(conf, (int, float)) else str(conf)
-                lines.append(f"| {date_val} | {rec} | {conf_str} |")
-            lines.append("")
+                write(f"\n| {date_val} | {rec} | {conf_str} |")
+            write("\n")
 
         # Bias warnings
         if historical.bias_warnings:
-            lines.extend([
-                "### Bias Warnings",
-                "",
-            ])
+            write("\n### Bias Warnings\n")
+            bias_warning_each = CONFIDENCE_MODIFIERS["bias_warning_each"]
             for bias in historical.bias_warnings:
                 count = bias.get("occurrences", 1)
-                penalty = count * CONFIDENCE_MODIFIERS["bias_warning_each"]
+                penalty = count * bias_warning_each
                 bias_name = bias.get("bias", "Unknown")
-                lines.append(f"- **{bias_name}**: {count} occurrences ({penalty}%)")
-            lines.append("")
+                write(f"\n- **{bias_name}**: {count} occurrences ({penalty}%)")
+            write("\n")
 
         # Strategy recommendations
         if historical.strategy_recommendations:
-            lines.extend([
-                "### Historical Strategy Performance",
-                "",
-            ])
+            write("\n### Historical Strategy Performance\n")
             for strat in historical.strategy_recommendations[:3]:
                 name = strat.get("strategy", "Unknown")
                 win_rate = strat.get("win_rate", 0)
                 trades = strat.get("trades", 0)
-                lines.append(f"- **{name}**: {win_rate:.0%} win rate ({trades} trades)")
-            lines.append("")
+                write(f"\n- **{name}**: {win_rate:.0%} win rate ({trades} trades)")
+            write("\n")
 
         # Sector peers from graph
         if historical.graph_context and historical.graph_context.get("peers"):
             peers = [p.get("peer", "") for p in historical.graph_context["peers"][:6] if p.get("peer")]
             if peers:
-                lines.extend([
-                    "### Sector Peers",
-                    "",
-                    ", ".join(peers),
-                    "",
-                ])
+                write("\n### Sector Peers\n\n")
+                write(", ".join(peers))
+                write("\n")
 
         # Known risks from graph
         if historical.graph_context and historical.graph_context.get("risks"):
             risks = [r.get("risk", "") for r in historical.graph_context["risks"][:4] if r.get("risk")]
             if risks:
-                lines.extend([
-                    "### Known Risks",
-                    "",
-                    ", ".join(risks),
-                    "",
-                ])
+                write("\n### Known Risks\n\n")
+                write(", ".join(risks))
+                write("\n")
 
     # Confidence adjustment table (always show)
-    lines.extend([
-        "---",
-        "",
-        "### Confidence Adjustment",
-        "",
-        "| Factor | Adjustment |",
-        "|--------|------------|",
-        f"| Original confidence | {original_confidence}% |",
-    ])
+    write("\n---\n\n### Confidence Adjustment\n")
+    write("\n| Factor | Adjustment |")
+    write("\n|--------|------------|")
+    write(f"\n| Original confidence | {original_confidence}% |")
 
     for factor, adjustment in modifiers.items():
         sign = "+" if adjustment > 0 else ""
         factor_display = factor.replace("_", " ").title()
-        lines.append(f"| {factor_display} | {sign}{adjustment}% |")
+        write(f"\n| {factor_display} | {sign}{adjustment}% |")
 
-    lines.append(f"| **Adjusted confidence** | **{adjusted_confidence}%** |")
-    lines.append("")
+    write(f"\n| **Adjusted confidence** | **{adjusted_confidence}%** |")
+    write("\n")
 
     # Summary
     current_rec = current.get("recommendation", "UNKNOWN")
     pattern_desc = _get_pattern_description(modifiers, historical)
-    lines.extend([
-        f"**Current Analysis**: {current_rec}",
-        f"**Adjusted Confidence**: {adjusted_confidence}% (was {original_confidence}%)",
-        f"**Historical Pattern**: {pattern_desc}",
-    ])
+    write(f"\n**Current Analysis**: {current_rec}")
+    write(f"\n**Adjusted Confidence**: {adjusted_confidence}% (was {original_confidence}%)")
+    write(f"\n**Historical Pattern**: {pattern_desc}")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 def _phase4_synthesize(
@@ -2300,9 +2679,9 @@ def _phase4_synthesize(
         modifiers=modifiers_applied,
     )
 
-    # Append to analysis file
-    existing_content = result.filepath.read_text()
-    result.filepath.write_text(existing_content + synthesis)
+    # Append to analysis file (synthesis starts with a newline separator)
+    with result.filepath.open("a", encoding="utf-8") as f:
+        f.write(synthesis)
 
     # Update database with adjusted confidence (if run_id exists)
     if db and run_id:
@@ -2399,17 +2778,58 @@ def _update_analysis_confidence(
                 SET adjusted_confidence = %s,
                     confidence_modifiers = %s
                 WHERE run_id = %s
+                RETURNING run_id
                 """,
-                (adjusted_confidence, json.dumps(modifiers), run_id),
+                (adjusted_confidence, _json_dumps(modifiers), run_id),
             )
+            updated = cur.fetchone() is not None
         db.conn.commit()
-        return cur.rowcount > 0
+        return updated
     except Exception as e:
         log.warning(f"Failed to update analysis confidence: {e}")
         _safe_db_rollback(db, "update_analysis_confidence")
         return False
 
 
+def _update_analysis_confidence_bulk(
+    db: "NexusDB",
+    rows: list[tuple[int, int, dict]],
+) -> int:
+    """
+    Apply several Phase 4 confidence updates in one transaction.
+
+    Args:
+        db: Database connection
+        rows: List of (run_id, adjusted_confidence, modifiers) tuples
+
+    Returns:
+        Number of analysis_results rows updated
+    """
+    if not rows:
+        return 0
+    try:
+        with db.conn.cursor() as cur:
+            cur.executemany(
+                """
+                UPDATE nexus.analysis_results
+                SET adjusted_confidence = %s,
+                    confidence_modifiers = %s
+                WHERE run_id = %s
+                """,
+                [
+                    (adjusted_confidence, _json_dumps(modifiers), run_id)
+                    for run_id, adjusted_confidence, modifiers in rows
+                ],
+            )
+            updated = cur.rowcount
+        db.conn.commit()
+        return max(updated, 0)
+    except Exception as e:
+        log.warning(f"Failed to bulk update analysis confidence: {e}")
+        _safe_db_rollback(db, "update_analysis_confidence_bulk")
+        return 0
+
+
 # ─── Workflow Automation ────────────────────────────────────────────────────
 
 
@@ -2446,81 +2866,178 @@ def extract_chain_data(analysis_path: Path) -> AnalysisChainData | None:
                 return None
             data = parsed
 
-        # Extract recommendation
-        recommendation_raw = data.get('recommendation', 'NEUTRAL')
-        if isinstance(recommendation_raw, dict):
-            recommendation = str(recommendation_raw.get('action', 'NEUTRAL'))
-        else:
-            recommendation = str(recommendation_raw)
-
-        # Extract confidence
-        conf_obj = data.get('confidence', {})
-        if isinstance(conf_obj, dict):
-            confidence = conf_obj.get('level', 50)
-        elif isinstance(conf_obj, (int, float)):
-            confidence = conf_obj
-        elif isinstance(recommendation_raw, dict):
-            confidence = recommendation_raw.get('confidence', 50)
-        else:
-            confidence = 50
-
-        try:
-            confidence = int(round(float(confidence)))
-        except (TypeError, ValueError):
-            confidence = 50
-
-        # Extract gate
-        gate = data.get('do_nothing_gate', {})
-        if isinstance(gate, dict):
-            gate_result = str(gate.get('gate_result', data.get('gate_result', 'FAIL')))
-        else:
-            gate_result = str(data.get('gate_result', 'FAIL'))
-
-        # Extract trade plan
-        trade_plan = data.get('trade_plan', {})
-        if isinstance(trade_plan, dict):
-            entry = trade_plan.get('entry', {})
-            entry_price = entry.get('price') if isinstance(entry, dict) else None
-            stop = trade_plan.get('stop_loss', {})
-            stop_price = stop.get('price') if isinstance(stop, dict) else None
-        else:
-            entry_price = None
-            stop_price = None
-
-        # Extract falsification as invalidation
-        falsification = data.get('falsification', {})
-        if isinstance(falsification, dict):
-            invalidation = falsification.get('thesis_invalid_if', '')
-        else:
-            invalidation = str(falsification) if falsification else ''
-
-        # Extract expected value
-        scenarios = data.get('scenarios', {})
-        if isinstance(scenarios, dict):
-            ev = scenarios.get('expected_value', data.get('expected_value_pct', 0))
-            if isinstance(ev, dict):
-                ev = ev.get('total', data.get('expected_value_pct', 0))
-        else:
-            ev = data.get('expected_value_pct', 0)
-
-        return AnalysisChainData(
-            ticker=data.get('ticker', ''),
-            recommendation=recommendation,
-            confidence=confidence,
-            expected_value=float(ev) if ev else 0.0,
-            entry_price=float(entry_price) if entry_price else None,
-            stop_price=float(stop_price) if stop_price else None,
-            invalidation=invalidation[:200] if invalidation else None,
-            gate_result=gate_result,
-            file_path=str(analysis_path)
-        )
+        return _chain_data_from_dict(data, analysis_path)
     except Exception as e:
         log.warning(f"Failed to extract chain data from {analysis_path}: {e}")
         return None
 
 
+def _chain_data_from_dict(data: dict, analysis_path: Path) -> AnalysisChainData:
+    """Build chaining data from an already-parsed analysis document."""
+    # Extract recommendation
+    recommendation_raw = data.get('recommendation', 'NEUTRAL')
+    if isinstance(recommendation_raw, dict):
+        recommendation = str(recommendation_raw.get('action', 'NEUTRAL'))
+    else:
+        recommendation = str(recommendation_raw)
+
+    # Extract confidence
+    conf_obj = data.get('confidence', {})
+    if isinstance(conf_obj, dict):
+        confidence = conf_obj.get('level', 50)
+    elif isinstance(conf_obj, (int, float)):
+        confidence = conf_obj
+    elif isinstance(recommendation_raw, dict):
+        confidence = recommendation_raw.get('confidence', 50)
+    else:
+        confidence = 50
+
+    try:
+        confidence = int(round(float(confidence)))
+    except (TypeError, ValueError):
+        confidence = 50
+
+    # Extract gate
+    gate = data.get('do_nothing_gate', {})
+    if isinstance(gate, dict):
+        gate_result = str(gate.get('gate_result', data.get('gate_result', 'FAIL')))
+    else:
+        gate_result = str(data.get('gate_result', 'FAIL'))
+
+    # Extract trade plan
+    trade_plan = data.get('trade_plan', {})
+    if isinstance(trade_plan, dict):
+        entry = trade_plan.get('entry', {})
+        entry_price = entry.get('price') if isinstance(entry, dict) else None
+        stop = trade_plan.get('stop_loss', {})
+        stop_price = stop.get('price') if isinstance(stop, dict) else None
+    else:
+        entry_price = None
+        stop_price = None
+
+    # Extract falsification as invalidation
+    falsification = data.get('falsification', {})
+    if isinstance(falsification, dict):
+        invalidation = falsification.get('thesis_invalid_if', '')
+    else:
+        invalidation = str(falsification) if falsification else ''
+
+    # Extract expected value
+    scenarios = data.get('scenarios', {})
+    if isinstance(scenarios, dict):
+        ev = scenarios.get('expected_value', data.get('expected_value_pct', 0))
+        if isinstance(ev, dict):
+            ev = ev.get('total', data.get('expected_value_pct', 0))
+    else:
+        ev = data.get('expected_value_pct', 0)
+
+    return AnalysisChainData(
+        ticker=data.get('ticker', ''),
+        recommendation=recommendation,
+        confidence=confidence,
+        expected_value=float(ev) if ev else 0.0,
+        entry_price=float(entry_price) if entry_price else None,
+        stop_price=float(stop_price) if stop_price else None,
+        invalidation=invalidation[:200] if invalidation else None,
+        gate_result=gate_result,
+        file_path=str(analysis_path)
+    )
+
+
+class _VizWorker:
+    """
+    Long-lived `visualize_combined.py --server` process.
+
+    Spawning the script per ticker pays interpreter startup and YAML/SVG
+    module imports every time; one warm worker serves a whole watchlist or
+    scanner run. Requests are serialized under a lock (one line in, one
+    JSON line out), and the process is restarted after a timeout or crash.
+    Worker stderr (tracebacks, warnings) is forwarded to the orchestrator log.
+    """
+
+    def __init__(self, script_path: Path):
+        self._script_path = script_path
+        self._proc: subprocess.Popen | None = None
+        self._stderr_thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                [sys.executable, str(self._script_path), "--server"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                close_fds=False,  # with no cwd=, lets subprocess use posix_spawn
+            )
+            # Drain continuously so a chatty worker never blocks on a full pipe
+            self._stderr_thread = threading.Thread(
+                target=self._forward_stderr,
+                args=(self._proc.stderr,),
+                name="viz-stderr",
+                daemon=True,
+            )
+            self._stderr_thread.start()
+        return self._proc
+
+    @staticmethod
+    def _forward_stderr(stream) -> None:
+        for line in stream:
+            log.warning(f"  [viz] {line.decode(errors='replace').rstrip()}")
+        stream.close()
+
+    def _stop(self) -> None:
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+        if self._stderr_thread is not None:
+            # Let the crash output reach the log before the failure is reported
+            self._stderr_thread.join(timeout=1)
+            self._stderr_thread = None
+
+    def render(self, ticker: str, timeout: float) -> dict:
+        """Render one ticker; raises TimeoutExpired or RuntimeError on worker failure."""
+        with self._lock:
+            proc = self._start()
+            try:
+                proc.stdin.write(ticker.encode() + b"\n")
+                proc.stdin.flush()
+                ready, _, _ = select.select([proc.stdout], [], [], timeout)
+                line = proc.stdout.readline() if ready else None
+            except OSError as e:
+                self._stop()
+                raise RuntimeError(f"visualization worker failed: {e}") from e
+            if line is None:
+                self._stop()
+                raise subprocess.TimeoutExpired(str(self._script_path), timeout)
+            if not line:
+                self._stop()
+                raise RuntimeError("visualization worker exited")
+            # Parsed straight from bytes; no text-mode decode pass
+            return _json_loads(line)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._proc is not None and self._proc.stdin:
+                self._proc.stdin.close()
+            self._stop()
+
+
+_viz_worker: _VizWorker | None = None
+_viz_worker_lock = threading.Lock()
+
+
+@atexit.register
+def _close_viz_worker() -> None:
+    if _viz_worker is not None:
+        _viz_worker.close()
+
+
 def _generate_visualization(ticker: str, db: "NexusDB") -> str | None:
     """Generate SVG visualization after analysis completion."""
+    global _viz_worker
+
     if not cfg.auto_viz_enabled:
         return None
 
@@ -2529,31 +3046,12 @@ def _generate_visualization(ticker: str, db: "NexusDB") -> str | None:
         log.debug(f"Visualization script not found: {script_path}")
         return None
 
-    try:
-        result = subprocess.run(
-            [sys.executable, str(script_path), ticker, "--json"],
-            capture_output=True,
-            text=True,
-            cwd=str(BASE_DIR),
-            timeout=60  # 60 second timeout
-        )
-
-        if result.returncode == 0:
-            try:
-                output = json.loads(result.stdout)
-                svg_path = output.get('svg_path')
-                if svg_path:
-                    log.info(f"  ✓ Generated visualization: {svg_path}")
-                    return svg_path
-            except json.JSONDecodeError:
-                # Non-JSON output, check if SVG was mentioned
-                if ".svg" in result.stdout:
-                    log.info(f"  ✓ Visualization generated")
-                    return result.stdout.strip()
-        else:
-            log.warning(f"  ⚠ Visualization failed: {result.stderr[:200]}")
-            return None
+    with _viz_worker_lock:
+        if _viz_worker is None:
+            _viz_worker = _VizWorker(script_path)
 
+    try:
+        output = _viz_worker.render(ticker, timeout=60)
     except subprocess.TimeoutExpired:
         log.error("  ✗ Visualization timed out after 60s")
         return None
@@ -2561,6 +3059,15 @@ def _generate_visualization(ticker: str, db: "NexusDB") -> str | None:
         log.error(f"  ✗ Visualization error: {e}")
         return None
 
+    if output.get("error"):
+        log.warning(f"  ⚠ Visualization failed: {output['error'][:200]}")
+        return None
+
+    svg_path = output.get("svg_path")
+    if svg_path:
+        log.info(f"  ✓ Generated visualization: {svg_path}")
+    return svg_path
+
 
 def _chain_to_watchlist(
     db: "NexusDB",
@@ -2594,8 +3101,6 @@ def _chain_to_watchlist(
         )
         return False
 
-    from datetime import timedelta
-
     entry = {
         "watchlist_id": analysis_watchlist["id"],
         "ticker": ticker.upper(),
@@ -2644,18 +3149,55 @@ Trade Details:
 - Original Analysis: {trade.get('source_analysis', 'N/A')}
 
 Follow post-trade-review skill framework (SKILL.md).
-Save review to: tradegent_knowledge/knowledge/reviews/{ticker}_{datetime.now().strftime('%Y%m%dT%H%M')}.yaml"""
+Save review to: tradegent_knowledge/knowledge/reviews/{ticker}_{_ts_minute()}.yaml"""
 
     task_id = db.queue_task("post_trade_review", ticker, prompt, priority=7)
     log.info(f"  → Queued post-trade review: {ticker} (task {task_id})")
     return True
 
 
+# Post-analysis work (visualization, chaining) is off the critical path:
+# callers continue to Stage 2 while it runs. Exit waits for queued runs.
+_post_exec = ThreadPoolExecutor(max_workers=2, thread_name_prefix="post-analysis")
+atexit.register(_post_exec.shutdown, wait=True)
+
+
+def _run_post_analysis(ticker: str, analysis_path: Path, result: "AnalysisResult") -> None:
+    """Run the post-analysis workflow on its own DB connection."""
+    post_db = NexusDB(pooled=True)
+    post_db.connect()
+    try:
+        _post_analysis_workflow(post_db, ticker, analysis_path, result)
+    except Exception:
+        _safe_db_rollback(post_db, "post_analysis_workflow")
+        raise
+    finally:
+        post_db.close()
+
+
+def _submit_post_analysis(
+    ticker: str, analysis_path: Path, result: "AnalysisResult", label: str = ""
+) -> Future | None:
+    """Queue the post-analysis workflow; failures are logged, never raised."""
+    if ticker in _SKIP_TICKERS:
+        return None  # Skip for non-stock analyses
+
+    def _log_failure(future: Future) -> None:
+        exc = future.exception()
+        if exc is not None:
+            prefix = f"[{label}] " if label else ""
+            log.warning(f"{prefix}Post-analysis workflow failed: {exc}")
+
+    future = _post_exec.submit(_run_post_analysis, ticker, analysis_path, result)
+    future.add_done_callback(_log_failure)
+    return future
+
+
 def _post_analysis_workflow(
     db: "NexusDB", ticker: str, analysis_path: Path, result: "AnalysisResult"
 ) -> None:
     """Run post-analysis workflow: visualization, chaining, etc."""
-    if ticker in ("PORTFOLIO", "SCAN"):
+    if ticker in _SKIP_TICKERS:
         return  # Skip for non-stock analyses
 
     log.info(f"[POST] Running post-analysis workflow for {ticker}")
@@ -2663,8 +3205,8 @@ def _post_analysis_workflow(
     # 1. Generate visualization
     svg_path = _generate_visualization(ticker, db)
 
-    # 2. Extract chain data
-    chain_data = extract_chain_data(analysis_path)
+    # 2. Extract chain data (built from parsed_json when the result was written)
+    chain_data = result.chain_data or extract_chain_data(analysis_path)
     if not chain_data:
         # Try to get data from parsed JSON
         if result.parsed_json:
@@ -2698,6 +3240,61 @@ def _post_analysis_workflow(
         log.info(f"  → Gate {gate_result}: {ticker} (EV: {ev:.1f}%)")
 
 
+class _ServiceCounterBuffer:
+    """
+    In-process service counter deltas, flushed to nexus.service_status.
+
+    Every analysis used to UPDATE the single service_status row, so parallel
+    runs queued on that row lock. Increments now only touch a local Counter;
+    a daemon thread writes the accumulated deltas in one UPDATE every few
+    seconds, and exit flushes whatever is left.
+    """
+
+    FLUSH_SECONDS = 5.0
+
+    def __init__(self) -> None:
+        self._pending: collections.Counter[str] = collections.Counter()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+
+    def add(self, *counters: str) -> None:
+        """Count one occurrence of each named counter."""
+        with self._lock:
+            self._pending.update(counters)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._loop, name="service-counters", daemon=True
+                )
+                self._worker.start()
+
+    def _loop(self) -> None:
+        while True:
+            time.sleep(self.FLUSH_SECONDS)
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending deltas; they are kept for the next flush if the DB is unreachable."""
+        with self._lock:
+            deltas, self._pending = self._pending, collections.Counter()
+        if not deltas:
+            return
+        counter_db: NexusDB | None = None
+        try:
+            counter_db = NexusDB(pooled=True).connect()
+            counter_db.add_service_counters(dict(deltas))
+        except Exception as e:
+            log.debug(f"Service counter flush failed: {e}")
+            with self._lock:
+                self._pending.update(deltas)
+        finally:
+            if counter_db:
+                counter_db.close()
+
+
+_service_counters = _ServiceCounterBuffer()
+atexit.register(_service_counters.flush)
+
+
 # ─── Stage 1: Analysis ──────────────────────────────────────────────────────
 
 
@@ -2707,6 +3304,8 @@ def run_analysis(
     analysis_type: AnalysisType,
     schedule_id: int | None = None,
     invocation_source: str = "runtime",
+    prefetched: PrefetchedPhases | None = None,
+    ctx: PipelineContext | None = None,
 ) -> AnalysisResult | None:
     """
     Stage 1: Generate analysis via ADK runtime (default).
@@ -2718,11 +3317,18 @@ def run_analysis(
         Phase 4: Synthesize (compare, adjust confidence, append)
 
     Otherwise uses the legacy 1-pass workflow (KB context before analysis).
+    `prefetched` carries Phase 1/2 output already produced by the overlapped
+    batch driver and only applies to the 4-phase workflow. `ctx` shares the
+    stock lookup with the rest of a pipeline run.
     """
     if cfg.four_phase_analysis_enabled:
-        return _run_analysis_4phase(db, ticker, analysis_type, schedule_id, invocation_source)
+        return _run_analysis_4phase(
+            db, ticker, analysis_type, schedule_id, invocation_source, prefetched, ctx
+        )
     else:
-        return _legacy_run_analysis(db, ticker, analysis_type, schedule_id, invocation_source)
+        return _legacy_run_analysis(
+            db, ticker, analysis_type, schedule_id, invocation_source, ctx
+        )
 
 
 def _run_analysis_4phase(
@@ -2731,6 +3337,8 @@ def _run_analysis_4phase(
     analysis_type: AnalysisType,
     schedule_id: int | None = None,
     invocation_source: str = "runtime",
+    prefetched: PrefetchedPhases | None = None,
+    ctx: PipelineContext | None = None,
 ) -> AnalysisResult | None:
     """
     4-Phase analysis workflow: Fresh → Index → Retrieve → Synthesize
@@ -2746,11 +3354,13 @@ def _run_analysis_4phase(
     # Use PipelineSpan for tracing if observability is enabled
     if _otel_enabled:
         return _run_analysis_4phase_traced(
-            db, ticker, analysis_type, schedule_id, trace_id, run_id, invocation_source
+            db, ticker, analysis_type, schedule_id, trace_id, run_id, invocation_source,
+            prefetched, ctx,
         )
     else:
         return _run_analysis_4phase_untraced(
-            db, ticker, analysis_type, schedule_id, trace_id, run_id, invocation_source
+            db, ticker, analysis_type, schedule_id, trace_id, run_id, invocation_source,
+            prefetched, ctx,
         )
 
 
@@ -2762,6 +3372,8 @@ def _run_analysis_4phase_traced(
     trace_id: str,
     run_id: int | None,
     invocation_source: str,
+    prefetched: PrefetchedPhases | None = None,
+    ctx: PipelineContext | None = None,
 ) -> AnalysisResult | None:
     """4-Phase workflow with OpenTelemetry tracing."""
     import time
@@ -2776,13 +3388,17 @@ def _run_analysis_4phase_traced(
             with pipeline.phase(1, "Fresh_analysis") as phase1_span:
                 log.info(f"[{trace_id}] Phase 1: Fresh analysis")
                 p1_start = time.perf_counter()
-                result = _phase1_fresh_analysis(
-                    db,
-                    ticker,
-                    analysis_type,
-                    schedule_id,
-                    invocation_source,
-                )
+                if prefetched:
+                    result = prefetched.result
+                else:
+                    result = _phase1_fresh_analysis(
+                        db,
+                        ticker,
+                        analysis_type,
+                        schedule_id,
+                        invocation_source,
+                        ctx,
+                    )
                 p1_duration = (time.perf_counter() - p1_start) * 1000
 
                 if _otel_metrics:
@@ -2796,16 +3412,22 @@ def _run_analysis_4phase_traced(
                     log.error(f"[{trace_id}] Phase 1 failed: empty output")
                     return None
 
+            # Phases 2 and 3 overlap: history retrieval runs while ingest does
+            history_future = _start_phase3(trace_id, ticker, analysis_type, result, db)
+
             # Phase 2: Dual ingest (Graph + RAG) WITH TIMEOUT
             with pipeline.phase(2, "Dual_ingest") as phase2_span:
                 log.info(f"[{trace_id}] Phase 2: Dual ingest")
                 p2_start = time.perf_counter()
-                ingest_result, p2_error = _run_with_timeout(
-                    _phase2_dual_ingest,
-                    cfg.phase2_timeout,
-                    f"{trace_id}/P2",
-                    result.filepath,
-                )
+                if prefetched:
+                    p2_error = None
+                else:
+                    _, p2_error = _run_with_timeout(
+                        _phase2_dual_ingest,
+                        cfg.phase2_timeout,
+                        f"{trace_id}/P2",
+                        result.filepath,
+                    )
                 p2_duration = (time.perf_counter() - p2_start) * 1000
 
                 if _otel_metrics:
@@ -2813,21 +3435,12 @@ def _run_analysis_4phase_traced(
 
                 if p2_error:
                     log.warning(f"[{trace_id}] Phase 2 failed: {p2_error}, continuing...")
-                    ingest_result = {"doc_id": None, "errors": [p2_error]}
 
             # Phase 3: Retrieve history WITH TIMEOUT
             with pipeline.phase(3, "Retrieve_history") as phase3_span:
                 log.info(f"[{trace_id}] Phase 3: Retrieve history")
                 p3_start = time.perf_counter()
-                historical_context, p3_error = _run_with_timeout(
-                    _phase3_retrieve_history,
-                    cfg.phase3_timeout,
-                    f"{trace_id}/P3",
-                    ticker,
-                    analysis_type,
-                    ingest_result.get("doc_id") if ingest_result else None,
-                    db,
-                )
+                historical_context, p3_error = _finish_phase3(history_future)
                 p3_duration = (time.perf_counter() - p3_start) * 1000
 
                 if _otel_metrics:
@@ -2897,26 +3510,18 @@ def _run_analysis_4phase_traced(
                     analysis_file=str(result.filepath),
                 )
 
-            if result.parsed_json and ticker not in ("PORTFOLIO", "SCAN"):
+            if result.parsed_json and ticker not in _SKIP_TICKERS:
                 try:
                     db.save_analysis_result(run_id, ticker, analysis_type.value, result.parsed_json)
                 except Exception as e:
                     log.warning(f"Save analysis result failed: {e}")
                     _safe_db_rollback(db, "save_analysis_result_traced")
 
-            # Increment service counters
-            try:
-                db.increment_service_counter("analyses_total")
-                db.increment_service_counter("today_analyses")
-            except Exception:
-                pass
+            # Increment service counters (buffered, flushed in the background)
+            _service_counters.add("analyses_total", "today_analyses")
 
-            # Post-analysis workflow (visualization, chaining)
-            try:
-                _post_analysis_workflow(db, ticker, result.filepath, result)
-            except Exception as e:
-                log.warning(f"[{trace_id}] Post-analysis workflow failed: {e}")
-                _safe_db_rollback(db, "post_analysis_workflow_traced")
+            # Post-analysis workflow (visualization, chaining), in the background
+            _submit_post_analysis(ticker, result.filepath, result, trace_id)
 
             log.info(
                 f"╚═══ 4-PHASE COMPLETE ═══ {ticker} | Gate: {result.gate_result} | "
@@ -2941,18 +3546,24 @@ def _run_analysis_4phase_untraced(
     trace_id: str,
     run_id: int | None,
     invocation_source: str,
+    prefetched: PrefetchedPhases | None = None,
+    ctx: PipelineContext | None = None,
 ) -> AnalysisResult | None:
     """4-Phase workflow without tracing (fallback)."""
     try:
         # Phase 1: Fresh analysis (no KB context)
         log.info(f"[{trace_id}] Phase 1: Fresh analysis")
-        result = _phase1_fresh_analysis(
-            db,
-            ticker,
-            analysis_type,
-            schedule_id,
-            invocation_source,
-        )
+        if prefetched:
+            result = prefetched.result
+        else:
+            result = _phase1_fresh_analysis(
+                db,
+                ticker,
+                analysis_type,
+                schedule_id,
+                invocation_source,
+                ctx,
+            )
         if not result:
             if run_id and schedule_id:
                 db.mark_schedule_completed(
@@ -2961,29 +3572,26 @@ def _run_analysis_4phase_untraced(
             log.error(f"[{trace_id}] Phase 1 failed: empty output")
             return None
 
+        # Phases 2 and 3 overlap: history retrieval runs while ingest does
+        history_future = _start_phase3(trace_id, ticker, analysis_type, result, db)
+
         # Phase 2: Dual ingest (Graph + RAG) WITH TIMEOUT
         log.info(f"[{trace_id}] Phase 2: Dual ingest")
-        ingest_result, p2_error = _run_with_timeout(
-            _phase2_dual_ingest,
-            cfg.phase2_timeout,
-            f"{trace_id}/P2",
-            result.filepath,
-        )
+        if prefetched:
+            p2_error = None
+        else:
+            _, p2_error = _run_with_timeout(
+                _phase2_dual_ingest,
+                cfg.phase2_timeout,
+                f"{trace_id}/P2",
+                result.filepath,
+            )
         if p2_error:
             log.warning(f"[{trace_id}] Phase 2 failed: {p2_error}, continuing...")
-            ingest_result = {"doc_id": None, "errors": [p2_error]}
 
         # Phase 3: Retrieve history WITH TIMEOUT
         log.info(f"[{trace_id}] Phase 3: Retrieve history")
-        historical_context, p3_error = _run_with_timeout(
-            _phase3_retrieve_history,
-            cfg.phase3_timeout,
-            f"{trace_id}/P3",
-            ticker,
-            analysis_type,
-            ingest_result.get("doc_id") if ingest_result else None,
-            db,
-        )
+        historical_context, p3_error = _finish_phase3(history_future)
         if p3_error:
             log.warning(f"[{trace_id}] Phase 3 failed: {p3_error}, using empty context")
             historical_context = SynthesisContext(
@@ -3024,26 +3632,18 @@ def _run_analysis_4phase_untraced(
                 analysis_file=str(result.filepath),
             )
 
-        if result.parsed_json and ticker not in ("PORTFOLIO", "SCAN"):
+        if result.parsed_json and ticker not in _SKIP_TICKERS:
             try:
                 db.save_analysis_result(run_id, ticker, analysis_type.value, result.parsed_json)
             except Exception as e:
                 log.warning(f"Save analysis result failed: {e}")
                 _safe_db_rollback(db, "save_analysis_result_untraced")
 
-        # Increment service counters
-        try:
-            db.increment_service_counter("analyses_total")
-            db.increment_service_counter("today_analyses")
-        except Exception:
-            pass
+        # Increment service counters (buffered, flushed in the background)
+        _service_counters.add("analyses_total", "today_analyses")
 
-        # Post-analysis workflow (visualization, chaining)
-        try:
-            _post_analysis_workflow(db, ticker, result.filepath, result)
-        except Exception as e:
-            log.warning(f"[{trace_id}] Post-analysis workflow failed: {e}")
-            _safe_db_rollback(db, "post_analysis_workflow_untraced")
+        # Post-analysis workflow (visualization, chaining), in the background
+        _submit_post_analysis(ticker, result.filepath, result, trace_id)
 
         log.info(
             f"╚═══ 4-PHASE COMPLETE ═══ {ticker} | Gate: {result.gate_result} | "
@@ -3066,6 +3666,7 @@ def _legacy_run_analysis(
     analysis_type: AnalysisType,
     schedule_id: int | None = None,
     invocation_source: str = "runtime",
+    ctx: PipelineContext | None = None,
 ) -> AnalysisResult | None:
     """
     Legacy analysis workflow (pre-4-phase).
@@ -3073,9 +3674,8 @@ def _legacy_run_analysis(
     Gets KB context BEFORE analysis, then indexes to RAG only.
     Retained for compatibility when four_phase_analysis_enabled=False.
     """
-    timestamp = datetime.now().strftime("%Y%m%dT%H%M")
-    filepath = cfg.analyses_dir / f"{ticker}_{analysis_type.value}_{timestamp}.md"
-    stock = db.get_stock(ticker) if ticker != "PORTFOLIO" else None
+    filepath, timestamp = _analysis_filepath(ticker, analysis_type)
+    stock = _pipeline_stock(db, ticker, ctx) if ticker != "PORTFOLIO" else None
 
     run_id = db.mark_schedule_started(schedule_id) if schedule_id else None
 
@@ -3100,20 +3700,7 @@ def _legacy_run_analysis(
         return None
 
     filepath.write_text(output)
-    parsed = parse_json_block(output)
-
-    result = AnalysisResult(
-        ticker=ticker,
-        type=analysis_type,
-        filepath=filepath,
-        gate_passed=parsed.get("gate_passed", False) if parsed else False,
-        gate_result=(parsed.get("gate_result", "FAIL") if parsed else "FAIL"),
-        recommendation=parsed.get("recommendation", "UNKNOWN") if parsed else "UNKNOWN",
-        confidence=parsed.get("confidence", 0) if parsed else 0,
-        expected_value=parsed.get("expected_value_pct", 0.0) if parsed else 0.0,
-        raw_output=output,
-        parsed_json=parsed,
-    )
+    result = _analysis_result_from_output(ticker, analysis_type, filepath, output)
 
     # Persist to DB
     if run_id and schedule_id:
@@ -3128,15 +3715,17 @@ def _legacy_run_analysis(
             analysis_file=str(filepath),
         )
 
-    if parsed and ticker not in ("PORTFOLIO", "SCAN"):
+    if result.parsed_json and ticker not in _SKIP_TICKERS:
         try:
-            db.save_analysis_result(run_id, ticker, analysis_type.value, parsed)
+            db.save_analysis_result(run_id, ticker, analysis_type.value, result.parsed_json)
         except Exception as e:
             log.warning(f"Save analysis result failed: {e}")
             _safe_db_rollback(db, "save_analysis_result_legacy")
 
-    kb_ingest_analysis(
+    _kb_ingest_once(
+        db,
         filepath,
+        output,
         {
             "ticker": ticker,
             "type": analysis_type.value,
@@ -3145,19 +3734,11 @@ def _legacy_run_analysis(
         },
     )
 
-    # Increment service counters
-    try:
-        db.increment_service_counter("analyses_total")
-        db.increment_service_counter("today_analyses")
-    except Exception:
-        pass
+    # Increment service counters (buffered, flushed in the background)
+    _service_counters.add("analyses_total", "today_analyses")
 
-    # Post-analysis workflow (visualization, chaining)
-    try:
-        _post_analysis_workflow(db, ticker, filepath, result)
-    except Exception as e:
-        log.warning(f"Post-analysis workflow failed: {e}")
-        _safe_db_rollback(db, "post_analysis_workflow_legacy")
+    # Post-analysis workflow (visualization, chaining), in the background
+    _submit_post_analysis(ticker, filepath, result)
 
     log.info(
         f"Analysis: {ticker} | Gate: {result.gate_result} | "
@@ -3169,21 +3750,29 @@ def _legacy_run_analysis(
 # ─── Stage 2: Execution ─────────────────────────────────────────────────────
 
 
-def run_execution(db: NexusDB, analysis_path: Path) -> ExecutionResult:
+def run_execution(
+    db: NexusDB, analysis_path: Path, ctx: PipelineContext | None = None
+) -> ExecutionResult:
     """Stage 2: Read analysis, validate, place paper order."""
 
     log.info(f"═══ STAGE 2: EXECUTION ═══ {analysis_path.name}")
-    content = analysis_path.read_text()
     ticker = analysis_path.stem.split("_")[0]
-    stock = db.get_stock(ticker)
 
-    # Short-circuits
-    if '"gate_passed": false' in content or "GATE: ❌ FAIL" in content:
+    # Short-circuits: the JSON block sits at the end of the analysis, so a
+    # failed gate is usually decided from the tail without reading the file.
+    gate_failed = _gate_failed(_read_tail(analysis_path, _GATE_TAIL_BYTES))
+    if not gate_failed:
+        raw = analysis_path.read_bytes()
+        gate_failed = _gate_failed(raw)
+    if gate_failed:
         log.info("Gate FAILED → skip execution")
         return ExecutionResult(
             analysis_path=analysis_path, order_placed=False, reason="Do Nothing gate failed"
         )
 
+    content = raw.decode("utf-8")
+    stock = _pipeline_stock(db, ticker, ctx)
+
     if stock and stock.state == "analysis":
         log.info(f"{ticker} state=analysis → recommendation only")
 
@@ -3196,7 +3785,7 @@ def run_execution(db: NexusDB, analysis_path: Path) -> ExecutionResult:
         )
 
     parsed = parse_json_block(output)
-    ts = datetime.now().strftime("%Y%m%dT%H%M")
+    ts = _ts_minute()
     trade_path = cfg.trades_dir / f"{ticker}_trade_{ts}.md"
     trade_path.write_text(output)
 
@@ -3239,15 +3828,13 @@ def run_execution(db: NexusDB, analysis_path: Path) -> ExecutionResult:
         except Exception as e:
             log.error(f"Failed to create trade entry: {e}")
 
-    # Increment service counters
-    try:
-        db.increment_service_counter("executions_total")
-        db.increment_service_counter("today_executions")
-    except Exception:
-        pass
+    # Increment service counters (buffered, flushed in the background)
+    _service_counters.add("executions_total", "today_executions")
 
-    kb_ingest_analysis(
+    _kb_ingest_once(
+        db,
         trade_path,
+        output,
         {
             "ticker": ticker,
             "type": "trade_execution",
@@ -3270,18 +3857,21 @@ def run_pipeline(
     auto_execute: bool = True,
     schedule_id: int | None = None,
     source_scanner: str | None = None,
+    prefetched: PrefetchedPhases | None = None,
 ):
     """Full two-stage pipeline."""
     log.info(f"╔═ PIPELINE: {ticker} ({analysis_type.value}) ═╗")
+    ctx = PipelineContext(db, ticker)
 
-    analysis = run_analysis(db, ticker, analysis_type, schedule_id)
+    analysis = run_analysis(
+        db, ticker, analysis_type, schedule_id, prefetched=prefetched, ctx=ctx
+    )
     if not analysis:
         return
 
     # Add to watchlist if gate passed and not already present
     if analysis.gate_passed:
-        existing = db.get_stock(ticker)
-        if not existing:
+        if not ctx.stock:
             # Build tags for new watchlist entry
             tags = [f"gate_passed:{datetime.now().strftime('%Y%m%d')}"]
             if source_scanner:
@@ -3298,6 +3888,7 @@ def run_pipeline(
                 tags=tags,
                 comments=f"Added via scanner gate pass. Rec: {analysis.recommendation}, Conf: {analysis.confidence}%",
             )
+            del ctx.stock
             log.info(f"  ✓ Added {ticker} to watchlist (gate PASS, rec: {analysis.recommendation})")
 
     if not auto_execute or not cfg.auto_execute_enabled or not analysis.gate_passed:
@@ -3311,12 +3902,12 @@ def run_pipeline(
         log.info(f"Pipeline stop: {', '.join(reasons)}")
         return
 
-    stock = db.get_stock(ticker)
+    stock = ctx.stock
     if stock and stock.state == "analysis":
         log.info(f"{ticker} state=analysis → no execution")
         return
 
-    run_execution(db, analysis.filepath)
+    run_execution(db, analysis.filepath, ctx)
 
 
 # ─── Parallel Analysis Execution ─────────────────────────────────────────────
@@ -3350,6 +3941,7 @@ def run_analyses_parallel(
     tasks: list[tuple[str, "AnalysisType", bool]],
     source_scanner: str | None = None,
     progress_callback: Callable[[str, str, int, int], None] | None = None,
+    max_workers: int | None = None,
 ) -> ParallelBatchResult:
     """
     Execute multiple analyses in parallel, respecting max_concurrent_runs.
@@ -3357,6 +3949,7 @@ def run_analyses_parallel(
     Args:
         tasks: List of (ticker, analysis_type, auto_execute) tuples
         source_scanner: Optional scanner code for lineage tracking
+        max_workers: Optional worker count overriding max_concurrent_runs
 
     Thread safety:
         - Each worker creates its own NexusDB connection
@@ -3377,15 +3970,22 @@ def run_analyses_parallel(
     if len(tasks) == 1:
         return _run_analyses_sequential(tasks, source_scanner)
 
-    # Read max_concurrent_runs fresh from DB (allows runtime tuning without restart)
-    check_db = NexusDB()
-    check_db.connect()
-    try:
-        max_concurrent = int(check_db.get_setting('max_concurrent_runs', '2'))
-    finally:
-        check_db.close()
+    if max_workers:
+        max_concurrent = max_workers
+    else:
+        # Read max_concurrent_runs fresh from DB (allows runtime tuning without restart)
+        check_db = NexusDB(pooled=True)
+        check_db.connect()
+        try:
+            max_concurrent = int(check_db.get_setting('max_concurrent_runs', '2'))
+        finally:
+            check_db.close()
 
     max_workers = min(max_concurrent, len(tasks))
+
+    # One worker: overlap Phase 1 of the next ticker with Phase 2 of the current one
+    if max_workers == 1 and cfg.four_phase_analysis_enabled and cfg.phase_overlap_enabled:
+        return _run_analyses_overlapped(tasks, source_scanner, progress_callback)
     result = ParallelBatchResult(total=len(tasks))
     start = time.perf_counter()
 
@@ -3414,7 +4014,7 @@ def run_analyses_parallel(
                 pass
 
         # Create per-thread DB connection
-        thread_db = NexusDB()
+        thread_db = NexusDB(pooled=True)
         thread_db.connect()
         try:
             # Attempt to claim analysis slot (atomic with advisory lock)
@@ -3504,6 +4104,106 @@ def run_analyses_parallel(
     return result
 
 
+def _overlapped_phase2(result: AnalysisResult | None) -> dict | None:
+    """Phase 2 for the overlapped driver, mirroring the timeout handling in the pipeline."""
+    if result is None:
+        return None
+    ingest_result, error = _run_with_timeout(
+        _phase2_dual_ingest,
+        cfg.phase2_timeout,
+        f"{result.ticker}/P2",
+        result.filepath,
+    )
+    if error:
+        log.warning(f"[{result.ticker}] Phase 2 failed: {error}, continuing...")
+        return {"doc_id": None, "errors": [error]}
+    return ingest_result
+
+
+def _run_analyses_overlapped(
+    tasks: list[tuple[str, "AnalysisType", bool]],
+    source_scanner: str | None = None,
+    progress_callback: Callable[[str, str, int, int], None] | None = None,
+) -> ParallelBatchResult:
+    """
+    One-at-a-time batch that overlaps Phase 2 of ticker N with Phase 1 of ticker N+1.
+
+    Phase 1 is dominated by the Claude call and Phase 2 by embedding/graph
+    extraction, so the two run side by side without doubling LLM concurrency.
+    Phases 3-4, post-analysis workflow and execution still run one ticker at
+    a time on a single connection; Phase 2 never touches the DB.
+    """
+    result = ParallelBatchResult(total=len(tasks))
+    start = time.perf_counter()
+    log.info(f"║ OVERLAPPED: {len(tasks)} tasks (Phase 1 ∥ Phase 2) ║")
+
+    seq_db = NexusDB(pooled=True)
+    seq_db.connect()
+
+    def fresh(ticker: str, analysis_type: AnalysisType) -> AnalysisResult | str | None:
+        if not seq_db.claim_analysis_slot():
+            log.warning(f"[{ticker}] Skipped - daily limit reached")
+            return "Daily limit reached"
+        try:
+            return _phase1_fresh_analysis(seq_db, ticker, analysis_type)
+        except Exception as e:
+            log.error(f"[{ticker}] Phase 1 failed: {e}")
+            _safe_db_rollback(seq_db, "overlapped_phase1")
+            return None
+
+    ingest_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="phase2")
+    try:
+        completed = 0
+        ticker0, type0, _ = tasks[0]
+        phase1 = fresh(ticker0, type0)
+        for i, (ticker, analysis_type, auto_execute) in enumerate(tasks):
+            status = "failed"
+            current, phase1 = phase1, None
+            try:
+                # Phase 2 of this ticker runs in the background while Phase 1
+                # of the next ticker runs here.
+                ingest_future = ingest_pool.submit(
+                    _overlapped_phase2, current if isinstance(current, AnalysisResult) else None
+                )
+                if i + 1 < len(tasks):
+                    next_ticker, next_type, _ = tasks[i + 1]
+                    phase1 = fresh(next_ticker, next_type)
+                ingest_result = ingest_future.result()
+
+                if current == "Daily limit reached":
+                    result.skipped += 1
+                    status = "skipped"
+                    continue
+                if current is None:
+                    raise RuntimeError("Phase 1 failed: empty output")
+                run_pipeline(
+                    seq_db, ticker, analysis_type,
+                    auto_execute=auto_execute,
+                    source_scanner=source_scanner,
+                    prefetched=PrefetchedPhases(current, ingest_result),
+                )
+                result.succeeded += 1
+                status = "completed"
+            except Exception as e:
+                log.error(f"[{ticker}] Overlapped analysis failed: {e}")
+                result.failed += 1
+                status = "failed"
+            finally:
+                completed += 1
+                if progress_callback:
+                    try:
+                        progress_callback(ticker, status, completed, result.total)
+                    except Exception as progress_error:
+                        log.debug("Progress callback failed for %s: %s", ticker, progress_error)
+    finally:
+        ingest_pool.shutdown(wait=True)
+        seq_db.close()
+
+    result.duration_ms = int((time.perf_counter() - start) * 1000)
+    log.info(f"║ OVERLAPPED COMPLETE: {result.succeeded}/{result.total} in {result.duration_ms}ms ║")
+    return result
+
+
 def _run_analyses_sequential(
     tasks: list[tuple[str, "AnalysisType", bool]],
     source_scanner: str | None = None,
@@ -3514,7 +4214,7 @@ def _run_analyses_sequential(
     start = time.perf_counter()
 
     # Create connection for sequential execution
-    seq_db = NexusDB()
+    seq_db = NexusDB(pooled=True)
     seq_db.connect()
     try:
         completed = 0
@@ -3546,34 +4246,76 @@ def _run_analyses_sequential(
     return result
 
 
+# Priority boost for watchlist stocks reporting within the earnings window
+EARNINGS_PRIORITY_BOOST = 3
+
+
+def _watchlist_score(stock: Stock) -> int:
+    """Slot priority for a watchlist stock: base priority plus upcoming-earnings boost."""
+    days = stock.days_to_earnings
+    if days is not None and 0 <= days <= 14:
+        return stock.priority + EARNINGS_PRIORITY_BOOST
+    return stock.priority
+
+
+def _group_by_analysis_type(
+    tasks: list[tuple[str, AnalysisType, bool]],
+) -> list[tuple[str, AnalysisType, bool]]:
+    """
+    Reorder tasks into contiguous analysis-type blocks.
+
+    Blocks follow the first appearance of each type and keep slot order within
+    a block, so the top-scoring stock still starts first.
+    """
+    groups: dict[AnalysisType, list[tuple[str, AnalysisType, bool]]] = {}
+    for task in tasks:
+        groups.setdefault(task[1], []).append(task)
+    return [task for group in groups.values() for task in group]
+
+
 def run_watchlist(
     db: NexusDB,
     auto_execute: bool = False,
     progress_callback: Callable[[str, str, int, int], None] | None = None,
 ):
     """Analyze all enabled stocks (parallel if enabled)."""
-    stocks = db.get_enabled_stocks()
     remaining = cfg.max_daily_analyses - db.get_today_run_count()
-    log.info(f"═══ WATCHLIST: {len(stocks)} stocks, {remaining} slots remaining ═══")
-
     if remaining <= 0:
         log.warning("Daily analysis limit reached")
         return
 
-    # Prepare analysis tasks
-    tasks = []
-    for stock in stocks[: max(0, remaining)]:
-        atype = AnalysisType(stock.default_analysis_type)
-        if stock.days_to_earnings is not None and stock.days_to_earnings <= 14:
-            atype = AnalysisType.EARNINGS
-        tasks.append((stock.ticker, atype, auto_execute))
+    stocks = db.get_enabled_stocks()
+    log.info(f"═══ WATCHLIST: {len(stocks)} stocks, {remaining} slots remaining ═══")
+
+    # Highest-scoring stocks get the remaining daily slots (same order as a
+    # stable descending sort, without sorting stocks that won't run)
+    selected = heapq.nlargest(remaining, stocks, key=_watchlist_score)
+
+    # Plan analysis tasks in one pass
+    tasks = [
+        (
+            stock.ticker,
+            AnalysisType.EARNINGS
+            if stock.days_to_earnings is not None and stock.days_to_earnings <= 14
+            else _as_analysis_type(stock.default_analysis_type),
+            auto_execute,
+        )
+        for stock in selected
+    ]
+
+    if cfg.batch_by_analysis_type:
+        tasks = _group_by_analysis_type(tasks)
 
     if not tasks:
         log.info("No stocks to analyze")
         return
 
     # Execute (parallel or sequential based on config)
-    results = run_analyses_parallel(tasks, progress_callback=progress_callback)
+    results = run_analyses_parallel(
+        tasks,
+        progress_callback=progress_callback,
+        max_workers=cfg.watchlist_parallelism or None,
+    )
     log.info(f"Watchlist complete: {results.succeeded}/{results.total} succeeded, "
              f"{results.failed} failed, {results.skipped} skipped")
 
@@ -3623,7 +4365,7 @@ def run_scanners(db: NexusDB, scanner_code: str | None = None):
                 )
                 continue
 
-            ts = datetime.now().strftime("%Y%m%dT%H%M")
+            ts = _ts_minute()
             fp = cfg.analyses_dir / f"scanner_{scanner.scanner_code}_{ts}.md"
             fp.write_text(output)
 
@@ -3656,9 +4398,13 @@ def run_scanners(db: NexusDB, scanner_code: str | None = None):
                     )
 
             if scanner.auto_analyze and valid_candidates:
-                atype = AnalysisType(scanner.analysis_type)
+                atype = _as_analysis_type(scanner.analysis_type)
                 tasks = [(c["ticker"], atype, False) for c in valid_candidates[: scanner.max_candidates]]
-                results = run_analyses_parallel(tasks, source_scanner=scanner.scanner_code)
+                results = run_analyses_parallel(
+                    tasks,
+                    source_scanner=scanner.scanner_code,
+                    max_workers=cfg.scanner_pipeline_parallelism or None,
+                )
                 log.info(f"[SCAN-{scanner.scanner_code}] Auto-analyze: {results.succeeded}/{results.total}")
 
         except Exception as e:
@@ -3705,15 +4451,40 @@ def run_scanners(db: NexusDB, scanner_code: str | None = None):
                     _safe_db_rollback(db, f"scanner_{scanner.scanner_code}_finalize_retry_failed")
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ScanResult:
-    """Result from a scanner for routing."""
+    """Result from a scanner for routing (compact and hashable)."""
     ticker: str
     score: float
     scanner_name: str
     catalyst: str = ""
 
 
+def _partition_scan_results(
+    results: list[ScanResult],
+) -> tuple[list[tuple[float, int, ScanResult]], list[ScanResult], int]:
+    """
+    Split results into score tiers in one pass.
+
+    Returns (high, medium, skipped): high as a heap of (-score, index, result)
+    for score >= 7.5, medium results (5.5 <= score < 7.5) in input order, and
+    the count below 5.5.
+    """
+    high: list[tuple[float, int, ScanResult]] = []
+    medium: list[ScanResult] = []
+    skipped = 0
+    for i, r in enumerate(results):
+        score = r.score
+        if score >= 7.5:
+            high.append((-score, i, r))
+        elif score >= 5.5:
+            medium.append(r)
+        else:
+            skipped += 1
+    heapq.heapify(high)
+    return high, medium, skipped
+
+
 def _route_scanner_results(db: NexusDB, scanner_name: str, results: list[ScanResult]) -> dict:
     """Route scanner results based on score thresholds."""
     if not cfg.scanner_auto_route:
@@ -3725,60 +4496,114 @@ def _route_scanner_results(db: NexusDB, scanner_name: str, results: list[ScanRes
     max_queue = cfg.max_concurrent_runs
     queued = 0
 
-    for result in sorted(results, key=lambda x: x.score, reverse=True):
+    # High scores -> full analysis, best first. A heap yields only as many as
+    # the queue takes (cooldown skips don't use a slot) instead of sorting all.
+    high, medium, stats["skipped"] = _partition_scan_results(results)
+    analysis_type = "earnings" if "earnings" in scanner_name.lower() else "stock"
+    while high and queued < max_queue:
+        _, _, result = heapq.heappop(high)
         ticker = result.ticker
         score = result.score
 
-        if score >= 7.5 and queued < max_queue:
-            # High score -> Trigger full analysis
-            analysis_type = "earnings" if "earnings" in scanner_name.lower() else "stock"
-
-            task_id = db.queue_analysis(ticker, analysis_type, priority=int(score))
-            if task_id:
-                log.info(f"  → High score ({score:.1f}): Queued analysis for {ticker}")
-                stats["analyzed"] += 1
-                queued += 1
-            else:
-                log.debug(f"  → {ticker} in cooldown, skipping")
-                stats["skipped"] += 1
-
-        elif score >= 5.5:
-            # Medium score -> Add to watchlist
-            scanner_watchlist = db.get_or_create_watchlist(
-                name=scanner_name,
-                description=f"Candidates produced by scanner {scanner_name}.",
-                source_type="scanner",
-                source_ref=scanner_name,
-                color="#f97316",
-                is_pinned=True,
-            )
-            existing = db.get_watchlist_entry(ticker, watchlist_id=scanner_watchlist["id"])
-            if not existing:
-                from datetime import timedelta
-                db.add_watchlist_entry({
-                    "watchlist_id": scanner_watchlist["id"],
-                    "ticker": ticker,
-                    "entry_trigger": result.catalyst or "Scanner trigger",
-                    "entry_price": None,
-                    "invalidation": "Score drops below 5.5",
-                    "invalidation_price": None,
-                    "expires_at": (datetime.now() + timedelta(days=14)).isoformat(),
-                    "priority": "low",
-                    "source": f"scanner:{scanner_name}",
-                    "source_analysis": None,
-                    "notes": f"Score: {score:.1f}",
-                })
-                log.info(
-                    f"  → Medium score ({score:.1f}): Added {ticker} to watchlist {scanner_watchlist['name']}"
-                )
-                stats["watchlisted"] += 1
+        task_id = db.queue_analysis(ticker, analysis_type, priority=int(score))
+        if task_id:
+            log.info(f"  → High score ({score:.1f}): Queued analysis for {ticker}")
+            stats["analyzed"] += 1
+            queued += 1
         else:
+            log.debug(f"  → {ticker} in cooldown, skipping")
             stats["skipped"] += 1
 
+    # High scores beyond the queue limit fall through to the watchlist tier
+    medium[:0] = [r for _, _, r in high]
+
+    if medium:
+        # Medium score -> Add to watchlist (one existence query, one batched insert)
+        expires_at = (datetime.now() + timedelta(days=14)).isoformat()
+        scanner_watchlist = db.get_or_create_watchlist(
+            name=scanner_name,
+            description=f"Candidates produced by scanner {scanner_name}.",
+            source_type="scanner",
+            source_ref=scanner_name,
+            color="#f97316",
+            is_pinned=True,
+        )
+        seen = db.get_active_watchlist_tickers(
+            [r.ticker for r in medium], watchlist_id=scanner_watchlist["id"]
+        )
+        to_add = []
+        for result in medium:
+            ticker = result.ticker.upper()
+            if ticker in seen:
+                continue
+            seen.add(ticker)
+            to_add.append(result)
+
+        db.add_watchlist_entries([
+            {
+                "watchlist_id": scanner_watchlist["id"],
+                "ticker": result.ticker,
+                "entry_trigger": result.catalyst or "Scanner trigger",
+                "entry_price": None,
+                "invalidation": "Score drops below 5.5",
+                "invalidation_price": None,
+                "expires_at": expires_at,
+                "priority": "low",
+                "source": f"scanner:{scanner_name}",
+                "source_analysis": None,
+                "notes": f"Score: {result.score:.1f}",
+            }
+            for result in to_add
+        ])
+        for result in to_add:
+            log.info(
+                f"  → Medium score ({result.score:.1f}): Added {result.ticker} "
+                f"to watchlist {scanner_watchlist['name']}"
+            )
+        stats["watchlisted"] += len(to_add)
+
     return stats
 
 
-def process_task_queue(db: NexusDB, max_tasks: int = 5) -> dict:
+class _TokenBucket:
+    """Token bucket: holds at most capacity tokens, refilled continuously."""
+
+    def __init__(self, capacity: float, refill_per_sec: float, tokens: float | None = None):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = capacity if tokens is None else tokens
+        self._last = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.refill_per_sec)
+        self._last = now
+
+    def try_consume(self, n: int = 1) -> bool:
+        self._refill()
+        if self.tokens >= n:
+            self.tokens -= n
+            return True
+        return False
+
+
+def _daily_analysis_bucket(today_analyses: int, max_analyses: int, burst: int) -> _TokenBucket:
+    """
+    Rebuild the analysis token bucket from today's persisted count.
+
+    Tokens accrue at max_analyses per day on top of an initial burst and never
+    past the daily cap, so the level follows from today_analyses and the clock
+    and survives restarts without extra state.
+    """
+    burst = max(1, min(burst, max_analyses))
+    now = now_tradegent()
+    elapsed = (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
+    rate = max_analyses / 86400
+    earned = min(max_analyses, burst + rate * elapsed)
+    return _TokenBucket(burst, rate, tokens=max(0.0, min(burst, earned - today_analyses)))
+
+
+def process_task_queue(db: NexusDB, max_tasks: int = 5) -> dict:
     """
     Process pending tasks from queue.
 
@@ -3804,78 +4629,88 @@ def process_task_queue(db: NexusDB, max_tasks: int = 5) -> dict:
 
     log.info(f"═══ TASK QUEUE: {len(tasks)} tasks ═══")
 
-    # Get daily limits
+    # Get daily limits (write buffered counters first so the count is current)
+    _service_counters.flush()
     service_status = db.get_service_status() or {}
     today_analyses = service_status.get("today_analyses", 0)
     max_analyses = int(cfg._get("max_daily_analyses", "rate_limits", "20"))
-
-    retry_delay = int(cfg._get("task_retry_delay_minutes", "scheduler", "15"))
-
+    # Analyses are paced across the day rather than spent in one burst
+    burst = int(cfg._get("analysis_burst", "rate_limits", "5"))
+    analysis_bucket = _daily_analysis_bucket(today_analyses, max_analyses, burst)
+
+    # Rows arrive in effective-priority order: admit the first analysis tasks
+    # that fit today's remaining budget, defer the rest in one step.
+    remaining = max(0, max_analyses - today_analyses)
+    admitted: set[int] = set()
+    deferred: list[int] = []
     for task in tasks:
-        task_id = task["id"]
-        task_type = task["task_type"]
-        ticker = task.get("ticker")
-        is_retry = task.get("retry_count", 0) > 0
-
-        # Check daily limits for analysis tasks
-        if task_type == "analysis" and today_analyses >= max_analyses:
-            log.info(f"Skipping task {task_id}: daily analysis limit reached ({today_analyses}/{max_analyses})")
-            results["skipped"] += 1
+        if task["task_type"] != "analysis":
             continue
+        if len(admitted) < remaining and analysis_bucket.try_consume():
+            admitted.add(task["id"])
+        else:
+            deferred.append(task["id"])
+    if deferred:
+        reason = "daily analysis limit reached" if not remaining else "analysis rate limit"
+        log.info(f"Deferring tasks {deferred}: {reason} ({today_analyses}/{max_analyses} today)")
+        results["skipped"] += len(deferred)
+        tasks = [t for t in tasks if t["task_type"] != "analysis" or t["id"] in admitted]
 
-        log.info(f"{'Retrying' if is_retry else 'Processing'} task {task_id}: {task_type} for {ticker or 'N/A'}")
-        db.mark_task_started(task_id)
-
-        try:
-            if task_type == "analysis":
-                _process_analysis_task(db, task)
-                today_analyses += 1
-
-            elif task_type == "post_trade_review":
-                _process_post_trade_review_task(db, task)
-
-            elif task_type == "detected_position":
-                _process_detected_position_task(db, task)
+    retry_delay = int(cfg._get("task_retry_delay_minutes", "scheduler", "15"))
 
-            elif task_type == "fill_analysis":
-                _process_fill_analysis_task(db, task)
+    # Outcomes are written behind in one statement batch. Starts stay per task:
+    # started_at is the clock recover_stuck_tasks measures against.
+    outcomes: list[tuple[int, str | None]] = []
+    retry_ids: list[int] = []
 
-            elif task_type == "position_close_review":
-                _process_position_close_review_task(db, task)
+    def flush_outcomes() -> None:
+        if outcomes:
+            db.mark_tasks_completed(outcomes[:], retry_ids[:], retry_delay)
+            outcomes.clear()
+            retry_ids.clear()
 
-            elif task_type == "options_management":
-                _process_options_management_task(db, task)
+    try:
+        for task in tasks:
+            task_id = task["id"]
+            task_type = task["task_type"]
+            ticker = task.get("ticker")
+            is_retry = task.get("retry_count", 0) > 0
 
-            elif task_type == "expiration_review":
-                _process_expiration_review_task(db, task)
+            if task_type == "analysis":
+                # Long-running: don't leave finished tasks looking 'running' meanwhile
+                flush_outcomes()
 
-            elif task_type == "post_earnings_review":
-                _process_post_earnings_review_task(db, task)
+            log.info(f"{'Retrying' if is_retry else 'Processing'} task {task_id}: {task_type} for {ticker or 'N/A'}")
+            db.mark_task_started(task_id)
 
-            elif task_type == "report_validation":
-                _process_report_validation_task(db, task)
+            try:
+                handler = _TASK_HANDLERS.get(task_type)
+                if handler is None:
+                    log.warning(f"Unknown task type: {task_type}")
+                    raise ValueError(f"Unknown task type: {task_type}")
 
-            else:
-                log.warning(f"Unknown task type: {task_type}")
-                raise ValueError(f"Unknown task type: {task_type}")
+                handler(db, task)
 
-            db.mark_task_completed(task_id)
-            results["succeeded"] += 1
-            if is_retry:
-                results["retried"] += 1
+                outcomes.append((task_id, None))
+                results["succeeded"] += 1
+                if is_retry:
+                    results["retried"] += 1
 
-        except Exception as e:
-            log.error(f"Task {task_id} failed: {e}")
-            db.mark_task_completed(task_id, error=str(e))
+            except Exception as e:
+                log.error(f"Task {task_id} failed: {e}")
+                _safe_db_rollback(db, f"task {task_id}")
+                outcomes.append((task_id, str(e)))
 
-            # Schedule retry if retries remaining
-            if task.get("retry_count", 0) < task.get("max_retries", 3):
-                db.mark_task_for_retry(task_id, retry_delay)
-                log.info(f"Task {task_id} scheduled for retry")
+                # Schedule retry if retries remaining
+                if task.get("retry_count", 0) < task.get("max_retries", 3):
+                    retry_ids.append(task_id)
+                    log.info(f"Task {task_id} scheduled for retry")
 
-            results["failed"] += 1
+                results["failed"] += 1
 
-        results["processed"] += 1
+            results["processed"] += 1
+    finally:
+        flush_outcomes()
 
     log.info(f"Task queue results: {results}")
     return results
@@ -3884,7 +4719,7 @@ def process_task_queue(db: NexusDB, max_tasks: int = 5) -> dict:
 def _process_analysis_task(db: NexusDB, task: dict):
     """Process an analysis task."""
     ticker = task["ticker"]
-    analysis_type = AnalysisType(task.get("analysis_type", "stock"))
+    analysis_type = _as_analysis_type(task.get("analysis_type") or "stock")
 
     result = run_analysis(db, ticker, analysis_type)
     if not result:
@@ -3922,25 +4757,31 @@ def _process_post_trade_review_task(db: NexusDB, task: dict):
         log.info(f"  ✓ Post-trade review complete: {ticker}")
 
 
+# Patterns like "trade_id: 123" or "Trade 123" or "trade 123"
+_TRADE_ID_RE = re.compile(r'trade[_\s]?(?:id)?[:\s]*(\d+)', re.IGNORECASE)
+_ORDER_ID_RE = re.compile(r'order[_\s]?(?:id)?[:\s]*(\d+)', re.IGNORECASE)
+# YAML file paths in the knowledge directory, most specific first
+_REVIEW_PATH_RES = (
+    re.compile(r'(tradegent_knowledge/knowledge/reviews/[^\s]+\.yaml)'),
+    re.compile(r'Saved to[:\s]*([^\s]+\.yaml)'),
+    re.compile(r'Review saved[:\s]*([^\s]+\.yaml)'),
+)
+# "key: value" lines in task prompts written by service.py
+_PROMPT_KV_RE = re.compile(
+    r'^(analysis_file|prior_file|new_file|trigger):[ \t]*(.+)$', re.MULTILINE
+)
+
+
 def _extract_trade_id_from_prompt(prompt: str) -> int | None:
     """Extract trade ID from review prompt."""
-    import re
-    # Look for patterns like "trade_id: 123" or "Trade 123" or "trade 123"
-    match = re.search(r'trade[_\s]?(?:id)?[:\s]*(\d+)', prompt, re.IGNORECASE)
+    match = _TRADE_ID_RE.search(prompt)
     return int(match.group(1)) if match else None
 
 
 def _extract_review_path(output: str) -> str | None:
     """Extract review file path from Claude output."""
-    import re
-    # Look for YAML file paths in knowledge directory
-    patterns = [
-        r'(tradegent_knowledge/knowledge/reviews/[^\s]+\.yaml)',
-        r'Saved to[:\s]*([^\s]+\.yaml)',
-        r'Review saved[:\s]*([^\s]+\.yaml)',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, output)
+    for pattern in _REVIEW_PATH_RES:
+        match = pattern.search(output)
         if match:
             return match.group(1)
     return None
@@ -3948,45 +4789,100 @@ def _extract_review_path(output: str) -> str | None:
 
 # ─── Skill Task Handlers (Monitoring Integration) ────────────────────────────
 
+@dataclass(frozen=True)
+class _SkillSpec:
+    """How a skill splits between Claude Code and its Python handler.
+
+    mode:
+        "either"  - Claude when enabled, otherwise Python (if python_gate allows)
+        "enhance" - Python always; Claude enhances a result with enhance_status,
+                    given enhance_fields from the Python result
+        "claude"  - Claude only; skipped when disabled
+    """
+    mode: str
+    python_gate: str | None = None
+    enhance_status: str | None = None
+    enhance_fields: tuple[str, ...] = ()
+
+
+_SKILL_SPECS: dict[str, _SkillSpec] = {
+    "detected-position": _SkillSpec("either", python_gate="detected_position_auto_create_trade"),
+    "options-management": _SkillSpec("either"),
+    "fill-analysis": _SkillSpec(
+        "enhance", enhance_status="analyzed",
+        enhance_fields=("slippage", "slippage_pct", "grade", "fill_price", "mid_price"),
+    ),
+    "position-close-review": _SkillSpec(
+        "enhance", enhance_status="reviewed",
+        enhance_fields=("pnl", "pnl_pct", "holding_days", "is_significant", "trade_id"),
+    ),
+    "expiration-review": _SkillSpec(
+        "enhance", enhance_status="reviewed", enhance_fields=("outcome", "pnl"),
+    ),
+    "post-earnings-review": _SkillSpec("claude"),
+    "report-validation": _SkillSpec("claude"),
+}
+
+
+def _run_skill(db: NexusDB, skill: str, context: dict, task_id: int) -> tuple[dict | None, str]:
+    """
+    Run a skill per its _SKILL_SPECS entry.
+
+    Returns (result, path) where path is "claude", "python", "skipped", or
+    "enhance_failed" (Python result kept, Claude enhancement raised).
+    """
+    from skill_handlers import invoke_skill_claude, invoke_skill_python
+
+    spec = _SKILL_SPECS[skill]
+    use_claude = cfg.skill_use_claude_code
+
+    if spec.mode == "claude":
+        if not use_claude:
+            return None, "skipped"
+        return invoke_skill_claude(db, skill, context, task_id), "claude"
+
+    if spec.mode == "either":
+        if use_claude:
+            return invoke_skill_claude(db, skill, context, task_id), "claude"
+        if spec.python_gate and not getattr(cfg, spec.python_gate):
+            return None, "skipped"
+        return invoke_skill_python(db, skill, context, task_id), "python"
+
+    result = invoke_skill_python(db, skill, context, task_id)
+    if not use_claude or result.get("status") != spec.enhance_status:
+        return result, "python"
+    try:
+        # Add Python results to context for Claude enhancement
+        context.update({field: result.get(field) for field in spec.enhance_fields})
+        invoke_skill_claude(db, skill, context, task_id)
+        return result, "claude"
+    except Exception as e:
+        log.warning(f"Claude {skill} enhancement failed: {e}")
+        return result, "enhance_failed"
+
+
 def _process_detected_position_task(db: NexusDB, task: dict):
     """Process detected position task.
 
     Triggered by position_monitor when a new position is detected externally.
     Uses Claude Code for full analysis if enabled, otherwise basic Python handler.
     """
-    from skill_handlers import (
-        invoke_skill_python,
-        invoke_skill_claude,
-        _parse_detected_position_prompt,
-    )
+    from skill_handlers import _parse_detected_position_prompt
 
     ticker = task["ticker"]
-    prompt = task.get("prompt", "")
-    task_id = task["id"]
 
     # Parse context from prompt
-    context = _parse_detected_position_prompt(prompt)
+    context = _parse_detected_position_prompt(task.get("prompt", ""))
     context["ticker"] = ticker
     context["source"] = "position_monitor"
 
-    # Check if Claude Code is enabled
-    _use_claude = cfg._get("skill_use_claude_code", "skills", "false")
-    use_claude = _use_claude if isinstance(_use_claude, bool) else str(_use_claude).lower() == "true"
-    _auto_create = cfg._get("detected_position_auto_create_trade", "skills", "true")
-    auto_create = _auto_create if isinstance(_auto_create, bool) else str(_auto_create).lower() == "true"
-
-    if use_claude:
-        # Full AI analysis
-        result = invoke_skill_claude(db, "detected-position", context, task_id)
+    _, path = _run_skill(db, "detected-position", context, task["id"])
+    if path == "claude":
         log.info(f"  ✓ Claude analysis complete for detected {ticker} position")
-    elif auto_create:
-        # Python fallback: create basic trade entry
-        result = invoke_skill_python(db, "detected-position", context, task_id)
+    elif path == "python":
         log.info(f"  ✓ Basic trade entry created for detected {ticker} position")
     else:
-        # Just log, don't create trade
         log.info(f"Detected position for {ticker} logged but not auto-created (setting disabled)")
-        result = {"status": "logged_only"}
 
 
 def _process_fill_analysis_task(db: NexusDB, task: dict):
@@ -3994,17 +4890,13 @@ def _process_fill_analysis_task(db: NexusDB, task: dict):
 
     Triggered by order_reconciler when an order is filled.
     Analyzes fill quality: slippage, timing, execution efficiency.
-    Uses Claude Code for enhanced analysis if enabled, otherwise Python handler.
+    Python computes the metrics; Claude adds execution suggestions if enabled.
     """
-    from skill_handlers import invoke_skill_python, invoke_skill_claude
-
     ticker = task.get("ticker")
     prompt = task.get("prompt", "")
-    task_id = task["id"]
 
     # Extract order_id from prompt if present
-    import re
-    match = re.search(r'order[_\s]?(?:id)?[:\s]*(\d+)', prompt, re.IGNORECASE)
+    match = _ORDER_ID_RE.search(prompt)
     order_id = match.group(1) if match else None
 
     context = {
@@ -4014,25 +4906,9 @@ def _process_fill_analysis_task(db: NexusDB, task: dict):
         "source": "order_reconciler"
     }
 
-    # Always run Python for basic metrics
-    result = invoke_skill_python(db, "fill-analysis", context, task_id)
-
-    # Optionally use Claude for enhanced analysis (execution improvement suggestions)
-    _uc = cfg._get("skill_use_claude_code", "skills", "false")
-    use_claude = _uc if isinstance(_uc, bool) else str(_uc).lower() == "true"
-    if use_claude and result.get("status") == "analyzed":
-        try:
-            # Add Python results to context for Claude enhancement
-            context["slippage"] = result.get("slippage")
-            context["slippage_pct"] = result.get("slippage_pct")
-            context["grade"] = result.get("grade")
-            context["fill_price"] = result.get("fill_price")
-            context["mid_price"] = result.get("mid_price")
-            claude_result = invoke_skill_claude(db, "fill-analysis", context, task_id)
-            log.info(f"  ✓ Fill analysis with recommendations: {ticker} grade {result.get('grade', 'N/A')}")
-        except Exception as e:
-            log.warning(f"Claude fill analysis enhancement failed: {e}")
-            log.info(f"  ✓ Fill analysis: {ticker} grade {result.get('grade', 'N/A')}")
+    result, path = _run_skill(db, "fill-analysis", context, task["id"])
+    if path == "claude":
+        log.info(f"  ✓ Fill analysis with recommendations: {ticker} grade {result.get('grade', 'N/A')}")
     elif result.get("status") == "analyzed":
         log.info(f"  ✓ Fill analysis: {ticker} grade {result.get('grade', 'N/A')}")
     else:
@@ -4044,12 +4920,9 @@ def _process_position_close_review_task(db: NexusDB, task: dict):
 
     Triggered by position_monitor when a position is fully closed.
     Calculates P&L and queues full post-trade review if significant.
-    Uses Claude Code for enhanced analysis if enabled, otherwise Python handler.
+    Python computes P&L; Claude adds a quick analysis if enabled.
     """
-    from skill_handlers import invoke_skill_python, invoke_skill_claude
-
     ticker = task.get("ticker")
-    task_id = task["id"]
 
     context = {
         "ticker": ticker,
@@ -4057,31 +4930,12 @@ def _process_position_close_review_task(db: NexusDB, task: dict):
         "source": "position_monitor"
     }
 
-    # Always run Python for P&L calculation and significance check
-    result = invoke_skill_python(db, "position-close-review", context, task_id)
-
-    # Optionally use Claude for immediate quick analysis (before full review)
-    _uc = cfg._get("skill_use_claude_code", "skills", "false")
-    use_claude = _uc if isinstance(_uc, bool) else str(_uc).lower() == "true"
-    if use_claude and result.get("status") == "reviewed":
-        try:
-            # Add Python results to context for Claude enhancement
-            context["pnl"] = result.get("pnl")
-            context["pnl_pct"] = result.get("pnl_pct")
-            context["holding_days"] = result.get("holding_days")
-            context["is_significant"] = result.get("is_significant")
-            context["trade_id"] = result.get("trade_id")
-            claude_result = invoke_skill_claude(db, "position-close-review", context, task_id)
-            if result.get("is_significant"):
-                log.info(f"  ✓ Position close review with analysis: {ticker} (significant, queued full review)")
-            else:
-                log.info(f"  ✓ Position close review with analysis: {ticker}")
-        except Exception as e:
-            log.warning(f"Claude position close review enhancement failed: {e}")
-            if result.get("is_significant"):
-                log.info(f"  ✓ Position close review: {ticker} (significant, queued full review)")
-            else:
-                log.info(f"  ✓ Position close review: {ticker} (not significant)")
+    result, path = _run_skill(db, "position-close-review", context, task["id"])
+    if path == "claude":
+        if result.get("is_significant"):
+            log.info(f"  ✓ Position close review with analysis: {ticker} (significant, queued full review)")
+        else:
+            log.info(f"  ✓ Position close review with analysis: {ticker}")
     elif result.get("is_significant"):
         log.info(f"  ✓ Position close review: {ticker} (significant, queued full review)")
     else:
@@ -4094,28 +4948,19 @@ def _process_options_management_task(db: NexusDB, task: dict):
     Triggered by expiration_monitor for expiring options, or by user request.
     Uses Claude Code for full analysis if enabled, otherwise basic Python summary.
     """
-    from skill_handlers import invoke_skill_python, invoke_skill_claude
-
     ticker = task.get("ticker")
-    prompt = task.get("prompt", "")
-    task_id = task["id"]
 
     context = {
         "ticker": ticker,
         "trigger": "expiration_warning",
-        "prompt": prompt,
+        "prompt": task.get("prompt", ""),
         "source": "expiration_monitor"
     }
 
-    # Options management can use Claude Code for complex roll decisions
-    _uc = cfg._get("skill_use_claude_code", "skills", "false")
-    use_claude = _uc if isinstance(_uc, bool) else str(_uc).lower() == "true"
-
-    if use_claude:
-        result = invoke_skill_claude(db, "options-management", context, task_id)
+    result, path = _run_skill(db, "options-management", context, task["id"])
+    if path == "claude":
         log.info(f"  ✓ Options management analysis complete for {ticker}")
     else:
-        result = invoke_skill_python(db, "options-management", context, task_id)
         log.info(f"  ✓ Options summary: {result.get('count', 0)} positions")
 
 
@@ -4125,10 +4970,7 @@ def _process_expiration_review_task(db: NexusDB, task: dict):
     Triggered by expiration_monitor when options expire.
     Always runs Python for P&L calculation, optionally uses Claude for lesson extraction.
     """
-    from skill_handlers import invoke_skill_python, invoke_skill_claude
-
     ticker = task.get("ticker")
-    task_id = task["id"]
 
     context = {
         "ticker": ticker,
@@ -4136,21 +4978,10 @@ def _process_expiration_review_task(db: NexusDB, task: dict):
         "source": "expiration_monitor"
     }
 
-    # Always run Python for P&L calculation
-    result = invoke_skill_python(db, "expiration-review", context, task_id)
-
-    # Optionally use Claude for lesson extraction
-    _uc = cfg._get("skill_use_claude_code", "skills", "false")
-    use_claude = _uc if isinstance(_uc, bool) else str(_uc).lower() == "true"
-    if use_claude and result.get("status") == "reviewed":
-        try:
-            context["outcome"] = result.get("outcome")
-            context["pnl"] = result.get("pnl")
-            claude_result = invoke_skill_claude(db, "expiration-review", context, task_id)
-            log.info(f"  ✓ Expiration review with lessons: {ticker}")
-        except Exception as e:
-            log.warning(f"Claude lesson extraction failed: {e}")
-    else:
+    result, path = _run_skill(db, "expiration-review", context, task["id"])
+    if path == "claude":
+        log.info(f"  ✓ Expiration review with lessons: {ticker}")
+    elif path == "python":
         log.info(f"  ✓ Expiration review: {ticker} {result.get('outcome', '')}")
 
 
@@ -4165,12 +4996,8 @@ def _process_post_earnings_review_task(db: NexusDB, task: dict):
     prompt = task.get("prompt", "")
 
     # Extract analysis file from prompt if present
-    analysis_file = None
-    if "analysis_file:" in prompt:
-        for line in prompt.split("\n"):
-            if line.startswith("analysis_file:"):
-                analysis_file = line.split(":", 1)[1].strip()
-                break
+    kv = {m.group(1): m.group(2).strip() for m in _PROMPT_KV_RE.finditer(prompt)}
+    analysis_file = kv.get("analysis_file")
 
     if not analysis_file:
         # Try to find latest earnings analysis
@@ -4180,13 +5007,6 @@ def _process_post_earnings_review_task(db: NexusDB, task: dict):
         log.warning(f"No earnings analysis found for {ticker} - skipping review")
         return
 
-    # Check if Claude mode is enabled
-    _uc = cfg._get("skill_use_claude_code", "skills", "false")
-    use_claude = _uc if isinstance(_uc, bool) else str(_uc).lower() == "true"
-    if not use_claude:
-        log.info(f"  ⊘ Post-earnings review skipped (Claude disabled): {ticker}")
-        return
-
     # Build context for skill invocation
     context = {
         "ticker": ticker,
@@ -4195,9 +5015,11 @@ def _process_post_earnings_review_task(db: NexusDB, task: dict):
     }
 
     try:
-        from skill_handlers import invoke_skill_claude
+        result, path = _run_skill(db, "post-earnings-review", context, task_id)
+        if path == "skipped":
+            log.info(f"  ⊘ Post-earnings review skipped (Claude disabled): {ticker}")
+            return
 
-        result = invoke_skill_claude(db, "post-earnings-review", context, task_id)
         review_file = result.get("review_file")
         grade = result.get("grade", "?")
 
@@ -4241,17 +5063,10 @@ def _process_report_validation_task(db: NexusDB, task: dict):
     prompt = task.get("prompt", "")
 
     # Extract files from prompt
-    prior_file = None
-    new_file = None
-    trigger = "new_analysis"
-
-    for line in prompt.split("\n"):
-        if line.startswith("prior_file:"):
-            prior_file = line.split(":", 1)[1].strip()
-        elif line.startswith("new_file:"):
-            new_file = line.split(":", 1)[1].strip()
-        elif line.startswith("trigger:"):
-            trigger = line.split(":", 1)[1].strip()
+    kv = {m.group(1): m.group(2).strip() for m in _PROMPT_KV_RE.finditer(prompt)}
+    prior_file = kv.get("prior_file")
+    new_file = kv.get("new_file")
+    trigger = kv.get("trigger", "new_analysis")
 
     # For expiry validation, we only have prior file
     if trigger == "forecast_expiry" and prior_file and not new_file:
@@ -4273,13 +5088,6 @@ def _process_report_validation_task(db: NexusDB, task: dict):
         log.warning(f"No prior analysis found for {ticker} - skipping validation")
         return
 
-    # Check if Claude mode is enabled
-    _uc = cfg._get("skill_use_claude_code", "skills", "false")
-    use_claude = _uc if isinstance(_uc, bool) else str(_uc).lower() == "true"
-    if not use_claude:
-        log.info(f"  ⊘ Report validation skipped (Claude disabled): {ticker}")
-        return
-
     # Build context for skill invocation
     context = {
         "ticker": ticker,
@@ -4290,9 +5098,11 @@ def _process_report_validation_task(db: NexusDB, task: dict):
     }
 
     try:
-        from skill_handlers import invoke_skill_claude
+        result, path = _run_skill(db, "report-validation", context, task_id)
+        if path == "skipped":
+            log.info(f"  ⊘ Report validation skipped (Claude disabled): {ticker}")
+            return
 
-        result = invoke_skill_claude(db, "report-validation", context, task_id)
         validation_result = result.get("validation_result")
         validation_file = result.get("validation_file")
 
@@ -4315,9 +5125,7 @@ def _process_report_validation_task(db: NexusDB, task: dict):
                     db.invalidate_watchlist_entry(ticker, invalidation_reason)
 
                     # Send alert if enabled
-                    _ae = cfg._get("invalidation_alerts_enabled", "skills", "true")
-                    alerts_enabled = _ae if isinstance(_ae, bool) else str(_ae).lower() == "true"
-                    if alerts_enabled:
+                    if cfg.invalidation_alerts_enabled:
                         _send_invalidation_alert(ticker, validation_result, invalidation_reason)
 
                     log.warning(f"  ⚠ INVALIDATED: {ticker} - {invalidation_reason}")
@@ -4347,32 +5155,77 @@ def _process_report_validation_task(db: NexusDB, task: dict):
         raise
 
 
+# Static frame of the invalidation alert banner
+_ALERT_TOP = "╔" + "═" * 66 + "╗"
+_ALERT_TITLE = "║  ⚠️  ANALYSIS INVALIDATED                                        ║"
+_ALERT_MID = "╠" + "═" * 66 + "╣"
+_ALERT_BOT = "╚" + "═" * 66 + "╝"
+
+
 def _send_invalidation_alert(ticker: str, result: str, reason: str):
     """Send alert when analysis is invalidated.
 
     Currently logs to console. Can be extended to send email/Slack/etc.
     """
-    alert_msg = f"""
-╔══════════════════════════════════════════════════════════════════╗
-║  ⚠️  ANALYSIS INVALIDATED                                        ║
-╠══════════════════════════════════════════════════════════════════╣
-║  Ticker: {ticker:<54} ║
-║  Result: {result:<54} ║
-║  Reason: {reason[:54]:<54} ║
-╚══════════════════════════════════════════════════════════════════╝
-"""
+    alert_msg = "\n".join((
+        "",
+        _ALERT_TOP,
+        _ALERT_TITLE,
+        _ALERT_MID,
+        f"║  Ticker: {ticker:<54} ║",
+        f"║  Result: {result:<54} ║",
+        f"║  Reason: {reason[:54]:<54} ║",
+        _ALERT_BOT,
+        "",
+    ))
     log.warning(alert_msg)
     # TODO: Add email/Slack notification integration
 
 
+# task_type → handler(db, task) for process_task_queue
+_TASK_HANDLERS: dict[str, Callable[[NexusDB, dict], None]] = {
+    "analysis": _process_analysis_task,
+    "post_trade_review": _process_post_trade_review_task,
+    "detected_position": _process_detected_position_task,
+    "fill_analysis": _process_fill_analysis_task,
+    "position_close_review": _process_position_close_review_task,
+    "options_management": _process_options_management_task,
+    "expiration_review": _process_expiration_review_task,
+    "post_earnings_review": _process_post_earnings_review_task,
+    "report_validation": _process_report_validation_task,
+}
+
+
 def process_pending_reviews(db: NexusDB) -> int:
-    """Process all trades pending review. Call from scheduler."""
+    """Process all trades pending review. Call from scheduler.
+
+    Trades are independent, so a backlog is chained in parallel. Each worker
+    thread opens its own connection; a shared one would serialize the queries.
+    """
     trades = db.get_trades_pending_review()
-    count = 0
-    for trade in trades:
-        if _chain_to_post_trade_review(db, trade["id"]):
-            count += 1
-    return count
+    if len(trades) <= 1:
+        return sum(1 for t in trades if _chain_to_post_trade_review(db, t["id"]))
+
+    local = threading.local()
+    worker_dbs: list[NexusDB] = []
+    lock = threading.Lock()
+
+    def chain(trade_id: int) -> bool:
+        worker_db = getattr(local, "db", None)
+        if worker_db is None:
+            worker_db = local.db = NexusDB(pooled=True).connect()
+            with lock:
+                worker_dbs.append(worker_db)
+        return _chain_to_post_trade_review(worker_db, trade_id)
+
+    workers = max(1, min(int(cfg.max_concurrent_runs), len(trades)))
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="review-chain") as ex:
+            futures = [ex.submit(chain, t["id"]) for t in trades]
+            return sum(1 for f in as_completed(futures) if f.result())
+    finally:
+        for worker_db in worker_dbs:
+            worker_db.close()
 
 
 def run_earnings_check(db: NexusDB):
@@ -4400,7 +5253,7 @@ def run_earnings_check(db: NexusDB):
                 continue
 
             try:
-                sched_analysis_type = AnalysisType(sched.analysis_type)
+                sched_analysis_type = _as_analysis_type(sched.analysis_type)
             except ValueError:
                 log.warning(
                     "Skipping schedule %s (%s): invalid analysis_type=%s",
@@ -4550,11 +5403,11 @@ def run_due_schedules(db: NexusDB):
     def _run_custom_task(s: Schedule) -> None:
         if not s.custom_prompt:
             return
-        output = call_claude_code(
-            s.custom_prompt, cfg.allowed_tools_analysis, f"CUSTOM-{s.id}"
-        )
+        # Only schedules flagged idempotent may reuse today's output
+        call = _call_claude_cached if s.idempotent else call_claude_code
+        output = call(s.custom_prompt, cfg.allowed_tools_analysis, f"CUSTOM-{s.id}")
         if output:
-            ts = datetime.now().strftime("%Y%m%dT%H%M")
+            ts = _ts_minute()
             (cfg.analyses_dir / f"custom_{s.id}_{ts}.md").write_text(output)
 
     def _run_with_schedule_tracking(
@@ -4601,7 +5454,7 @@ def run_due_schedules(db: NexusDB):
 
     task_dispatch = {
         "analyze_stock": lambda s: run_analysis(
-            db, s.target_ticker, AnalysisType(s.analysis_type), s.id
+            db, s.target_ticker, _as_analysis_type(s.analysis_type), s.id
         )
         if s.target_ticker
         else None,
@@ -4617,7 +5470,7 @@ def run_due_schedules(db: NexusDB):
             enforce_timeout=True,
         ),
         "pipeline": lambda s: run_pipeline(
-            db, s.target_ticker, AnalysisType(s.analysis_type), s.auto_execute, s.id
+            db, s.target_ticker, _as_analysis_type(s.analysis_type), s.auto_execute, s.id
         )
         if s.target_ticker
         else None,
@@ -4673,8 +5526,69 @@ def run_due_schedules(db: NexusDB):
 
 # ─── Status ──────────────────────────────────────────────────────────────────
 
+_graph = None  # graph.layer.TradingGraph, opened lazily by _get_graph()
+_graph_lock = threading.Lock()
+
+
+def _get_graph() -> Any:
+    """Shared TradingGraph connection, opened on first use and closed at exit."""
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            from graph.layer import TradingGraph
+
+            g = TradingGraph()
+            g.connect()  # raises GraphUnavailableError; retried on next call
+            _graph = g
+        return _graph
+
+
+@atexit.register
+def _close_graph() -> None:
+    if _graph is not None:
+        _graph.close()
+
+
+def _status_graph_line() -> str:
+    try:
+        g = _get_graph()
+        status = g.get_status()
+        if status.get("connected"):
+            if status.get("populated"):
+                return f"    Graph: ✅ {status['node_count']} nodes, {status['edge_count']} edges"
+            return "    Graph: ⚠️  Empty (run 'graph init' and index documents)"
+        return "    Graph: ❌ Not connected"
+    except Exception as e:
+        return f"    Graph: ❌ {e}"
+
+
+def _status_rag_line() -> str:
+    try:
+        from rag.schema import get_db_stats
+
+        rag_stats = get_db_stats()
+        if rag_stats:
+            return f"    RAG: ✅ {rag_stats.get('documents', 0)} docs, {rag_stats.get('chunks', 0)} chunks"
+        return "    RAG: ⚠️  Empty"
+    except Exception:
+        return "    RAG: Not available"
+
 
 def show_status(db: NexusDB):
+    # Knowledge-base probes run while the DB sections below are read and
+    # printed; they share no state with the NexusDB connection.
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="status-probe") as ex:
+        graph_f = ex.submit(_status_graph_line)
+        rag_f = ex.submit(_status_rag_line)
+        _print_status(db)
+        print("\n  KNOWLEDGE BASE")
+        print(graph_f.result())
+        print(rag_f.result())
+
+    print(f"{'═' * 60}\n")
+
+
+def _print_status(db: NexusDB) -> None:
     stocks = db.get_enabled_stocks()
     by_state: dict[str, list[Stock]] = {}
     for s in stocks:
@@ -4711,76 +5625,37 @@ def show_status(db: NexusDB):
 
     print(f"\n  TODAY: {db.get_today_run_count()} runs (limit {cfg.max_daily_analyses})")
 
-    # Knowledge Base Status
-    print("\n  KNOWLEDGE BASE")
-    try:
-        from graph.layer import TradingGraph
-
-        with TradingGraph() as g:
-            status = g.get_status()
-            if status.get("connected"):
-                if status.get("populated"):
-                    print(f"    Graph: ✅ {status['node_count']} nodes, {status['edge_count']} edges")
-                else:
-                    print("    Graph: ⚠️  Empty (run 'graph init' and index documents)")
-            else:
-                print("    Graph: ❌ Not connected")
-    except Exception as e:
-        print(f"    Graph: ❌ {e}")
-
-    try:
-        from rag.schema import get_db_stats
-
-        rag_stats = get_db_stats()
-        if rag_stats:
-            print(f"    RAG: ✅ {rag_stats.get('documents', 0)} docs, {rag_stats.get('chunks', 0)} chunks")
-        else:
-            print("    RAG: ⚠️  Empty")
-    except Exception:
-        print("    RAG: Not available")
-
-    print(f"{'═' * 60}\n")
-
 
 # ─── Graph and RAG CLI Handlers ──────────────────────────────────────────────
 
 
-def _check_all_health() -> None:
-    """Check health of all services: Neo4j, PostgreSQL, Ollama."""
-    import requests
-
-    print(f"\n{'═' * 50}")
-    print("SERVICE HEALTH CHECK")
-    print(f"{'═' * 50}\n")
-
-    # PostgreSQL + pgvector
+def _health_pgvector() -> list[str]:
     try:
         from rag.schema import health_check as rag_health
 
         if rag_health():
-            print("✅ PostgreSQL (pgvector): OK")
-        else:
-            print("❌ PostgreSQL (pgvector): FAIL")
+            return ["✅ PostgreSQL (pgvector): OK"]
+        return ["❌ PostgreSQL (pgvector): FAIL"]
     except Exception as e:
-        print(f"❌ PostgreSQL (pgvector): {e}")
+        return [f"❌ PostgreSQL (pgvector): {e}"]
 
-    # Neo4j
-    try:
-        from graph.layer import TradingGraph
 
-        with TradingGraph() as g:
-            if g.health_check():
-                status = g.get_status()
-                if status.get("populated"):
-                    print(f"✅ Neo4j (graph): OK ({status['node_count']} nodes, {status['edge_count']} edges)")
-                else:
-                    print("⚠️  Neo4j (graph): EMPTY - run 'python orchestrator.py graph init' and index documents")
-            else:
-                print("❌ Neo4j (graph): FAIL")
+def _health_neo4j() -> list[str]:
+    try:
+        g = _get_graph()
+        if g.health_check():
+            status = g.get_status()
+            if status.get("populated"):
+                return [f"✅ Neo4j (graph): OK ({status['node_count']} nodes, {status['edge_count']} edges)"]
+            return ["⚠️  Neo4j (graph): EMPTY - run 'python orchestrator.py graph init' and index documents"]
+        return ["❌ Neo4j (graph): FAIL"]
     except Exception as e:
-        print(f"❌ Neo4j (graph): {e}")
+        return [f"❌ Neo4j (graph): {e}"]
+
+
+def _health_ollama() -> list[str]:
+    import requests
 
-    # Ollama
     try:
         ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
         resp = requests.get(f"{ollama_url}/api/tags", timeout=5)
@@ -4788,255 +5663,362 @@ def _check_all_health() -> None:
             models = resp.json().get("models", [])
             model_names = [m.get("name", "") for m in models]
             has_embed = any("nomic-embed" in n for n in model_names)
-            has_llm = any("qwen" in n or "llama" in n for n in model_names)
             status = "OK" if has_embed else "WARN (no embedding model)"
-            print(f"✅ Ollama: {status}")
-            print(f"   Models: {', '.join(model_names[:5])}")
-        else:
-            print(f"❌ Ollama: HTTP {resp.status_code}")
+            return [f"✅ Ollama: {status}", f"   Models: {', '.join(model_names[:5])}"]
+        return [f"❌ Ollama: HTTP {resp.status_code}"]
     except Exception as e:
-        print(f"❌ Ollama: {e}")
+        return [f"❌ Ollama: {e}"]
+
+
+def _health_ib_gateway() -> list[str]:
+    import asyncio
 
-    # IB Gateway
+    # ib_insync connects on the current thread's event loop; health probes run
+    # in worker threads, which have none, so give this probe its own
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
     try:
         from ib_insync import IB
 
         ib = IB()
         ib.connect("localhost", 4002, clientId=99, readonly=True, timeout=5)
-        print("✅ IB Gateway: Connected")
         ib.disconnect()
+        return ["✅ IB Gateway: Connected"]
     except Exception as e:
-        print(f"⚠️ IB Gateway: {e}")
+        return [f"⚠️ IB Gateway: {e}"]
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def _check_all_health() -> None:
+    """Check health of all services: Neo4j, PostgreSQL, Ollama."""
+    print(f"\n{'═' * 50}")
+    print("SERVICE HEALTH CHECK")
+    print(f"{'═' * 50}\n")
+
+    # Probes are independent and mostly waiting on timeouts: run them
+    # together, print in a fixed order.
+    probes = (_health_pgvector, _health_neo4j, _health_ollama, _health_ib_gateway)
+    with ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="health-probe") as ex:
+        futures = [ex.submit(probe) for probe in probes]
+        for future in futures:
+            for line in future.result():
+                print(line)
 
     # Check pending commits
     pending_file = Path("logs/pending_commits.jsonl")
     if pending_file.exists():
-        with open(pending_file) as f:
-            pending_count = sum(1 for line in f if line.strip())
-        if pending_count > 0:
-            print(f"\n⚠️ Pending commits: {pending_count} items")
-            print("   Run 'python orchestrator.py graph retry' to process")
+        try:
+            pending_count = len(_load_pending_commits(pending_file)[0])
+        except ValueError as e:
+            print(f"\n❌ Pending commits: {pending_file} is corrupt ({e})")
+        else:
+            if pending_count > 0:
+                print(f"\n⚠️ Pending commits: {pending_count} items")
+                print("   Run 'python orchestrator.py graph retry' to process")
     else:
         print("\n✅ No pending commits")
 
     print(f"\n{'═' * 50}\n")
 
 
+# The pending-commit queue is an append-only log. graph.extract appends
+# queued items (no "op" key); retries append {"op": "retry" | "done"} records
+# for those items, and the file is rewritten only when compacting.
+_PENDING_COMPACT_MIN = 256  # log records before compaction is considered
+
+
+def _load_pending_commits(pending_file: Path) -> tuple[dict[str, dict], int]:
+    """Fold the pending-commit log into live items keyed by doc, plus its record count."""
+    live: dict[str, dict] = {}
+    records = 0
+    # One read and one C-level split; no per-line readline or text decoding
+    for line in pending_file.read_bytes().split(b"\n"):
+        if not line.strip():
+            continue
+        records += 1
+        _apply_pending_record(live, _json_loads(line))
+    return live, records
+
+
+def _apply_pending_record(live: dict[str, dict], rec: dict) -> None:
+    """Apply one pending-commit log record to the live set."""
+    doc_id = rec.get("doc", "unknown")
+    op = rec.get("op", "add")
+    if op == "done":
+        live.pop(doc_id, None)
+    elif op == "retry":
+        if doc_id in live:
+            live[doc_id].update((k, rec[k]) for k in ("retry_count", "reason") if k in rec)
+    elif doc_id in live:
+        # Re-queued while still pending: keep its place and retry count
+        live[doc_id].update((k, v) for k, v in rec.items() if k != "retry_count")
+    else:
+        live[doc_id] = rec
+
+
+def _compact_pending_commits(pending_file: Path) -> int:
+    """Rewrite the pending-commit log as just its live items; returns the count."""
+    live, _ = _load_pending_commits(pending_file)
+    tmp_file = pending_file.with_name(pending_file.name + ".tmp")
+    try:
+        with open(tmp_file, "w") as f:
+            for item in live.values():
+                f.write(_json_dumps(item) + "\n")
+        os.replace(tmp_file, pending_file)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+    return len(live)
+
+
 def _retry_pending_commits(limit: int = 10) -> None:
     """Retry pending commits from the queue."""
-    import json
-    from pathlib import Path as _Path
-
-    pending_file = _Path("logs/pending_commits.jsonl")
+    pending_file = Path("logs/pending_commits.jsonl")
     if not pending_file.exists():
         print("No pending commits file found")
         return
 
+    live, records = _load_pending_commits(pending_file)
+    batch = list(live.values())[:limit]
+    if not batch:
+        print("No pending commits to retry")
+        return
+
     from graph.exceptions import ExtractionError, GraphUnavailableError
     from graph.extract import extract_document
 
-    pending_items = []
-    with open(pending_file) as f:
-        for line in f:
-            if line.strip():
-                pending_items.append(json.loads(line))
-
-    if not pending_items:
-        print("No pending commits to retry")
+    # Every retry commits through the one shared driver; if Neo4j is still
+    # down there is no point paying for the LLM extraction of each item.
+    try:
+        graph = _get_graph()
+    except GraphUnavailableError as e:
+        print(f"❌ Neo4j still unavailable, {len(live)} pending commits left queued: {e}")
         return
 
-    print(f"Found {len(pending_items)} pending commits")
-    remaining = []
-    success_count = 0
+    existing = {
+        path for path in (item.get("file_path", "") for item in batch) if path and os.path.isfile(path)
+    }
 
-    for item in pending_items[:limit]:
+    # Outcomes are appended as one batch of small records; nothing is rewritten
+    results: list[dict] = []
+    success_count = 0
+    for item in batch:
         file_path = item.get("file_path", "")
         doc_id = item.get("doc", "unknown")
         retry_count = item.get("retry_count", 0)
 
-        if not _Path(file_path).exists():
+        if file_path not in existing:
             print(f"❌ {doc_id}: File not found, skipping")
+            results.append({"op": "done", "doc": doc_id, "reason": "file_not_found"})
             continue
 
+        rec = {"op": "retry", "doc": doc_id, "retry_count": retry_count + 1}
         try:
-            result = extract_document(file_path, commit=True)
+            result = extract_document(file_path, commit=True, graph=graph)
             if result.committed:
                 print(f"✅ {doc_id}: Retry successful")
                 success_count += 1
-            else:
-                item["retry_count"] = retry_count + 1
-                item["reason"] = result.error_message or "commit_failed"
-                remaining.append(item)
-                print(f"⚠️ {doc_id}: Still failing (retry {retry_count + 1})")
+                results.append({"op": "done", "doc": doc_id})
+                continue
+            rec["reason"] = result.error_message or "commit_failed"
+            print(f"⚠️ {doc_id}: Still failing (retry {retry_count + 1})")
         except GraphUnavailableError:
             print(f"❌ {doc_id}: Neo4j still unavailable")
-            item["retry_count"] = retry_count + 1
-            remaining.append(item)
         except ExtractionError as e:
             print(f"❌ {doc_id}: {e}")
-            item["retry_count"] = retry_count + 1
-            item["reason"] = str(e)
-            remaining.append(item)
+            rec["reason"] = str(e)
+        results.append(rec)
+
+    ts = datetime.now().isoformat()
+    with open(pending_file, "a") as f:
+        for rec in results:
+            rec["ts"] = ts
+            f.write(_json_dumps(rec) + "\n")
+            _apply_pending_record(live, rec)
+        f.flush()
+        os.fsync(f.fileno())
 
-    # Keep items beyond the limit
-    remaining.extend(pending_items[limit:])
+    remaining = len(live)
+    if records + len(results) > max(_PENDING_COMPACT_MIN, 2 * remaining):
+        remaining = _compact_pending_commits(pending_file)
+
+    print(f"\nRetry complete: {success_count} succeeded, {remaining} remaining")
+
+
+def _find_yaml_files(root: str) -> list[str]:
+    """
+    Recursively list *.yaml / *.yml files under root in one scandir walk.
+
+    Like the recursive glob it replaces, hidden files and directories are
+    skipped. DirEntry caches the type from the directory read, so no per-path
+    stat is needed.
+    """
+    files: list[str] = []
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.name.endswith((".yaml", ".yml")) and entry.is_file():
+                    files.append(entry.path)
+    return files
 
-    # Rewrite file with remaining items
-    with open(pending_file, "w") as f:
-        for item in remaining:
-            f.write(json.dumps(item) + "\n")
 
-    print(f"\nRetry complete: {success_count} succeeded, {len(remaining)} remaining")
+def _print_lines(lines) -> None:
+    """Print rows with a single stdout write instead of one print() per row."""
+    sys.stdout.write("".join(f"{line}\n" for line in lines))
 
 
-def _handle_graph_command(args):
+def _handle_graph_command(args, db):
     """Handle graph subcommands."""
-    import glob
+    from graph.schema import init_schema, reset_schema
 
     if args.graph_cmd == "init":
-        from graph.schema import init_schema
-
         init_schema()
         print("✅ Neo4j schema initialized")
 
     elif args.graph_cmd == "reset":
         confirm = input("This will DELETE ALL graph data. Type 'yes' to confirm: ")
         if confirm.lower() == "yes":
-            from graph.schema import reset_schema
-
             reset_schema(confirm=True)
             print("✅ Graph reset complete")
+            # Phase 2 skips content found in the ledger, so it must go with the graph
+            try:
+                cleared = db.clear_graph_extracted()
+                print(f"✅ Cleared {cleared} graph extraction ledger entries")
+            except Exception as e:
+                _safe_db_rollback(db, "clear_graph_extracted")
+                print(f"⚠️ Could not clear graph extraction ledger: {e}")
         else:
             print("Aborted")
 
     elif args.graph_cmd == "extract":
         from graph.exceptions import ExtractionError
-        from graph.extract import extract_document
+        from graph.extract import extract_documents
 
         files = []
         if args.file:
             files = [args.file]
         elif args.dir:
-            files = list(glob.glob(f"{args.dir}/**/*.yaml", recursive=True))
-            files += list(glob.glob(f"{args.dir}/**/*.yml", recursive=True))
+            files = _find_yaml_files(args.dir)
 
         if not files:
             print("No files specified. Use --file or --dir")
             return
 
-        for f in files:
-            try:
-                result = extract_document(
-                    f,
-                    extractor=args.extractor,
-                    commit=not args.dry_run,
-                    dry_run=args.dry_run,
-                )
-                status = "✅" if result.committed else "⚠️"
-                print(
-                    f"{status} {result.source_doc_id}: {len(result.entities)} entities, {len(result.relations)} relations"
-                )
-            except ExtractionError as e:
-                print(f"❌ {f}: {e}")
+        for f, result in extract_documents(
+            files,
+            extractor=args.extractor,
+            commit=not args.dry_run,
+            dry_run=args.dry_run,
+            workers=args.workers,
+        ):
+            if isinstance(result, ExtractionError):
+                print(f"❌ {f}: {result}")
+                continue
+            status = "✅" if result.committed else "⚠️"
+            print(
+                f"{status} {result.source_doc_id}: {len(result.entities)} entities, {len(result.relations)} relations"
+            )
 
     elif args.graph_cmd == "status":
-        from graph.layer import TradingGraph
-
         try:
-            with TradingGraph() as g:
-                stats = g.get_stats()
-                print(f"\n{'═' * 40}")
-                print("KNOWLEDGE GRAPH STATUS")
-                print(f"{'═' * 40}")
-                print(f"Total Nodes: {stats.total_nodes}")
-                print(f"Total Edges: {stats.total_edges}")
-                if stats.node_counts:
-                    print("\nNode Types:")
-                    for label, count in sorted(stats.node_counts.items(), key=lambda x: -x[1]):
-                        print(f"  {label:<20} {count:>6}")
-                if stats.edge_counts:
-                    print("\nRelationship Types:")
-                    for rel, count in sorted(stats.edge_counts.items(), key=lambda x: -x[1])[:10]:
-                        print(f"  {rel:<25} {count:>6}")
+            g = _get_graph()
+            stats = g.get_stats()
+            print(f"\n{'═' * 40}")
+            print("KNOWLEDGE GRAPH STATUS")
+            print(f"{'═' * 40}")
+            print(f"Total Nodes: {stats.total_nodes}")
+            print(f"Total Edges: {stats.total_edges}")
+            if stats.node_counts:
+                print("\nNode Types:")
+                _print_lines(
+                    f"  {label:<20} {count:>6}"
+                    for label, count in sorted(
+                        stats.node_counts.items(), key=itemgetter(1), reverse=True
+                    )
+                )
+            if stats.edge_counts:
+                print("\nRelationship Types:")
+                _print_lines(
+                    f"  {rel:<25} {count:>6}"
+                    for rel, count in heapq.nlargest(10, stats.edge_counts.items(), key=itemgetter(1))
+                )
         except Exception as e:
             print(f"❌ Graph unavailable: {e}")
 
     elif args.graph_cmd == "search":
-        from graph.layer import TradingGraph
-
-        with TradingGraph() as g:
-            results = g.find_related(args.ticker.upper(), depth=args.depth)
-            print(f"\nNodes within {args.depth} hops of {args.ticker.upper()}:")
-            for r in results[:20]:
-                labels = ", ".join(r["labels"]) if r["labels"] else "?"
-                name = (
-                    r["props"].get("name")
-                    or r["props"].get("symbol")
-                    or r["props"].get("id")
-                    or "?"
-                )
-                print(f"  [{labels}] {name}")
+        g = _get_graph()
+        results = g.find_related(args.ticker.upper(), depth=args.depth)
+        print(f"\nNodes within {args.depth} hops of {args.ticker.upper()}:")
+        lines = []
+        for r in results[:20]:
+            labels = ", ".join(r["labels"]) if r["labels"] else "?"
+            props = r["props"]
+            name = props.get("name") or props.get("symbol") or props.get("id") or "?"
+            lines.append(f"  [{labels}] {name}")
+        _print_lines(lines)
 
     elif args.graph_cmd == "peers":
-        from graph.layer import TradingGraph
-
-        with TradingGraph() as g:
-            peers = g.get_sector_peers(args.ticker.upper())
-            print(f"\nSector peers for {args.ticker.upper()}:")
-            for p in peers:
-                print(
-                    f"  {p.get('peer', '?'):<8} {p.get('company', ''):<30} ({p.get('sector', '')})"
-                )
+        g = _get_graph()
+        peers = g.get_sector_peers(args.ticker.upper())
+        print(f"\nSector peers for {args.ticker.upper()}:")
+        # TradingGraph rows always carry these keys; values may be null
+        _print_lines(
+            f"  {peer or '?':<8} {company or '':<30} ({sector or ''})"
+            for peer, company, sector in map(itemgetter("peer", "company", "sector"), peers)
+        )
 
     elif args.graph_cmd == "risks":
-        from graph.layer import TradingGraph
-
-        with TradingGraph() as g:
-            risks = g.get_risks(args.ticker.upper())
-            print(f"\nKnown risks for {args.ticker.upper()}:")
-            for r in risks:
-                print(f"  • {r.get('risk', '?')}")
+        g = _get_graph()
+        risks = g.get_risks(args.ticker.upper())
+        print(f"\nKnown risks for {args.ticker.upper()}:")
+        _print_lines(f"  • {risk or '?'}" for risk in map(itemgetter("risk"), risks))
 
     elif args.graph_cmd == "biases":
-        from graph.layer import TradingGraph
-
-        with TradingGraph() as g:
-            biases = g.get_bias_history(args.name)
-            print("\nBias History:")
-            for b in biases:
-                if "occurrences" in b:
-                    print(f"  {b.get('bias', '?'):<25} {b.get('occurrences', 0):>4} occurrences")
-                else:
-                    print(
-                        f"  {b.get('bias', '?')}: trade {b.get('trade_id', '?')} ({b.get('outcome', '?')})"
-                    )
+        g = _get_graph()
+        biases = g.get_bias_history(args.name)
+        print("\nBias History:")
+        # Without a name the query aggregates occurrences; with one it lists trades
+        if biases and "occurrences" in biases[0]:
+            _print_lines(
+                f"  {bias or '?':<25} {count:>4} occurrences"
+                for bias, count in map(itemgetter("bias", "occurrences"), biases)
+            )
+        else:
+            _print_lines(
+                f"  {bias or '?'}: trade {trade_id or '?'} ({outcome})"
+                for bias, trade_id, outcome in map(itemgetter("bias", "trade_id", "outcome"), biases)
+            )
 
     elif args.graph_cmd == "query":
-        from graph.layer import TradingGraph
-
-        with TradingGraph() as g:
-            results = g.run_cypher(args.cypher)
-            for r in results:
-                print(r)
+        g = _get_graph()
+        results = g.run_cypher(args.cypher)
+        for r in results:
+            print(r)
 
     elif args.graph_cmd == "dedupe":
-        from graph.layer import TradingGraph
-
-        with TradingGraph() as g:
-            count = g.dedupe_entities()
-            print(f"✅ Merged {count} duplicate entities")
+        g = _get_graph()
+        count = g.dedupe_entities()
+        print(f"✅ Merged {count} duplicate entities")
 
     elif args.graph_cmd == "validate":
-        from graph.layer import TradingGraph
-
-        with TradingGraph() as g:
-            issues = g.validate_constraints()
-            if issues:
-                print("⚠️ Constraint issues found:")
-                for issue in issues:
-                    print(f"  • {issue}")
-            else:
-                print("✅ No constraint issues")
+        g = _get_graph()
+        issues = g.validate_constraints()
+        if issues:
+            print("⚠️ Constraint issues found:")
+            for issue in issues:
+                print(f"  • {issue}")
+        else:
+            print("✅ No constraint issues")
 
     elif args.graph_cmd == "retry":
         _retry_pending_commits(limit=args.limit)
@@ -5045,53 +6027,69 @@ def _handle_graph_command(args):
         print("Unknown graph command. Try: graph init, graph extract, graph status, graph search")
 
 
-def _handle_rag_command(args):
+def _format_rag_result(r, precision: int) -> str:
+    """Render one rag search hit as its three output lines."""
+    content = r.content[:200].replace("\n", " ")
+    return (
+        f"\n[{r.similarity:.{precision}f}] {r.doc_id} ({r.doc_type})\n"
+        f"Section: {r.section_label}\n"
+        f"  {content}..."
+    )
+
+
+def _handle_rag_command(args, db):
     """Handle rag subcommands."""
-    import glob
     from datetime import date as _date
 
-    if args.rag_cmd == "init":
-        from rag.schema import init_schema
+    from rag.search import (
+        get_document_chunks,
+        get_rag_stats,
+        hybrid_search,
+        list_documents,
+        semantic_search,
+    )
+    from rag.schema import init_schema, reset_schema, run_migrations
 
+    if args.rag_cmd == "init":
         init_schema()
         print("✅ pgvector schema initialized")
 
     elif args.rag_cmd == "reset":
         confirm = input("This will DELETE ALL embedded documents. Type 'yes' to confirm: ")
         if confirm.lower() == "yes":
-            from rag.schema import reset_schema
-
             reset_schema(confirm=True)
             print("✅ RAG tables reset")
+            # Ledgered content would otherwise never be embedded again
+            try:
+                cleared = db.clear_rag_ingested()
+                print(f"✅ Cleared {cleared} RAG ingest ledger entries")
+            except Exception as e:
+                _safe_db_rollback(db, "clear_rag_ingested")
+                print(f"⚠️ Could not clear RAG ingest ledger: {e}")
         else:
             print("Aborted")
 
     elif args.rag_cmd == "embed":
-        from rag.embed import embed_document
+        from rag.embed import embed_documents
         from rag.exceptions import EmbedError
 
         files = []
         if args.file:
             files = [args.file]
         elif args.dir:
-            files = list(glob.glob(f"{args.dir}/**/*.yaml", recursive=True))
-            files += list(glob.glob(f"{args.dir}/**/*.yml", recursive=True))
+            files = _find_yaml_files(args.dir)
 
         if not files:
             print("No files specified. Use file path or --dir")
             return
 
-        for f in files:
-            try:
-                result = embed_document(f, force=args.force)
-                if result.error_message == "unchanged":
-                    print(f"⏭️ {result.doc_id}: unchanged")
-                else:
-                    print(
-                        f"✅ {result.doc_id}: {result.chunk_count} chunks ({result.duration_ms}ms)"
-                    )
-            except EmbedError as e:
-                print(f"❌ {f}: {e}")
+        for f, result in embed_documents(files, force=args.force, workers=args.workers):
+            if isinstance(result, EmbedError):
+                print(f"❌ {f}: {result}")
+            elif result.error_message == "unchanged":
+                print(f"⏭️ {result.doc_id}: unchanged")
+            else:
+                print(f"✅ {result.doc_id}: {result.chunk_count} chunks ({result.duration_ms}ms)")
 
     elif args.rag_cmd == "reembed":
         from rag.embed import reembed_all
@@ -5100,8 +6098,6 @@ def _handle_rag_command(args):
         print(f"✅ Re-embedded {count} documents")
 
     elif args.rag_cmd == "search":
-        from rag.search import semantic_search
-
         date_from = None
         if args.since:
             date_from = _date.fromisoformat(args.since)
@@ -5118,15 +6114,9 @@ def _handle_rag_command(args):
 
         print(f"\nSearch results for: {args.query}")
         print(f"{'─' * 60}")
-        for r in results:
-            print(f"\n[{r.similarity:.3f}] {r.doc_id} ({r.doc_type})")
-            print(f"Section: {r.section_label}")
-            content = r.content[:200].replace("\n", " ")
-            print(f"  {content}...")
+        _print_lines(_format_rag_result(r, 3) for r in results)
 
     elif args.rag_cmd == "hybrid-search":
-        from rag.search import hybrid_search
-
         date_from = None
         if args.since:
             date_from = _date.fromisoformat(args.since)
@@ -5145,21 +6135,13 @@ def _handle_rag_command(args):
         print(f"\nHybrid search results for: {args.query}")
         print(f"Weights: vector={args.vector_weight}, bm25={args.bm25_weight}")
         print(f"{'─' * 60}")
-        for r in results:
-            print(f"\n[{r.similarity:.4f}] {r.doc_id} ({r.doc_type})")
-            print(f"Section: {r.section_label}")
-            content = r.content[:200].replace("\n", " ")
-            print(f"  {content}...")
+        _print_lines(_format_rag_result(r, 4) for r in results)
 
     elif args.rag_cmd == "migrate":
-        from rag.schema import run_migrations
-
         run_migrations()
         print("✅ RAG migrations complete")
 
     elif args.rag_cmd == "status":
-        from rag.search import get_rag_stats
-
         try:
             stats = get_rag_stats()
             print(f"\n{'═' * 40}")
@@ -5171,41 +6153,51 @@ def _handle_rag_command(args):
             print(f"Version: {stats.embed_version}")
             if stats.doc_types:
                 print("\nBy Type:")
-                for dtype, count in sorted(stats.doc_types.items(), key=lambda x: -x[1]):
-                    print(f"  {dtype:<25} {count:>4}")
+                _print_lines(
+                    f"  {dtype:<25} {count:>4}"
+                    for dtype, count in sorted(stats.doc_types.items(), key=itemgetter(1), reverse=True)
+                )
             if stats.tickers:
                 print(f"\nTickers: {', '.join(stats.tickers[:10])}")
         except Exception as e:
             print(f"❌ RAG unavailable: {e}")
 
     elif args.rag_cmd == "list":
-        from rag.search import list_documents
-
-        docs = list_documents(limit=50)
-        print(f"\n{'doc_id':<30} {'type':<20} {'ticker':<8} {'chunks'}")
-        print(f"{'─' * 70}")
-        for d in docs:
-            print(
-                f"{d['doc_id']:<30} {d['doc_type']:<20} {d.get('ticker') or '—':<8} {d['chunk_count']}"
-            )
+        rows = [
+            (d["doc_id"], d["doc_type"], d.get("ticker") or "—", d["chunk_count"])
+            for d in list_documents(limit=50)
+        ]
+        # The id column grows to the longest id so long ids don't break alignment
+        w0 = max([30, *(len(row[0]) for row in rows)])
+        print(f"\n{'doc_id':<{w0}} {'type':<20} {'ticker':<8} {'chunks'}")
+        print(f"{'─' * (w0 + 40)}")
+        _print_lines(
+            f"{doc_id:<{w0}} {doc_type:<20} {ticker:<8} {chunks}"
+            for doc_id, doc_type, ticker, chunks in rows
+        )
 
     elif args.rag_cmd == "show":
-        from rag.search import get_document_chunks
-
         chunks = get_document_chunks(args.doc_id)
         if not chunks:
             print(f"Document not found: {args.doc_id}")
             return
         print(f"\nChunks for {args.doc_id}:")
-        for c in chunks:
-            print(f"\n[{c['section_label']}] ({c['content_tokens']} tokens)")
-            print(c["content"][:300])
-            if len(c["content"]) > 300:
-                print("...")
+        _print_lines(
+            f"\n[{c['section_label']}] ({c['content_tokens']} tokens)\n{c['content'][:300]}"
+            + ("\n..." if len(c["content"]) > 300 else "")
+            for c in chunks
+        )
 
     elif args.rag_cmd == "delete":
         from rag.embed import delete_document
 
+        # Clear ledger rows first: they are matched via the document's file path
+        try:
+            db.clear_rag_ingested(args.doc_id)
+        except Exception as e:
+            _safe_db_rollback(db, "clear_rag_ingested")
+            print(f"⚠️ Could not clear RAG ingest ledger for {args.doc_id}: {e}")
+
         success = delete_document(args.doc_id)
         if success:
             print(f"✅ Deleted {args.doc_id}")
@@ -5222,10 +6214,80 @@ def _handle_rag_command(args):
 # ─── CLI ─────────────────────────────────────────────────────────────────────
 
 
-def main():
-    import argparse
+# Row templates for the CLI tables, bound once instead of an f-string per row
+_TRADE_ROW = "{:>4} {:<6} ${:>8.2f} {:>10} {:>8} {:<8}".format
+_WATCHLIST_ROW = "{:>4} {:<6} {:<8} {:<12} {:<30}".format
+_OPTION_ROW = "{:>4} {:<25} {:<4} ${:>7.2f} {:<12} {:>5} {:>6.0f}".format
+_EXPIRING_ROW = "{}{:>4} {:<25} {:<4} ${:>7.2f} {:<12} {:>5}".format
+_EXPIRED_ROW = "{:>4} {:<25} {:<4} ${:>7.2f} {:<12}".format
+_LINEAGE_ROW = "{:>4} {:<10} {:<12} {:<12} {:<6} {}".format
+_CALIBRATION_FIELDS = itemgetter(
+    "confidence_bucket", "total_predictions", "correct_predictions", "actual_rate"
+)
+
+
+# Colored "[TYPE] " prefixes for watchlist monitor events, built once
+_WATCHLIST_EVENT_PREFIX = {
+    event_type: f"{color}[{event_type.upper()}] "
+    for event_type, color in (
+        ("triggered", "\033[92m"),  # Green
+        ("invalidated", "\033[93m"),  # Yellow
+        ("expired", "\033[91m"),  # Red
+        ("error", "\033[91m"),  # Red
+    )
+}
+
+
+# Lineage rows arrive with their dates already rendered as text by the SELECT
+_LINEAGE_ACTIVE_LINE = "{ticker:<8} {analysis_type:<10} {analysis_date:<12} {valid_until:<12} {earnings}\n".format_map
+_LINEAGE_INVALIDATED_LINE = "{ticker:<8} {analysis_type:<10} {result:<12} {analysis_date:<12} {invalidated_date}\n".format_map
+
+
+def _option_fields(opt: dict) -> tuple:
+    """
+    (id, symbol, type letter, strike, expiration) shared by the options tables.
+
+    Numeric columns arrive as Decimal, which takes the same format specs as
+    float, so they are passed through without a float() round-trip.
+    """
+    return (
+        opt["id"],
+        opt.get("full_symbol") or opt.get("ticker", "?"),
+        opt.get("option_type", "?")[0].upper(),
+        opt.get("option_strike") or 0,
+        str(opt.get("option_expiration", ""))[:10],
+    )
+
+
+def _option_row(opt: dict) -> str:
+    days = opt.get("days_to_expiry", "?")
+    size = opt.get("current_size") or opt.get("entry_size") or 0
+    return _OPTION_ROW(*_option_fields(opt), days, size)
+
+
+# First characters a JSON document can start with; anything else is a plain string
+_JSON_FIRST_CHARS = frozenset('{["-0123456789tfn')
+
+
+def _parse_setting_value(value: str) -> Any:
+    """Parse a CLI setting value as JSON, falling back to the raw string."""
+    text = value.lstrip()
+    if not text or text[0] not in _JSON_FIRST_CHARS:
+        return value
+    try:
+        return _json_loads(value)
+    except ValueError:
+        return value
+
+
+# Argument-free commands dispatched without building the full parser tree
+_FAST_COMMANDS = frozenset(
+    {"status", "health", "db-init", "queue-status", "run-due", "review", "earnings-check"}
+)
 
-    validate_agent_engine()
+
+def _build_parser():
+    import argparse
 
     parser = argparse.ArgumentParser(description="Nexus Light v2.2")
     sub = parser.add_subparsers(dest="cmd")
@@ -5272,6 +6334,7 @@ def main():
 
     p = trade_sub.add_parser("list", help="List trades")
     p.add_argument("--status", choices=["open", "closed", "all"], default="open")
+    p.add_argument("--csv", action="store_true", help="Stream all matching rows as CSV")
 
     trade_sub.add_parser("pending-reviews", help="Show trades pending review")
 
@@ -5293,6 +6356,7 @@ def main():
 
     p = wl_sub.add_parser("list", help="List watchlist entries")
     p.add_argument("--status", choices=["active", "all"], default="active")
+    p.add_argument("--csv", action="store_true", help="Stream all matching rows as CSV")
 
     wl_sub.add_parser("check", help="Check for expirations and triggers")
 
@@ -5308,7 +6372,8 @@ def main():
     options_parser = sub.add_parser("options", help="Options position management")
     options_sub = options_parser.add_subparsers(dest="options_cmd")
 
-    options_sub.add_parser("list", help="List open options positions")
+    p = options_sub.add_parser("list", help="List open options positions")
+    p.add_argument("--csv", action="store_true", help="Stream all positions as CSV")
 
     p = options_sub.add_parser("expiring", help="List options expiring soon")
     p.add_argument("--days", "-d", type=int, default=7, help="Days until expiration")
@@ -5396,6 +6461,7 @@ def main():
     p.add_argument("--dir", help="Directory to extract")
     p.add_argument("--extractor", default="ollama", choices=["ollama", "claude-api", "openrouter"])
     p.add_argument("--dry-run", action="store_true", help="Preview without committing")
+    p.add_argument("--workers", type=int, default=8, help="Documents extracted concurrently")
 
     p = graph_sub.add_parser("reextract", help="Re-extract documents")
     p.add_argument("--all", action="store_true")
@@ -5437,6 +6503,7 @@ def main():
     p.add_argument("file", nargs="?", help="File to embed")
     p.add_argument("--dir", help="Directory to embed")
     p.add_argument("--force", action="store_true", help="Re-embed even if unchanged")
+    p.add_argument("--workers", type=int, default=8, help="Documents embedded concurrently")
 
     p = rag_sub.add_parser("reembed", help="Re-embed documents")
     p.add_argument("--all", action="store_true")
@@ -5474,706 +6541,797 @@ def main():
 
     rag_sub.add_parser("validate", help="Check for orphaned chunks")
 
-    args = parser.parse_args()
+    return parser
 
-    with NexusDB() as db:
-        # Initialize settings from DB for all commands
-        global cfg
-        cfg = Settings(db)
-        sys.modules[__name__].__dict__["cfg"] = cfg
 
-        if args.cmd in PRODUCTION_GUARDED_COMMANDS:
-            enforce_production_adk_guard(cfg, context=f"orchestrator {args.cmd}")
+# ─── CLI Command Handlers ────────────────────────────────────────────────────
 
-        if args.cmd == "db-init":
-            db.init_schema()
-            print("✅ Schema initialized")
 
-        elif args.cmd == "execute":
-            p = Path(args.analysis_file)
-            if not p.exists():
-                print(f"Not found: {p}")
-                sys.exit(1)
-            r = run_execution(db, p)
-            print(f"Order: {r.order_placed} | {r.reason}")
+def _handle_db_init_command(args, db):
+    """Handle the db-init command."""
+    db.init_schema()
+    print("✅ Schema initialized")
 
-        elif args.cmd == "pipeline":
-            run_pipeline(
-                db, args.ticker.upper(), AnalysisType(args.type), auto_execute=not args.no_execute
-            )
 
-        elif args.cmd == "watchlist":
-            run_watchlist(db, args.auto_execute)
+def _handle_execute_command(args, db):
+    """Handle the execute command."""
+    p = Path(args.analysis_file)
+    if not p.exists():
+        print(f"Not found: {p}")
+        sys.exit(1)
+    r = run_execution(db, p)
+    print(f"Order: {r.order_placed} | {r.reason}")
 
-        elif args.cmd == "scan":
-            run_scanners(db, args.scanner)
 
-        elif args.cmd == "run-due":
-            run_due_schedules(db)
+def _handle_pipeline_command(args, db):
+    """Handle the pipeline command."""
+    run_pipeline(
+        db, args.ticker.upper(), AnalysisType(args.type), auto_execute=not args.no_execute
+    )
 
-        elif args.cmd == "review":
-            run_analysis(db, "PORTFOLIO", AnalysisType.REVIEW)
 
-        elif args.cmd == "earnings-check":
-            run_earnings_check(db)
+def _handle_stock_command(args, db):
+    """Handle stock subcommands."""
+    if args.action == "list":
+        print(f"\n{'Ticker':<8} {'State':<10} {'Pri':<4} {'Earnings':<12} {'Tags'}")
+        print("─" * 60)
+        for s in db.get_enabled_stocks():
+            tags = ",".join(s.tags[:3]) if s.tags else ""
+            earn = str(s.next_earnings_date) if s.next_earnings_date else "—"
+            print(f"{s.ticker:<8} {s.state:<10} {s.priority:<4} {earn:<12} {tags}")
+    elif args.action == "add" and args.ticker:
+        kw = {}
+        if args.state:
+            kw["state"] = args.state
+        if args.tags:
+            kw["tags"] = args.tags
+        if args.priority:
+            kw["priority"] = args.priority
+        if args.comment:
+            kw["comments"] = args.comment
+        if args.earnings_date:
+            kw["next_earnings_date"] = args.earnings_date
+        s = db.upsert_stock(args.ticker.upper(), **kw)
+        print(f"✅ {s.ticker if s else args.ticker.upper()}")
+    elif args.action in ("enable", "disable") and args.ticker:
+        db.upsert_stock(args.ticker.upper(), is_enabled=(args.action == "enable"))
+        print(
+            f"✅ {args.ticker.upper()} {'enabled' if args.action == 'enable' else 'disabled'}"
+        )
+    elif args.action == "set-state" and args.ticker and args.state:
+        db.upsert_stock(args.ticker.upper(), state=args.state)
+        print(f"✅ {args.ticker.upper()} → {args.state}")
+
+
+# ─── Task Queue Commands ─────────────────────────────────────────────────────
+
+
+def _handle_process_queue_command(args, db):
+    """Handle the process-queue command."""
+    count = process_task_queue(db, max_tasks=args.max)
+    print(f"✅ Processed {count} tasks")
+
+
+def _handle_queue_status_command(args, db):
+    """Handle the queue-status command."""
+    stats = db.get_task_queue_stats()
+    pending = db.get_pending_tasks(limit=10)
+    print(f"\n{'═' * 40}")
+    print("TASK QUEUE STATUS")
+    print(f"{'═' * 40}")
+    _print_lines(f"  {status:<15} {count:>4}" for status, count in stats.items())
+    if pending:
+        print(f"\nPending Tasks (up to 10):")
+        print(f"{'ID':>4} {'Type':<20} {'Ticker':<8} {'Priority'}")
+        print("─" * 45)
+        _print_lines(
+            f"{t['id']:>4} {t['task_type']:<20} {t.get('ticker') or '—':<8} {t['priority']}"
+            for t in pending
+        )
 
-        elif args.cmd == "status":
-            show_status(db)
 
-        elif args.cmd == "health":
-            _check_all_health()
+# ─── Trade Commands ──────────────────────────────────────────────────────────
 
-        elif args.cmd == "stock":
-            if args.action == "list":
-                print(f"\n{'Ticker':<8} {'State':<10} {'Pri':<4} {'Earnings':<12} {'Tags'}")
-                print("─" * 60)
-                for s in db.get_enabled_stocks():
-                    tags = ",".join(s.tags[:3]) if s.tags else ""
-                    earn = str(s.next_earnings_date) if s.next_earnings_date else "—"
-                    print(f"{s.ticker:<8} {s.state:<10} {s.priority:<4} {earn:<12} {tags}")
-            elif args.action == "add" and args.ticker:
-                kw = {}
-                if args.state:
-                    kw["state"] = args.state
-                if args.tags:
-                    kw["tags"] = args.tags
-                if args.priority:
-                    kw["priority"] = args.priority
-                if args.comment:
-                    kw["comments"] = args.comment
-                if args.earnings_date:
-                    kw["next_earnings_date"] = args.earnings_date
-                s = db.upsert_stock(args.ticker.upper(), **kw)
-                print(f"✅ {s.ticker if s else args.ticker.upper()}")
-            elif args.action in ("enable", "disable") and args.ticker:
-                db.upsert_stock(args.ticker.upper(), is_enabled=(args.action == "enable"))
-                print(
-                    f"✅ {args.ticker.upper()} {'enabled' if args.action == 'enable' else 'disabled'}"
+
+def _handle_trade_command(args, db):
+    """Handle trade subcommands."""
+    if args.trade_cmd == "add":
+        trade = {
+            "ticker": args.ticker.upper(),
+            "entry_date": datetime.now(),
+            "entry_price": args.price,
+            "entry_size": args.size,
+            "entry_type": args.type,
+            "thesis": args.thesis or "",
+            "source_analysis": args.analysis,
+        }
+        trade_id = db.add_trade(trade)
+        print(f"✅ Added trade {trade_id}: {args.ticker.upper()} @ ${args.price:.2f} x {args.size}")
+
+    elif args.trade_cmd == "close":
+        closed = db.close_trade(args.trade_id, args.price, args.reason)
+        if closed is None:
+            print(f"❌ Trade {args.trade_id} not found")
+        else:
+            pnl_pct = closed["pnl_pct"] or 0
+            print(f"✅ Closed trade {args.trade_id}: {closed['ticker']} @ ${args.price:.2f} ({pnl_pct:+.1f}%)")
+            # Auto-chain to post-trade review
+            _chain_to_post_trade_review(db, args.trade_id)
+
+    elif args.trade_cmd == "list" and args.csv:
+        where = "" if args.status == "all" else " WHERE status = %s"
+        sys.stdout.flush()
+        db.copy_csv(
+            "SELECT id, ticker, entry_date, entry_price, exit_price, pnl_pct, status"
+            f" FROM nexus.trades{where} ORDER BY created_at DESC",
+            [args.status] if where else None,
+            sys.stdout.buffer,
+        )
+
+    elif args.trade_cmd == "list":
+        status = args.status
+        if status == "all":
+            with db.conn.cursor() as cur:
+                cur.execute(
+                    "SELECT id, ticker, entry_price, exit_price, pnl_pct, status"
+                    " FROM nexus.trades ORDER BY created_at DESC LIMIT 20"
                 )
-            elif args.action == "set-state" and args.ticker and args.state:
-                db.upsert_stock(args.ticker.upper(), state=args.state)
-                print(f"✅ {args.ticker.upper()} → {args.state}")
-
-        # ─── Task Queue Commands ─────────────────────────────────────────────────────
-        elif args.cmd == "process-queue":
-            count = process_task_queue(db, max_tasks=args.max)
-            print(f"✅ Processed {count} tasks")
-
-        elif args.cmd == "queue-status":
-            stats = db.get_task_queue_stats()
-            pending = db.get_pending_tasks(limit=10)
-            print(f"\n{'═' * 40}")
-            print("TASK QUEUE STATUS")
-            print(f"{'═' * 40}")
-            for status, count in stats.items():
-                print(f"  {status:<15} {count:>4}")
-            if pending:
-                print(f"\nPending Tasks (up to 10):")
-                print(f"{'ID':>4} {'Type':<20} {'Ticker':<8} {'Priority'}")
-                print("─" * 45)
-                for t in pending:
-                    print(f"{t['id']:>4} {t['task_type']:<20} {t.get('ticker') or '—':<8} {t['priority']}")
-
-        # ─── Trade Commands ──────────────────────────────────────────────────────────
-        elif args.cmd == "trade":
-            if args.trade_cmd == "add":
-                trade = {
-                    "ticker": args.ticker.upper(),
-                    "entry_date": datetime.now(),
-                    "entry_price": args.price,
-                    "entry_size": args.size,
-                    "entry_type": args.type,
-                    "thesis": args.thesis or "",
-                    "source_analysis": args.analysis,
-                }
-                trade_id = db.add_trade(trade)
-                print(f"✅ Added trade {trade_id}: {args.ticker.upper()} @ ${args.price:.2f} x {args.size}")
+                trades = cur.fetchall()
+        else:
+            trades = db.get_trades_by_status(status)
+        print(f"\n{'ID':>4} {'Ticker':<6} {'Entry':>10} {'Exit':>10} {'P/L':>8} {'Status':<8}")
+        print("─" * 55)
+        _print_lines(
+            _TRADE_ROW(
+                t["id"],
+                t["ticker"],
+                t["entry_price"],
+                f"${t['exit_price']:.2f}" if t.get("exit_price") else "—",
+                f"{t['pnl_pct']:+.1f}%" if t.get("pnl_pct") else "—",
+                t["status"],
+            )
+            for t in trades
+        )
 
-            elif args.trade_cmd == "close":
-                trade = db.get_trade(args.trade_id)
-                if not trade:
-                    print(f"❌ Trade {args.trade_id} not found")
-                else:
-                    db.close_trade(args.trade_id, args.price, args.reason)
-                    pnl_pct = ((args.price - float(trade["entry_price"])) / float(trade["entry_price"])) * 100
-                    print(f"✅ Closed trade {args.trade_id}: {trade['ticker']} @ ${args.price:.2f} ({pnl_pct:+.1f}%)")
-                    # Auto-chain to post-trade review
-                    _chain_to_post_trade_review(db, args.trade_id)
-
-            elif args.trade_cmd == "list":
-                status = args.status
-                if status == "all":
-                    with db.conn.cursor() as cur:
-                        cur.execute("SELECT * FROM nexus.trades ORDER BY created_at DESC LIMIT 20")
-                        trades = [dict(r) for r in cur.fetchall()]
-                else:
-                    trades = db.get_trades_by_status(status)
-                print(f"\n{'ID':>4} {'Ticker':<6} {'Entry':>10} {'Exit':>10} {'P/L':>8} {'Status':<8}")
-                print("─" * 55)
-                for t in trades:
-                    pnl = f"{float(t.get('pnl_pct') or 0):+.1f}%" if t.get("pnl_pct") else "—"
-                    exit_p = f"${float(t['exit_price']):.2f}" if t.get("exit_price") else "—"
-                    print(f"{t['id']:>4} {t['ticker']:<6} ${float(t['entry_price']):>8.2f} {exit_p:>10} {pnl:>8} {t['status']:<8}")
-
-            elif args.trade_cmd == "pending-reviews":
-                trades = db.get_trades_pending_review()
-                if not trades:
-                    print("No trades pending review")
-                else:
-                    print(f"\nTrades Pending Review ({len(trades)}):")
-                    print(f"{'ID':>4} {'Ticker':<6} {'P/L':>8} {'Exit Date':<20}")
-                    print("─" * 45)
-                    for t in trades:
-                        pnl = f"{float(t.get('pnl_pct') or 0):+.1f}%"
-                        exit_dt = str(t.get("exit_date", ""))[:19]
-                        print(f"{t['id']:>4} {t['ticker']:<6} {pnl:>8} {exit_dt:<20}")
-
-            elif args.trade_cmd == "detected":
-                # List trades created from detected position increases
-                if args.show_all:
-                    trades = db.get_trades_by_source_type(["detected", "confirmed"])
-                else:
-                    trades = db.get_trades_by_source_type(["detected"])
+    elif args.trade_cmd == "pending-reviews":
+        trades = db.get_trades_pending_review()
+        if not trades:
+            print("No trades pending review")
+        else:
+            print(f"\nTrades Pending Review ({len(trades)}):")
+            print(f"{'ID':>4} {'Ticker':<6} {'P/L':>8} {'Exit Date':<20}")
+            print("─" * 45)
+            for t in trades:
+                pnl = f"{float(t.get('pnl_pct') or 0):+.1f}%"
+                exit_dt = str(t.get("exit_date", ""))[:19]
+                print(f"{t['id']:>4} {t['ticker']:<6} {pnl:>8} {exit_dt:<20}")
+
+    elif args.trade_cmd == "detected":
+        # List trades created from detected position increases
+        if args.show_all:
+            trades = db.get_trades_by_source_type(["detected", "confirmed"])
+        else:
+            trades = db.get_trades_by_source_type(["detected"])
 
-                if not trades:
-                    print("No detected trades pending review")
-                else:
-                    print(f"\nDetected Trades ({len(trades)}):")
-                    print(f"{'ID':>4} {'Ticker':<6} {'Date':<12} {'Size':>8} {'Price':>10} {'Status':<10}")
-                    print("─" * 60)
-                    for t in trades:
-                        entry_dt = t.get("entry_date")
-                        date_str = entry_dt.strftime("%Y-%m-%d") if entry_dt else "—"
-                        size = float(t.get("entry_size") or 0)
-                        price = float(t.get("entry_price") or 0)
-                        src_type = t.get("source_type", "—")
-                        print(f"{t['id']:>4} {t['ticker']:<6} {date_str:<12} {size:>8.2f} ${price:>8.2f} {src_type:<10}")
-
-            elif args.trade_cmd == "confirm":
-                # Confirm a detected trade entry
-                trade = db.get_trade(args.trade_id)
-                if not trade:
-                    print(f"Trade {args.trade_id} not found")
-                elif trade.get("source_type") != "detected":
-                    print(f"Trade {args.trade_id} is not a detected trade (source: {trade.get('source_type')})")
-                else:
-                    updates = {"source_type": "confirmed"}
-                    if args.thesis:
-                        updates["thesis"] = args.thesis
-                    if args.price:
-                        updates["entry_price"] = args.price
-
-                    db.update_trade(args.trade_id, **updates)
-                    db.complete_task_by_type("review_detected_position", trade["ticker"])
-                    print(f"Confirmed trade {args.trade_id}: {trade['ticker']}")
-
-            elif args.trade_cmd == "reject":
-                # Reject a detected trade entry (archive it)
-                trade = db.get_trade(args.trade_id)
-                if not trade:
-                    print(f"Trade {args.trade_id} not found")
-                elif trade.get("source_type") != "detected":
-                    print(f"Trade {args.trade_id} is not a detected trade (source: {trade.get('source_type')})")
-                else:
-                    reason = args.reason or "Rejected by user"
-                    db.archive_trade(args.trade_id, reason=reason)
-                    db.complete_task_by_type("review_detected_position", trade["ticker"])
-                    print(f"Rejected and archived trade {args.trade_id}: {trade['ticker']}")
+        if not trades:
+            print("No detected trades pending review")
+        else:
+            print(f"\nDetected Trades ({len(trades)}):")
+            print(f"{'ID':>4} {'Ticker':<6} {'Date':<12} {'Size':>8} {'Price':>10} {'Status':<10}")
+            print("─" * 60)
+            for t in trades:
+                get = t.get
+                entry_dt = get("entry_date")
+                date_str = str(entry_dt)[:10] if entry_dt else "—"
+                size = float(get("entry_size") or 0)
+                price = float(get("entry_price") or 0)
+                src_type = get("source_type", "—")
+                print(f"{t['id']:>4} {t['ticker']:<6} {date_str:<12} {size:>8.2f} ${price:>8.2f} {src_type:<10}")
+
+    elif args.trade_cmd == "confirm":
+        # Confirm a detected trade entry
+        row = db.confirm_detected_trade(args.trade_id, args.thesis or None, args.price or None)
+        if not row:
+            print(f"Trade {args.trade_id} not found")
+        elif row["id"] is None:
+            print(
+                f"Trade {args.trade_id} is not a detected trade (source: {row['source_type']})"
+            )
+        else:
+            db.complete_task_by_type("review_detected_position", row["ticker"])
+            print(f"Confirmed trade {args.trade_id}: {row['ticker']}")
+
+    elif args.trade_cmd == "reject":
+        # Reject a detected trade entry (archive it)
+        row = db.reject_detected_trade(args.trade_id, reason=args.reason or "Rejected by user")
+        if not row:
+            print(f"Trade {args.trade_id} not found")
+        elif row["id"] is None:
+            print(
+                f"Trade {args.trade_id} is not a detected trade (source: {row['source_type']})"
+            )
+        else:
+            db.complete_task_by_type("review_detected_position", row["ticker"])
+            print(f"Rejected and archived trade {args.trade_id}: {row['ticker']}")
 
-            else:
-                print("Usage: trade [add|close|list|pending-reviews|detected|confirm|reject]")
-
-        # ─── Watchlist DB Commands ───────────────────────────────────────────────────
-        elif args.cmd == "watchlist-db":
-            if args.wl_cmd == "list":
-                if args.status == "all":
-                    with db.conn.cursor() as cur:
-                        cur.execute("SELECT * FROM nexus.watchlist ORDER BY priority DESC, created_at DESC")
-                        entries = [dict(r) for r in cur.fetchall()]
-                else:
-                    entries = db.get_active_watchlist()
-                print(f"\n{'ID':>4} {'Ticker':<6} {'Priority':<8} {'Expires':<12} {'Trigger':<30}")
-                print("─" * 70)
-                for e in entries:
-                    exp = e['expires_at'].strftime('%Y-%m-%d') if e.get('expires_at') else "—"
-                    trigger = (e.get('entry_trigger') or "")[:28]
-                    print(f"{e['id']:>4} {e['ticker']:<6} {e.get('priority', 'med'):<8} {exp:<12} {trigger:<30}")
-
-            elif args.wl_cmd == "check":
-                # Check for expired entries
-                expired = db.get_expired_watchlist()
-                for entry in expired:
-                    db.update_watchlist_by_id(entry['id'], 'expired')
-                    print(f"  ⏰ Expired: {entry['ticker']}")
-                print(f"\n✅ Processed {len(expired)} expirations")
-
-            elif args.wl_cmd == "process-expired":
-                expired = db.get_expired_watchlist()
-                for entry in expired:
-                    db.update_watchlist_by_id(entry['id'], 'expired')
-                    print(f"  ⏰ Marked expired: {entry['ticker']}")
-                print(f"\n✅ Processed {len(expired)} entries")
-
-            elif args.wl_cmd == "monitor":
-                from watchlist_monitor import WatchlistMonitor, parse_trigger, ConditionType
-                from ib_client import IBClient
-
-                ib_client = IBClient()
-                if not ib_client.health_check():
-                    print("❌ IB MCP server not available at localhost:8100")
-                    sys.exit(1)
-
-                price_tolerance = float(cfg._get("watchlist_price_threshold_pct", "feature_flags", "0.5"))
-
-                def event_handler(event):
-                    """Print events to console."""
-                    colors = {
-                        "triggered": "\033[92m",  # Green
-                        "invalidated": "\033[93m",  # Yellow
-                        "expired": "\033[91m",  # Red
-                        "error": "\033[91m"  # Red
-                    }
-                    reset = "\033[0m"
-                    color = colors.get(event.event_type, "")
-                    print(f"{color}[{event.event_type.upper()}] {event.ticker}: {event.reason}{reset}")
-
-                monitor = WatchlistMonitor(
-                    db=db,
-                    ib_client=ib_client,
-                    price_tolerance_pct=price_tolerance,
-                    on_event=event_handler
+    else:
+        print("Usage: trade [add|close|list|pending-reviews|detected|confirm|reject]")
+
+
+# ─── Watchlist DB Commands ───────────────────────────────────────────────────
+
+
+def _handle_watchlist_db_command(args, db):
+    """Handle watchlist-db subcommands."""
+    if args.wl_cmd == "list" and args.csv:
+        where = "" if args.status == "all" else " WHERE status = 'active'"
+        sys.stdout.flush()
+        db.copy_csv(
+            "SELECT id, ticker, priority, expires_at, entry_trigger"
+            f" FROM nexus.watchlist{where} ORDER BY priority DESC, created_at DESC",
+            None,
+            sys.stdout.buffer,
+        )
+
+    elif args.wl_cmd == "list":
+        if args.status == "all":
+            with db.conn.cursor() as cur:
+                cur.execute(
+                    "SELECT id, ticker, priority, expires_at, entry_trigger"
+                    " FROM nexus.watchlist ORDER BY priority DESC, created_at DESC"
                 )
+                entries = cur.fetchall()
+        else:
+            entries = db.get_active_watchlist()
+        print(f"\n{'ID':>4} {'Ticker':<6} {'Priority':<8} {'Expires':<12} {'Trigger':<30}")
+        print("─" * 70)
+        _print_lines(
+            _WATCHLIST_ROW(
+                e["id"],
+                e["ticker"],
+                e.get("priority", "med"),
+                str(e["expires_at"])[:10] if e.get("expires_at") else "—",
+                (e.get("entry_trigger") or "")[:28],
+            )
+            for e in entries
+        )
 
-                print(f"Starting watchlist monitor (interval: {args.interval}s)")
+    elif args.wl_cmd == "check":
+        # Check for expired entries
+        expired = db.get_expired_watchlist()
+        updated = db.bulk_mark_watchlist_expired([e["id"] for e in expired])
+        _print_lines(f"  ⏰ Expired: {row['ticker']}" for row in updated)
+        print(f"\n✅ Processed {len(updated)} expirations")
+
+    elif args.wl_cmd == "process-expired":
+        expired = db.get_expired_watchlist()
+        updated = db.bulk_mark_watchlist_expired([e["id"] for e in expired])
+        _print_lines(f"  ⏰ Marked expired: {row['ticker']}" for row in updated)
+        print(f"\n✅ Processed {len(updated)} entries")
+
+    elif args.wl_cmd == "monitor":
+        from watchlist_monitor import WatchlistMonitor, parse_trigger, ConditionType
+        from ib_client import IBClient
+
+        ib_client = IBClient()
+        if not ib_client.health_check():
+            print("❌ IB MCP server not available at localhost:8100")
+            sys.exit(1)
+
+        price_tolerance = float(cfg._get("watchlist_price_threshold_pct", "feature_flags", "0.5"))
+
+        def event_handler(event):
+            """Print events to console."""
+            prefix = (
+                _WATCHLIST_EVENT_PREFIX.get(event.event_type)
+                or f"[{event.event_type.upper()}] "
+            )
+            sys.stdout.write(f"{prefix}{event.ticker}: {event.reason}\033[0m\n")
+            sys.stdout.flush()
+
+        monitor = WatchlistMonitor(
+            db=db,
+            ib_client=ib_client,
+            price_tolerance_pct=price_tolerance,
+            on_event=event_handler
+        )
 
-                if args.once:
+        print(f"Starting watchlist monitor (interval: {args.interval}s)")
+
+        if args.once:
+            results = monitor.check_entries()
+            print(f"\nResults: {results}")
+        else:
+            # Loop mode: sleep to a monotonic deadline so the period stays
+            # at interval rather than interval + check duration
+            try:
+                next_t = time.monotonic()
+                while True:
                     results = monitor.check_entries()
-                    print(f"\nResults: {results}")
-                else:
-                    # Loop mode
-                    import time
-                    try:
-                        while True:
-                            results = monitor.check_entries()
-                            if results.triggered or results.invalidated or results.expired or results.errors:
-                                print(f"[{datetime.now().strftime('%H:%M:%S')}] {results}")
-                            time.sleep(args.interval)
-                    except KeyboardInterrupt:
-                        print("\nMonitor stopped")
-
-            elif args.wl_cmd == "pending-triggers":
-                from watchlist_monitor import parse_trigger, ConditionType
-
-                entries = db.get_active_watchlist()
-                if not entries:
-                    print("No active watchlist entries")
+                    if results.triggered or results.invalidated or results.expired or results.errors:
+                        print(f"[{datetime.now().strftime('%H:%M:%S')}] {results}")
+                    next_t += args.interval
+                    delay = next_t - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_t = time.monotonic()  # fell behind; don't burst to catch up
+            except KeyboardInterrupt:
+                print("\nMonitor stopped")
+
+    elif args.wl_cmd == "pending-triggers":
+        from watchlist_monitor import parse_trigger, ConditionType
+
+        entries = db.get_active_watchlist()
+        if not entries:
+            print("No active watchlist entries")
+        else:
+            print(f"\nActive Watchlist Entries ({len(entries)}):\n")
+            print(f"{'Ticker':<6} {'Parseable':<10} {'Condition':<40} {'Expires':<12}")
+            print("─" * 75)
+
+            # Parse each distinct trigger once; many entries share the same text
+            parsed = {
+                t: parse_trigger(t) if t else None
+                for t in {e.get("entry_trigger", "") for e in entries}
+            }
+            for entry in entries:
+                ticker = entry["ticker"]
+                trigger_text = entry.get("entry_trigger", "")
+                condition = parsed[trigger_text]
+
+                # Format condition
+                if condition and condition.type != ConditionType.CUSTOM:
+                    cond_str = f"{condition.type.value}: {condition.value}"
+                    parseable = "✓"
                 else:
-                    print(f"\nActive Watchlist Entries ({len(entries)}):\n")
-                    print(f"{'Ticker':<6} {'Parseable':<10} {'Condition':<40} {'Expires':<12}")
-                    print("─" * 75)
+                    cond_str = trigger_text[:38] + ".." if len(trigger_text) > 40 else trigger_text
+                    parseable = "✗ (manual)"
 
-                    for entry in entries:
-                        ticker = entry["ticker"]
-                        trigger_text = entry.get("entry_trigger", "")
-                        condition = parse_trigger(trigger_text) if trigger_text else None
+                expires = entry.get("expires_at")
+                expires_str = str(expires)[:10] if expires else "never"
 
-                        # Format condition
-                        if condition and condition.type != ConditionType.CUSTOM:
-                            cond_str = f"{condition.type.value}: {condition.value}"
-                            parseable = "✓"
-                        else:
-                            cond_str = trigger_text[:38] + ".." if len(trigger_text) > 40 else trigger_text
-                            parseable = "✗ (manual)"
+                print(f"{ticker:<6} {parseable:<10} {cond_str:<40} {expires_str:<12}")
 
-                        expires = entry.get("expires_at")
-                        expires_str = str(expires)[:10] if expires else "never"
+    else:
+        print("Usage: watchlist-db [list|check|process-expired|monitor|pending-triggers]")
+
+
+def _handle_settings_command(args, db):
+    """Handle settings subcommands."""
+    if args.action == "list":
+        all_settings = db.get_all_settings()
+        cat = args.category
+        print(f"\n{'Key':<35} {'Value':<25}")
+        print("─" * 60)
+        for k, v in sorted(all_settings.items()):
+            print(f"{k:<35} {str(v):<25}")
+    elif args.action == "get" and args.key:
+        val = db.get_setting(args.key)
+        if val is not None:
+            print(f"{args.key} = {val}")
+        else:
+            print(f"Setting '{args.key}' not found")
+    elif args.action == "set" and args.key and args.value:
+        # Try to parse as JSON, fall back to string
+        parsed_val = _parse_setting_value(args.value)
+        db.set_setting(args.key, parsed_val)
+        print(f"✅ {args.key} = {parsed_val}")
+        print("  (takes effect on next service tick)")
+
+
+# ─── Options Commands (IPLAN-006) ────────────────────────────────────────────
+
+
+def _handle_options_command(args, db):
+    """Handle options subcommands."""
+    # ExpirationMonitor loads its settings on construction, so only the
+    # subcommands that need it import and build one
+    if args.options_cmd == "list" and args.csv:
+        sys.stdout.flush()
+        db.copy_csv(
+            "SELECT id, full_symbol, option_type, option_strike, option_expiration,"
+            " days_to_expiry, COALESCE(current_size, entry_size) AS size"
+            " FROM nexus.v_options_positions",
+            None,
+            sys.stdout.buffer,
+        )
 
-                        print(f"{ticker:<6} {parseable:<10} {cond_str:<40} {expires_str:<12}")
+    elif args.options_cmd == "list":
+        options = db.get_options_positions()
+        if not options:
+            print("No open options positions")
+        else:
+            print(f"\n{'ID':>4} {'Symbol':<25} {'Type':<4} {'Strike':>8} {'Expires':<12} {'Days':>5} {'Size':>6}")
+            print("─" * 75)
+            _print_lines(_option_row(opt) for opt in options)
 
-            else:
-                print("Usage: watchlist-db [list|check|process-expired|monitor|pending-triggers]")
+    elif args.options_cmd == "expiring":
+        from expiration_monitor import ExpirationMonitor
 
-        elif args.cmd == "settings":
-            if args.action == "list":
-                all_settings = db.get_all_settings()
-                cat = args.category
-                print(f"\n{'Key':<35} {'Value':<25}")
-                print("─" * 60)
-                for k, v in sorted(all_settings.items()):
-                    print(f"{k:<35} {str(v):<25}")
-            elif args.action == "get" and args.key:
-                val = db.get_setting(args.key)
-                if val is not None:
-                    print(f"{args.key} = {val}")
-                else:
-                    print(f"Setting '{args.key}' not found")
-            elif args.action == "set" and args.key and args.value:
-                # Try to parse as JSON, fall back to string
-                import json as _json
+        days = args.days
+        expiring = ExpirationMonitor(db).get_expiring_soon(days)
+        if not expiring:
+            print(f"No options expiring within {days} days")
+        else:
+            print(f"\nOptions expiring within {days} days ({len(expiring)}):\n")
+            print(f"{'ID':>4} {'Symbol':<25} {'Type':<4} {'Strike':>8} {'Expires':<12} {'Days':>5}")
+            print("─" * 65)
+            lines = []
+            for opt in expiring:
+                days_left = opt.get("days_to_expiry", "?")
+                # Highlight critical (<=3 days)
+                prefix = "⚠️ " if isinstance(days_left, int) and days_left <= 3 else "  "
+                lines.append(_EXPIRING_ROW(prefix, *_option_fields(opt), days_left))
+            _print_lines(lines)
+
+    elif args.options_cmd == "expired":
+        from expiration_monitor import ExpirationMonitor
+
+        expired = ExpirationMonitor(db).get_expired()
+        if not expired:
+            print("No expired options needing action")
+        else:
+            print(f"\nExpired options ({len(expired)}):\n")
+            print(f"{'ID':>4} {'Symbol':<25} {'Type':<4} {'Strike':>8} {'Expired':<12}")
+            print("─" * 60)
+            _print_lines(_EXPIRED_ROW(*_option_fields(opt)) for opt in expired)
 
-                try:
-                    parsed_val = _json.loads(args.value)
-                except _json.JSONDecodeError:
-                    parsed_val = args.value
-                db.set_setting(args.key, parsed_val)
-                print(f"✅ {args.key} = {parsed_val}")
-                print("  (takes effect on next service tick)")
-
-        # ─── Options Commands (IPLAN-006) ─────────────────────────────────────────────
-        elif args.cmd == "options":
-            from expiration_monitor import ExpirationMonitor
-
-            exp_monitor = ExpirationMonitor(db)
-
-            if args.options_cmd == "list":
-                options = db.get_options_positions()
-                if not options:
-                    print("No open options positions")
-                else:
-                    print(f"\n{'ID':>4} {'Symbol':<25} {'Type':<4} {'Strike':>8} {'Expires':<12} {'Days':>5} {'Size':>6}")
-                    print("─" * 75)
-                    for opt in options:
-                        opt_type = opt.get("option_type", "?")[0].upper()
-                        strike = float(opt.get("option_strike") or 0)
-                        exp_date = str(opt.get("option_expiration", ""))[:10]
-                        days = opt.get("days_to_expiry", "?")
-                        size = float(opt.get("current_size") or opt.get("entry_size") or 0)
-                        symbol = opt.get("full_symbol") or opt.get("ticker", "?")
-                        print(f"{opt['id']:>4} {symbol:<25} {opt_type:<4} ${strike:>7.2f} {exp_date:<12} {days:>5} {size:>6.0f}")
-
-            elif args.options_cmd == "expiring":
-                days = args.days
-                expiring = exp_monitor.get_expiring_soon(days)
-                if not expiring:
-                    print(f"No options expiring within {days} days")
-                else:
-                    print(f"\nOptions expiring within {days} days ({len(expiring)}):\n")
-                    print(f"{'ID':>4} {'Symbol':<25} {'Type':<4} {'Strike':>8} {'Expires':<12} {'Days':>5}")
-                    print("─" * 65)
-                    for opt in expiring:
-                        opt_type = opt.get("option_type", "?")[0].upper()
-                        strike = float(opt.get("option_strike") or 0)
-                        exp_date = str(opt.get("option_expiration", ""))[:10]
-                        days_left = opt.get("days_to_expiry", "?")
-                        symbol = opt.get("full_symbol") or opt.get("ticker", "?")
-                        # Highlight critical (<=3 days)
-                        prefix = "⚠️ " if isinstance(days_left, int) and days_left <= 3 else "  "
-                        print(f"{prefix}{opt['id']:>4} {symbol:<25} {opt_type:<4} ${strike:>7.2f} {exp_date:<12} {days_left:>5}")
-
-            elif args.options_cmd == "expired":
-                expired = exp_monitor.get_expired()
-                if not expired:
-                    print("No expired options needing action")
-                else:
-                    print(f"\nExpired options ({len(expired)}):\n")
-                    print(f"{'ID':>4} {'Symbol':<25} {'Type':<4} {'Strike':>8} {'Expired':<12}")
-                    print("─" * 60)
-                    for opt in expired:
-                        opt_type = opt.get("option_type", "?")[0].upper()
-                        strike = float(opt.get("option_strike") or 0)
-                        exp_date = str(opt.get("option_expiration", ""))[:10]
-                        symbol = opt.get("full_symbol") or opt.get("ticker", "?")
-                        print(f"{opt['id']:>4} {symbol:<25} {opt_type:<4} ${strike:>7.2f} {exp_date:<12}")
-
-            elif args.options_cmd == "process-expired":
-                # Optional: get stock prices from IB for ITM detection
-                get_price_fn = None
-                try:
-                    from ib_client import IBClient
-                    ib = IBClient()
-                    if ib.health_check():
-                        def get_price_fn(ticker):
-                            try:
-                                quote = ib.get_stock_price(ticker)
-                                return quote.get("last") if quote else None
-                            except Exception:
-                                return None
-                except Exception:
-                    print("Note: IB not available, using heuristics for ITM detection")
-
-                results = exp_monitor.process_expirations(get_stock_price_fn=get_price_fn)
-                print(f"\n✅ Processed expired options:")
-                print(f"   Closed worthless: {results['expired_worthless']}")
-                print(f"   Queued for review (ITM): {results['needs_review']}")
-                if results['errors']:
-                    print(f"   Errors: {results['errors']}")
-
-            elif args.options_cmd == "by-underlying":
-                ticker = args.ticker.upper()
-                options = db.get_options_positions(underlying=ticker)
-                if not options:
-                    print(f"No open options for {ticker}")
-                else:
-                    print(f"\nOptions for {ticker} ({len(options)}):\n")
-                    print(f"{'ID':>4} {'Symbol':<25} {'Type':<4} {'Strike':>8} {'Expires':<12} {'Days':>5} {'Size':>6}")
-                    print("─" * 75)
-                    for opt in options:
-                        opt_type = opt.get("option_type", "?")[0].upper()
-                        strike = float(opt.get("option_strike") or 0)
-                        exp_date = str(opt.get("option_expiration", ""))[:10]
-                        days = opt.get("days_to_expiry", "?")
-                        size = float(opt.get("current_size") or opt.get("entry_size") or 0)
-                        symbol = opt.get("full_symbol") or opt.get("ticker", "?")
-                        print(f"{opt['id']:>4} {symbol:<25} {opt_type:<4} ${strike:>7.2f} {exp_date:<12} {days:>5} {size:>6.0f}")
-
-            elif args.options_cmd == "summary":
-                summary = exp_monitor.get_summary()
-                print(f"\n{'═' * 40}")
-                print("OPTIONS EXPIRATION SUMMARY")
-                print(f"{'═' * 40}")
-                print(f"  Expiring today:     {summary['expiring_today']:>4}")
-                print(f"  Critical (≤3 days): {summary['critical']:>4}")
-                print(f"  Warning (≤7 days):  {summary['warning']:>4}")
-                print(f"  Expired (action):   {summary['expired']:>4}")
+    elif args.options_cmd == "process-expired":
+        from expiration_monitor import ExpirationMonitor
 
-            else:
-                print("Usage: options [list|expiring|expired|process-expired|by-underlying|summary]")
+        # Optional: get stock prices from IB for ITM detection
+        # One batch quote request covers every expired underlying
+        get_prices_fn = None
+        try:
+            from ib_client import IBClient
+            ib = IBClient()
+            if ib.health_check():
+                def get_prices_fn(tickers):
+                    quotes = ib.get_quotes_batch(tickers)
+                    return {symbol.upper(): q.last for symbol, q in quotes.items()}
+        except Exception:
+            print("Note: IB not available, using heuristics for ITM detection")
+
+        results = ExpirationMonitor(db).process_expirations(get_stock_prices_fn=get_prices_fn)
+        print(f"\n✅ Processed expired options:")
+        print(f"   Closed worthless: {results['expired_worthless']}")
+        print(f"   Queued for review (ITM): {results['needs_review']}")
+        if results['errors']:
+            print(f"   Errors: {results['errors']}")
+
+    elif args.options_cmd == "by-underlying":
+        ticker = args.ticker.upper()
+        options = db.get_options_positions(underlying=ticker)
+        if not options:
+            print(f"No open options for {ticker}")
+        else:
+            print(f"\nOptions for {ticker} ({len(options)}):\n")
+            print(f"{'ID':>4} {'Symbol':<25} {'Type':<4} {'Strike':>8} {'Expires':<12} {'Days':>5} {'Size':>6}")
+            print("─" * 75)
+            _print_lines(_option_row(opt) for opt in options)
+
+    elif args.options_cmd == "summary":
+        from expiration_monitor import ExpirationMonitor
+
+        summary = ExpirationMonitor(db).get_summary()
+        print(f"\n{'═' * 40}")
+        print("OPTIONS EXPIRATION SUMMARY")
+        print(f"{'═' * 40}")
+        print(f"  Expiring today:     {summary['expiring_today']:>4}")
+        print(f"  Critical (≤3 days): {summary['critical']:>4}")
+        print(f"  Warning (≤7 days):  {summary['warning']:>4}")
+        print(f"  Expired (action):   {summary['expired']:>4}")
+
+    else:
+        print("Usage: options [list|expiring|expired|process-expired|by-underlying|summary]")
 
-        # ─── Review Commands (IPLAN-001) ─────────────────────────────────────────────
-        elif args.cmd == "review-earnings":
-            if args.review_cmd == "run":
-                ticker = args.ticker.upper()
-                analysis_file = args.analysis
 
-                if not analysis_file:
-                    analysis_file = db.get_latest_earnings_analysis(ticker)
+# ─── Review Commands (IPLAN-001) ─────────────────────────────────────────────
 
-                if not analysis_file:
-                    print(f"❌ No earnings analysis found for {ticker}")
-                else:
-                    # Queue the post-earnings review task
-                    prompt = f"analysis_file: {analysis_file}"
-                    task_id = db.queue_task("post_earnings_review", ticker, prompt=prompt, priority=8)
-                    print(f"✅ Queued post-earnings review for {ticker} (task {task_id})")
-                    print(f"   Analysis: {analysis_file}")
-                    print("   Run: python tradegent.py process-queue")
-
-            elif args.review_cmd == "pending":
-                pending = db.get_pending_post_earnings_reviews()
-                if not pending:
-                    print("No pending post-earnings reviews")
-                else:
-                    print(f"\nPending Post-Earnings Reviews ({len(pending)}):\n")
-                    print(f"{'Ticker':<8} {'Earnings':<12} {'Analysis Date':<20} {'File'}")
-                    print("─" * 80)
-                    for p in pending:
-                        earnings = str(p.get("earnings_date", ""))[:10]
-                        analysis_dt = str(p.get("current_analysis_date", ""))[:19]
-                        file_short = p.get("current_analysis_file", "")[-40:]
-                        print(f"{p['ticker']:<8} {earnings:<12} {analysis_dt:<20} ...{file_short}")
-
-            elif args.review_cmd == "backfill":
-                limit = args.limit
-                dry_run = args.dry_run
-                unreviewed = db.get_all_unreviewed_earnings_analyses()[:limit]
-
-                if not unreviewed:
-                    print("No unreviewed earnings analyses found")
-                else:
-                    print(f"\n{'Backfilling' if not dry_run else 'Would backfill'} {len(unreviewed)} analyses:\n")
-                    for u in unreviewed:
-                        ticker = u.get("ticker")
-                        file_path = u.get("current_analysis_file")
-                        if dry_run:
-                            print(f"  [DRY-RUN] {ticker}: {file_path}")
-                        else:
-                            prompt = f"analysis_file: {file_path}"
-                            task_id = db.queue_task("post_earnings_review", ticker, prompt=prompt, priority=5)
-                            print(f"  ✓ Queued {ticker} (task {task_id})")
-
-                    if not dry_run:
-                        print(f"\n✅ Queued {len(unreviewed)} reviews. Run: python tradegent.py process-queue")
 
-            else:
-                print("Usage: review-earnings [run|pending|backfill]")
-
-        elif args.cmd == "validate-analysis":
-            if args.validation_cmd == "run":
-                ticker = args.ticker.upper()
-                new_file = args.new_file
-                prior_file = args.prior_file
-
-                if not prior_file:
-                    lineage = db.get_active_analysis(ticker, "stock")
-                    if not lineage:
-                        lineage = db.get_active_analysis(ticker, "earnings")
-                    if lineage:
-                        prior_file = lineage["current_analysis_file"]
-
-                if not prior_file:
-                    print(f"❌ No prior analysis found for {ticker}")
-                else:
-                    prompt_lines = [f"prior_file: {prior_file}"]
-                    if new_file:
-                        prompt_lines.append(f"new_file: {new_file}")
-                    prompt_lines.append("trigger: manual")
-
-                    task_id = db.queue_task(
-                        "report_validation", ticker,
-                        prompt="\n".join(prompt_lines),
-                        priority=8
-                    )
-                    print(f"✅ Queued report validation for {ticker} (task {task_id})")
-                    print(f"   Prior: {prior_file}")
-                    if new_file:
-                        print(f"   New: {new_file}")
-                    print("   Run: python tradegent.py process-queue")
-
-            elif args.validation_cmd == "expired":
-                expired = db.get_expired_forecasts()
-                if not expired:
-                    print("No expired forecasts")
-                else:
-                    print(f"\nExpired Forecasts ({len(expired)}):\n")
-                    print(f"{'Ticker':<8} {'Type':<10} {'Valid Until':<12} {'Analysis Date':<20}")
-                    print("─" * 60)
-                    for e in expired:
-                        valid_until = str(e.get("forecast_valid_until", ""))[:10]
-                        analysis_dt = str(e.get("current_analysis_date", ""))[:19]
-                        print(f"{e['ticker']:<8} {e['analysis_type']:<10} {valid_until:<12} {analysis_dt:<20}")
-
-            elif args.validation_cmd == "process-expired":
-                dry_run = args.dry_run
-                expired = db.get_expired_forecasts()
-
-                if not expired:
-                    print("No expired forecasts to process")
-                else:
-                    print(f"\n{'Processing' if not dry_run else 'Would process'} {len(expired)} expired forecasts:\n")
-                    for e in expired:
-                        ticker = e["ticker"]
-                        prior_file = e["current_analysis_file"]
-                        if dry_run:
-                            print(f"  [DRY-RUN] {ticker}: {prior_file}")
-                        else:
-                            prompt = f"prior_file: {prior_file}\ntrigger: forecast_expiry"
-                            task_id = db.queue_task("report_validation", ticker, prompt=prompt, priority=6)
-                            print(f"  ✓ Queued {ticker} (task {task_id})")
-
-                    if not dry_run:
-                        print(f"\n✅ Queued {len(expired)} validations. Run: python tradegent.py process-queue")
+def _handle_review_earnings_command(args, db):
+    """Handle review-earnings subcommands."""
+    if args.review_cmd == "run":
+        ticker = args.ticker.upper()
+        analysis_file = args.analysis
 
+        if not analysis_file:
+            analysis_file = db.get_latest_earnings_analysis(ticker)
+
+        if not analysis_file:
+            print(f"❌ No earnings analysis found for {ticker}")
+        else:
+            # Queue the post-earnings review task
+            prompt = f"analysis_file: {analysis_file}"
+            task_id = db.queue_task("post_earnings_review", ticker, prompt=prompt, priority=8)
+            print(f"✅ Queued post-earnings review for {ticker} (task {task_id})")
+            print(f"   Analysis: {analysis_file}")
+            print("   Run: python tradegent.py process-queue")
+
+    elif args.review_cmd == "pending":
+        pending = db.get_pending_post_earnings_reviews()
+        if not pending:
+            print("No pending post-earnings reviews")
+        else:
+            print(f"\nPending Post-Earnings Reviews ({len(pending)}):\n")
+            print(f"{'Ticker':<8} {'Earnings':<12} {'Analysis Date':<20} {'File'}")
+            print("─" * 80)
+            for p in pending:
+                file_short = p.get("current_analysis_file", "")[-40:]
+                print(f"{p['ticker']:<8} {p['earnings_date_str'] or '':<12} {p['analysis_dt_str']:<20} ...{file_short}")
+
+    elif args.review_cmd == "backfill":
+        limit = args.limit
+        dry_run = args.dry_run
+        unreviewed = db.get_all_unreviewed_earnings_analyses()[:limit]
+
+        if not unreviewed:
+            print("No unreviewed earnings analyses found")
+        else:
+            print(f"\n{'Backfilling' if not dry_run else 'Would backfill'} {len(unreviewed)} analyses:\n")
+            if dry_run:
+                _print_lines(
+                    f"  [DRY-RUN] {u.get('ticker')}: {u.get('current_analysis_file')}" for u in unreviewed
+                )
             else:
-                print("Usage: validate-analysis [run|expired|process-expired]")
+                task_ids = db.queue_tasks_bulk([
+                    ("post_earnings_review", u.get("ticker"),
+                     f"analysis_file: {u.get('current_analysis_file')}", 5)
+                    for u in unreviewed
+                ])
+                _print_lines(
+                    f"  ✓ Queued {u.get('ticker')} (task {task_id})"
+                    for u, task_id in zip(unreviewed, task_ids, strict=True)
+                )
 
-        elif args.cmd == "lineage":
-            if args.lineage_cmd == "show":
-                ticker = args.ticker.upper()
-                limit = args.limit
-                lineage = db.get_analysis_lineage(ticker, limit=limit)
+            if not dry_run:
+                print(f"\n✅ Queued {len(unreviewed)} reviews. Run: python tradegent.py process-queue")
+
+    else:
+        print("Usage: review-earnings [run|pending|backfill]")
 
-                if not lineage:
-                    print(f"No lineage found for {ticker}")
-                else:
-                    print(f"\nAnalysis Lineage for {ticker} ({len(lineage)} entries):\n")
-                    print(f"{'ID':>4} {'Type':<10} {'Status':<12} {'Date':<12} {'Grade':<6} {'Validation'}")
-                    print("─" * 70)
-                    for l in lineage:
-                        status = l.get("current_status", "?")
-                        date_str = str(l.get("current_analysis_date", ""))[:10]
-                        grade = l.get("post_earnings_grade") or "—"
-                        val_result = l.get("validation_result") or "—"
-                        print(f"{l['id']:>4} {l['analysis_type']:<10} {status:<12} {date_str:<12} {grade:<6} {val_result}")
-
-            elif args.lineage_cmd == "active":
-                with db.conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT ticker, analysis_type, current_status, current_analysis_date,
-                               forecast_valid_until, earnings_date
-                        FROM nexus.analysis_lineage
-                        WHERE current_status = 'active'
-                        ORDER BY current_analysis_date DESC
-                    """)
-                    active = [dict(r) for r in cur.fetchall()]
-
-                if not active:
-                    print("No active analyses")
-                else:
-                    print(f"\nActive Analyses ({len(active)}):\n")
-                    print(f"{'Ticker':<8} {'Type':<10} {'Date':<12} {'Valid Until':<12} {'Earnings'}")
-                    print("─" * 60)
-                    for a in active:
-                        date_str = str(a.get("current_analysis_date", ""))[:10]
-                        valid = str(a.get("forecast_valid_until") or "—")[:10]
-                        earnings = str(a.get("earnings_date") or "—")[:10]
-                        print(f"{a['ticker']:<8} {a['analysis_type']:<10} {date_str:<12} {valid:<12} {earnings}")
-
-            elif args.lineage_cmd == "invalidated":
-                with db.conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT ticker, analysis_type, current_status, validation_result,
-                               current_analysis_date, updated_at
-                        FROM nexus.analysis_lineage
-                        WHERE current_status = 'invalidated'
-                        ORDER BY updated_at DESC
-                        LIMIT 20
-                    """)
-                    invalidated = [dict(r) for r in cur.fetchall()]
-
-                if not invalidated:
-                    print("No invalidated analyses")
-                else:
-                    print(f"\nInvalidated Analyses ({len(invalidated)}):\n")
-                    print(f"{'Ticker':<8} {'Type':<10} {'Result':<12} {'Analysis Date':<12} {'Invalidated'}")
-                    print("─" * 65)
-                    for i in invalidated:
-                        date_str = str(i.get("current_analysis_date", ""))[:10]
-                        inv_date = str(i.get("updated_at", ""))[:10]
-                        result = i.get("validation_result") or "—"
-                        print(f"{i['ticker']:<8} {i['analysis_type']:<10} {result:<12} {date_str:<12} {inv_date}")
 
+def _handle_validate_analysis_command(args, db):
+    """Handle validate-analysis subcommands."""
+    if args.validation_cmd == "run":
+        ticker = args.ticker.upper()
+        new_file = args.new_file
+        prior_file = args.prior_file
+
+        if not prior_file:
+            lineage = db.get_active_analysis(ticker, "stock")
+            if not lineage:
+                lineage = db.get_active_analysis(ticker, "earnings")
+            if lineage:
+                prior_file = lineage["current_analysis_file"]
+
+        if not prior_file:
+            print(f"❌ No prior analysis found for {ticker}")
+        else:
+            prompt_lines = [f"prior_file: {prior_file}"]
+            if new_file:
+                prompt_lines.append(f"new_file: {new_file}")
+            prompt_lines.append("trigger: manual")
+
+            task_id = db.queue_task(
+                "report_validation", ticker,
+                prompt="\n".join(prompt_lines),
+                priority=8
+            )
+            print(f"✅ Queued report validation for {ticker} (task {task_id})")
+            print(f"   Prior: {prior_file}")
+            if new_file:
+                print(f"   New: {new_file}")
+            print("   Run: python tradegent.py process-queue")
+
+    elif args.validation_cmd == "expired":
+        expired = db.get_expired_forecasts()
+        if not expired:
+            print("No expired forecasts")
+        else:
+            print(f"\nExpired Forecasts ({len(expired)}):\n")
+            print(f"{'Ticker':<8} {'Type':<10} {'Valid Until':<12} {'Analysis Date':<20}")
+            print("─" * 60)
+            for e in expired:
+                print(f"{e['ticker']:<8} {e['analysis_type']:<10} {e['valid_until_str']:<12} {e['analysis_dt_str']:<20}")
+
+    elif args.validation_cmd == "process-expired":
+        dry_run = args.dry_run
+        expired = db.get_expired_forecasts()
+
+        if not expired:
+            print("No expired forecasts to process")
+        else:
+            print(f"\n{'Processing' if not dry_run else 'Would process'} {len(expired)} expired forecasts:\n")
+            if dry_run:
+                _print_lines(f"  [DRY-RUN] {e['ticker']}: {e['current_analysis_file']}" for e in expired)
             else:
-                print("Usage: lineage [show|active|invalidated]")
+                task_ids = db.queue_tasks_bulk([
+                    ("report_validation", e["ticker"],
+                     f"prior_file: {e['current_analysis_file']}\ntrigger: forecast_expiry", 6)
+                    for e in expired
+                ])
+                _print_lines(
+                    f"  ✓ Queued {e['ticker']} (task {task_id})"
+                    for e, task_id in zip(expired, task_ids, strict=True)
+                )
 
-        elif args.cmd == "calibration":
-            if args.calibration_cmd == "summary":
-                stats = db.get_calibration_stats()
-                if not stats:
-                    print("No calibration data yet")
-                else:
-                    print(f"\nConfidence Calibration Summary:\n")
-                    print(f"{'Bucket':<8} {'Total':>8} {'Correct':>8} {'Rate':>8} {'Expected':>10}")
-                    print("─" * 50)
-                    for s in stats:
-                        bucket = s["confidence_bucket"]
-                        total = s["total_predictions"]
-                        correct = s["correct_predictions"]
-                        actual = float(s["actual_rate"] or 0)
-                        expected_low = bucket
-                        expected_high = bucket + 9
-                        calibrated = "✓" if expected_low <= actual <= expected_high else "✗"
-                        print(f"{bucket}-{bucket+9}%{'':<2} {total:>8} {correct:>8} {actual:>7.1f}% {expected_low}-{expected_high}% {calibrated}")
-
-            elif args.calibration_cmd == "ticker":
-                ticker = args.ticker.upper()
-                analysis_type = args.analysis_type
-                stats = db.get_ticker_calibration(ticker, analysis_type)
-                if not stats:
-                    print(f"No calibration data for {ticker} ({analysis_type})")
-                else:
-                    print(f"\nCalibration for {ticker} ({analysis_type}):\n")
-                    print(f"{'Bucket':<8} {'Total':>8} {'Correct':>8} {'Rate':>8}")
-                    print("─" * 40)
-                    for s in stats:
-                        bucket = s["confidence_bucket"]
-                        total = s["total_predictions"]
-                        correct = s["correct_predictions"]
-                        actual = float(s["actual_rate"] or 0)
-                        print(f"{bucket}-{bucket+9}%{'':<2} {total:>8} {correct:>8} {actual:>7.1f}%")
+            if not dry_run:
+                print(f"\n✅ Queued {len(expired)} validations. Run: python tradegent.py process-queue")
+
+    else:
+        print("Usage: validate-analysis [run|expired|process-expired]")
+
+
+def _handle_lineage_command(args, db):
+    """Handle lineage subcommands."""
+    if args.lineage_cmd == "show":
+        ticker = args.ticker.upper()
+        limit = args.limit
+        lineage = db.get_analysis_lineage(ticker, limit=limit)
+
+        if not lineage:
+            print(f"No lineage found for {ticker}")
+        else:
+            print(f"\nAnalysis Lineage for {ticker} ({len(lineage)} entries):\n")
+            print(f"{'ID':>4} {'Type':<10} {'Status':<12} {'Date':<12} {'Grade':<6} {'Validation'}")
+            print("─" * 70)
+            _print_lines(
+                _LINEAGE_ROW(
+                    l["id"],
+                    l["analysis_type"],
+                    l.get("current_status", "?"),
+                    str(l.get("current_analysis_date", ""))[:10],
+                    l.get("post_earnings_grade") or "—",
+                    l.get("validation_result") or "—",
+                )
+                for l in lineage
+            )
 
+    elif args.lineage_cmd == "active":
+        # Unbounded query: stream rows from a server-side cursor straight
+        # to stdout and report the count once the stream is exhausted
+        with db.conn.cursor(name="lineage_active") as cur:
+            cur.itersize = 1000
+            cur.execute("""
+                SELECT ticker, analysis_type,
+                       to_char(current_analysis_date, 'YYYY-MM-DD') AS analysis_date,
+                       COALESCE(to_char(forecast_valid_until, 'YYYY-MM-DD'), '—') AS valid_until,
+                       COALESCE(to_char(earnings_date, 'YYYY-MM-DD'), '—') AS earnings
+                FROM nexus.analysis_lineage
+                WHERE current_status = 'active'
+                ORDER BY current_analysis_date DESC
+            """)
+            first = cur.fetchone()
+            if first is None:
+                print("No active analyses")
             else:
-                print("Usage: calibration [summary|ticker]")
+                print("\nActive Analyses:\n")
+                print(f"{'Ticker':<8} {'Type':<10} {'Date':<12} {'Valid Until':<12} {'Earnings'}")
+                print("─" * 60)
+                sys.stdout.write(_LINEAGE_ACTIVE_LINE(first))
+                total = 1
+                for row in cur:
+                    sys.stdout.write(_LINEAGE_ACTIVE_LINE(row))
+                    total += 1
+                print(f"\n{total} active analyses")
+
+    elif args.lineage_cmd == "invalidated":
+        with db.conn.cursor() as cur:
+            cur.execute("""
+                SELECT ticker, analysis_type,
+                       COALESCE(validation_result, '—') AS result,
+                       to_char(current_analysis_date, 'YYYY-MM-DD') AS analysis_date,
+                       COALESCE(to_char(updated_at, 'YYYY-MM-DD'), '') AS invalidated_date
+                FROM nexus.analysis_lineage
+                WHERE current_status = 'invalidated'
+                ORDER BY updated_at DESC
+                LIMIT 20
+            """)
+            rows = cur.fetchall()
+            if not rows:
+                print("No invalidated analyses")
+            else:
+                print(f"\nInvalidated Analyses ({len(rows)}):\n")
+                print(f"{'Ticker':<8} {'Type':<10} {'Result':<12} {'Analysis Date':<12} {'Invalidated'}")
+                print("─" * 65)
+                sys.stdout.writelines(map(_LINEAGE_INVALIDATED_LINE, rows))
+
+    else:
+        print("Usage: lineage [show|active|invalidated]")
+
+
+def _handle_calibration_command(args, db):
+    """Handle calibration subcommands."""
+    if args.calibration_cmd == "summary":
+        stats = db.get_calibration_stats()
+        if not stats:
+            print("No calibration data yet")
+        else:
+            print(f"\nConfidence Calibration Summary:\n")
+            print(f"{'Bucket':<8} {'Total':>8} {'Correct':>8} {'Rate':>8} {'Expected':>10}")
+            print("─" * 50)
+            for bucket, total, correct, rate in map(_CALIBRATION_FIELDS, stats):
+                actual = float(rate or 0)
+                expected_low = bucket
+                expected_high = bucket + 9
+                calibrated = "✓" if expected_low <= actual <= expected_high else "✗"
+                print(f"{bucket}-{bucket+9}%{'':<2} {total:>8} {correct:>8} {actual:>7.1f}% {expected_low}-{expected_high}% {calibrated}")
+
+    elif args.calibration_cmd == "ticker":
+        ticker = args.ticker.upper()
+        analysis_type = args.analysis_type
+        stats = db.get_ticker_calibration(ticker, analysis_type)
+        if not stats:
+            print(f"No calibration data for {ticker} ({analysis_type})")
+        else:
+            print(f"\nCalibration for {ticker} ({analysis_type}):\n")
+            print(f"{'Bucket':<8} {'Total':>8} {'Correct':>8} {'Rate':>8}")
+            print("─" * 40)
+            for bucket, total, correct, rate in map(_CALIBRATION_FIELDS, stats):
+                actual = float(rate or 0)
+                print(f"{bucket}-{bucket+9}%{'':<2} {total:>8} {correct:>8} {actual:>7.1f}%")
+
+    else:
+        print("Usage: calibration [summary|ticker]")
+
+
+# Top-level command name -> handler(args, db)
+_COMMAND_HANDLERS = {
+    "db-init": _handle_db_init_command,
+    "execute": _handle_execute_command,
+    "pipeline": _handle_pipeline_command,
+    "watchlist": lambda args, db: run_watchlist(db, args.auto_execute),
+    "scan": lambda args, db: run_scanners(db, args.scanner),
+    "run-due": lambda args, db: run_due_schedules(db),
+    "review": lambda args, db: run_analysis(db, "PORTFOLIO", AnalysisType.REVIEW),
+    "earnings-check": lambda args, db: run_earnings_check(db),
+    "status": lambda args, db: show_status(db),
+    "health": lambda args, db: _check_all_health(),
+    "stock": _handle_stock_command,
+    "process-queue": _handle_process_queue_command,
+    "queue-status": _handle_queue_status_command,
+    "trade": _handle_trade_command,
+    "watchlist-db": _handle_watchlist_db_command,
+    "settings": _handle_settings_command,
+    "options": _handle_options_command,
+    "review-earnings": _handle_review_earnings_command,
+    "validate-analysis": _handle_validate_analysis_command,
+    "lineage": _handle_lineage_command,
+    "calibration": _handle_calibration_command,
+    "graph": _handle_graph_command,
+    "rag": _handle_rag_command,
+}
 
-        # ─── Graph Commands ───────────────────────────────────────────────────────────
-        elif args.cmd == "graph":
-            _handle_graph_command(args)
 
-        # ─── RAG Commands ─────────────────────────────────────────────────────────────
-        elif args.cmd == "rag":
-            _handle_rag_command(args)
+def main():
+    import argparse
+
+    validate_agent_engine()
+
+    argv = sys.argv[1:]
+    if len(argv) == 1 and argv[0] in _FAST_COMMANDS:
+        args = argparse.Namespace(cmd=argv[0])
+    else:
+        args = _build_parser().parse_args(argv)
+
+    # Pooled so helper connections opened after a batch or worker finishes
+    # reuse its backend instead of paying a fresh Postgres handshake
+    with NexusDB(pooled=True) as db:
+        # Initialize settings from DB for all commands
+        global cfg
+        cfg = Settings(db)
+        sys.modules[__name__].__dict__["cfg"] = cfg
+
+        if args.cmd in PRODUCTION_GUARDED_COMMANDS:
+            enforce_production_adk_guard(cfg, context=f"orchestrator {args.cmd}")
 
+        handler = _COMMAND_HANDLERS.get(args.cmd)
+        if handler is None:
+            _build_parser().print_help()
         else:
-            parser.print_help()
+            handler(args, db)
 
 
 if __name__ == "__main__":
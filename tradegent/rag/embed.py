@@ -4,7 +4,12 @@ import hashlib
 import json
 import logging
 import os
+import queue
+import threading
 import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from datetime import UTC, date, datetime
 from pathlib import Path
 
@@ -50,6 +55,9 @@ from .schema import get_database_url
 
 log = logging.getLogger(__name__)
 
+# Serializes JSONL appends when documents are embedded concurrently
+_log_lock = threading.Lock()
+
 # Load configuration
 _config_path = Path(__file__).parent / "config.yaml"
 _config: dict = {}
@@ -76,7 +84,9 @@ if _config_path.exists():
         _config = yaml.safe_load(config_content)
 
 
-def embed_document(file_path: str, force: bool = False) -> EmbedResult:
+def embed_document(
+    file_path: str, force: bool = False, conn: psycopg.Connection | None = None
+) -> EmbedResult:
     """
     Embed a YAML document into pgvector.
 
@@ -92,6 +102,7 @@ def embed_document(file_path: str, force: bool = False) -> EmbedResult:
     Args:
         file_path: Path to YAML document
         force: Re-embed even if file unchanged
+        conn: Open connection to store through (connects per call if None)
 
     Returns:
         EmbedResult with embedding details
@@ -136,7 +147,7 @@ def embed_document(file_path: str, force: bool = False) -> EmbedResult:
 
     # Check if already embedded with same hash
     if not force:
-        existing = _get_document_by_id(doc_id)
+        existing = _get_document_by_id(doc_id, conn)
         if existing and existing.get("file_hash") == file_hash:
             log.info(f"Document {doc_id} unchanged, skipping")
             return EmbedResult(
@@ -182,6 +193,7 @@ def embed_document(file_path: str, force: bool = False) -> EmbedResult:
             file_hash=file_hash,
             chunks=chunks,
             embeddings=embeddings,
+            conn=conn,
         )
     except Exception as e:
         raise EmbedError(f"Database storage failed: {e}")
@@ -207,6 +219,57 @@ def embed_document(file_path: str, force: bool = False) -> EmbedResult:
     return result
 
 
+def embed_documents(
+    file_paths: Iterable[str], force: bool = False, workers: int = 1
+) -> Iterator[tuple[str, EmbedResult | EmbedError]]:
+    """
+    Embed many documents over a few shared database connections.
+
+    Yields (file_path, result) per file; a document that fails yields its
+    EmbedError instead of aborting the batch. Each document still commits
+    on its own, so one bad file never rolls back the others. With
+    workers > 1, documents run concurrently (one connection per worker)
+    and yield in completion order.
+    """
+    file_paths = list(file_paths)
+    workers = max(1, min(workers, len(file_paths)))
+
+    opened: list[psycopg.Connection] = []
+    for _ in range(workers):
+        try:
+            opened.append(psycopg.connect(get_database_url()))
+        except psycopg.Error as e:
+            log.warning(f"Shared connection failed, connecting per document: {e}")
+            break
+    idle: queue.SimpleQueue = queue.SimpleQueue()
+    for conn in opened:
+        idle.put(conn)
+
+    def _embed_one(file_path: str) -> EmbedResult | EmbedError:
+        # A connection carries one document's transaction at a time
+        conn = idle.get() if opened else None
+        try:
+            return embed_document(file_path, force, conn)
+        except EmbedError as e:
+            return e
+        finally:
+            if conn is not None:
+                idle.put(conn)
+
+    try:
+        if workers == 1:
+            for file_path in file_paths:
+                yield file_path, _embed_one(file_path)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-embed") as ex:
+                futures = {ex.submit(_embed_one, f): f for f in file_paths}
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+    finally:
+        for conn in opened:
+            conn.close()
+
+
 def embed_text(
     text: str,
     doc_id: str,
@@ -338,10 +401,10 @@ def _compute_file_hash(file_path: str) -> str:
         return hashlib.sha256(f.read()).hexdigest()
 
 
-def _get_document_by_id(doc_id: str) -> dict | None:
+def _get_document_by_id(doc_id: str, conn: psycopg.Connection | None = None) -> dict | None:
     """Get existing document by ID."""
     try:
-        with psycopg.connect(get_database_url()) as conn:
+        with nullcontext(conn) if conn is not None else psycopg.connect(get_database_url()) as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     "SELECT file_hash, chunk_count FROM nexus.rag_documents WHERE doc_id = %s",
@@ -365,75 +428,101 @@ def _store_document(
     file_hash: str,
     chunks: list[ChunkResult],
     embeddings: list[list[float]],
+    conn: psycopg.Connection | None = None,
 ) -> None:
-    """Store document and chunks in PostgreSQL."""
+    """Store document and chunks in PostgreSQL, in one transaction."""
     embed_model = _config.get("embedding", {}).get("ollama", {}).get("model", "nomic-embed-text")
 
-    with psycopg.connect(get_database_url()) as conn:
-        with conn.cursor() as cur:
-            # Upsert document
-            cur.execute(
-                """
-                INSERT INTO nexus.rag_documents
-                    (doc_id, file_path, doc_type, ticker, doc_date, quarter,
-                     chunk_count, embed_version, embed_model, file_hash)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (doc_id) DO UPDATE SET
-                    file_path = EXCLUDED.file_path,
-                    doc_type = EXCLUDED.doc_type,
-                    ticker = EXCLUDED.ticker,
-                    doc_date = EXCLUDED.doc_date,
-                    quarter = EXCLUDED.quarter,
-                    chunk_count = EXCLUDED.chunk_count,
-                    embed_version = EXCLUDED.embed_version,
-                    embed_model = EXCLUDED.embed_model,
-                    file_hash = EXCLUDED.file_hash,
-                    updated_at = now()
-                RETURNING id
-            """,
-                (
-                    doc_id,
-                    file_path,
-                    doc_type,
-                    ticker,
-                    doc_date,
-                    quarter,
-                    len(chunks),
-                    RAG_VERSION,
-                    embed_model,
-                    file_hash,
-                ),
+    with nullcontext(conn) if conn is not None else psycopg.connect(get_database_url()) as conn:
+        try:
+            _write_document(
+                conn, doc_id, file_path, doc_type, ticker, doc_date, quarter,
+                file_hash, chunks, embeddings, embed_model,
             )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
 
-            doc_pk = cur.fetchone()[0]
 
-            # Delete existing chunks
-            cur.execute("DELETE FROM nexus.rag_chunks WHERE doc_id = %s", (doc_pk,))
+def _write_document(
+    conn: psycopg.Connection,
+    doc_id: str,
+    file_path: str,
+    doc_type: str,
+    ticker: str | None,
+    doc_date: date | None,
+    quarter: str | None,
+    file_hash: str,
+    chunks: list[ChunkResult],
+    embeddings: list[list[float]],
+    embed_model: str,
+) -> None:
+    """Upsert the document row and replace its chunks (caller commits)."""
+    with conn.cursor() as cur:
+        # Upsert document
+        cur.execute(
+            """
+            INSERT INTO nexus.rag_documents
+                (doc_id, file_path, doc_type, ticker, doc_date, quarter,
+                 chunk_count, embed_version, embed_model, file_hash)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (doc_id) DO UPDATE SET
+                file_path = EXCLUDED.file_path,
+                doc_type = EXCLUDED.doc_type,
+                ticker = EXCLUDED.ticker,
+                doc_date = EXCLUDED.doc_date,
+                quarter = EXCLUDED.quarter,
+                chunk_count = EXCLUDED.chunk_count,
+                embed_version = EXCLUDED.embed_version,
+                embed_model = EXCLUDED.embed_model,
+                file_hash = EXCLUDED.file_hash,
+                updated_at = now()
+            RETURNING id
+        """,
+            (
+                doc_id,
+                file_path,
+                doc_type,
+                ticker,
+                doc_date,
+                quarter,
+                len(chunks),
+                RAG_VERSION,
+                embed_model,
+                file_hash,
+            ),
+        )
 
-            # Insert new chunks
-            for chunk, embedding in zip(chunks, embeddings):
-                cur.execute(
-                    """
-                    INSERT INTO nexus.rag_chunks
-                        (doc_id, section_path, section_label, chunk_index,
-                         content, content_tokens, embedding, doc_type, ticker, doc_date)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s::vector, %s, %s, %s)
-                """,
-                    (
-                        doc_pk,
-                        chunk.section_path,
-                        chunk.section_label,
-                        chunk.chunk_index,
-                        chunk.content,
-                        chunk.content_tokens,
-                        str(embedding),
-                        doc_type,
-                        ticker,
-                        doc_date,
-                    ),
-                )
+        doc_pk = cur.fetchone()[0]
+
+        # Delete existing chunks
+        cur.execute("DELETE FROM nexus.rag_chunks WHERE doc_id = %s", (doc_pk,))
 
-        conn.commit()
+        # Insert new chunks
+        cur.executemany(
+            """
+            INSERT INTO nexus.rag_chunks
+                (doc_id, section_path, section_label, chunk_index,
+                 content, content_tokens, embedding, doc_type, ticker, doc_date)
+            VALUES (%s, %s, %s, %s, %s, %s, %s::vector, %s, %s, %s)
+        """,
+            [
+                (
+                    doc_pk,
+                    chunk.section_path,
+                    chunk.section_label,
+                    chunk.chunk_index,
+                    chunk.content,
+                    chunk.content_tokens,
+                    str(embedding),
+                    doc_type,
+                    ticker,
+                    doc_date,
+                )
+                for chunk, embedding in zip(chunks, embeddings)
+            ],
+        )
 
 
 def _parse_date(date_str: str | None) -> date | None:
@@ -482,7 +571,7 @@ def _log_embed(result: EmbedResult) -> None:
     log_path = Path(_config.get("logging", {}).get("embed_log", "logs/rag_embed.jsonl"))
     log_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(log_path, "a") as f:
+    with _log_lock, open(log_path, "a") as f:
         f.write(
             json.dumps(
                 {
@@ -6,11 +6,18 @@ from pathlib import Path
 
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
 
 from .exceptions import EmbeddingUnavailableError
 
 log = logging.getLogger(__name__)
 
+# Shared keep-alive session: RAG ingest makes a call per chunk batch (and
+# concurrent workers), so pooled connections avoid a TCP (and TLS) setup each.
+_http_session = requests.Session()
+_http_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
 # Default embedding dimensions (1536 for pgvector index compatibility)
 DEFAULT_EMBED_DIMS = 1536  # OpenAI text-embedding-3-large with truncation
 
@@ -67,6 +74,7 @@ class EmbeddingClient:
             self.fallback_chain = fallback_chain
         self.dimensions = int(embedding_config.get("dimensions", DEFAULT_EMBED_DIMS))
         self.timeout = int(embedding_config.get("timeout_seconds", 30))
+        self.batch_size = int(embedding_config.get("batch_size", 50))
 
     def get_embedding(self, text: str) -> list[float]:
         """
@@ -82,57 +90,65 @@ class EmbeddingClient:
         Raises:
             EmbeddingUnavailableError: If all providers fail
         """
-        errors = []
+        return self._embed_many([text])[0]
 
-        for provider in self.fallback_chain:
-            try:
-                if provider == "ollama":
-                    return self._ollama_embed(text)
-                elif provider == "openrouter":
-                    return self._openrouter_embed(text)
-                elif provider == "openai":
-                    return self._openai_embed(text)
-                else:
-                    log.warning(f"Unknown embedding provider: {provider}")
-                    continue
-            except Exception as e:
-                log.warning(f"Embedding via {provider} failed: {e}")
-                errors.append(f"{provider}: {e}")
-                continue
-
-        raise EmbeddingUnavailableError(f"All embedding providers failed: {'; '.join(errors)}")
-
-    def get_embeddings_batch(self, texts: list[str], batch_size: int = 10) -> list[list[float]]:
+    def get_embeddings_batch(self, texts: list[str], batch_size: int | None = None) -> list[list[float]]:
         """
         Batch embedding for multiple texts.
 
+        Each batch goes to the provider as one request (all three accept a
+        list input), so N chunks cost N / batch_size round-trips.
+
         Args:
             texts: List of texts to embed
-            batch_size: Number of texts per batch
+            batch_size: Number of texts per request (config embedding.batch_size)
 
         Returns:
-            List of embedding vectors
+            List of embedding vectors, in input order
         """
+        batch_size = batch_size or self.batch_size
         embeddings = []
 
         for i in range(0, len(texts), batch_size):
-            batch = texts[i : i + batch_size]
-
-            for text in batch:
-                embedding = self.get_embedding(text)
-                embeddings.append(embedding)
+            embeddings.extend(self._embed_many(texts[i : i + batch_size]))
 
         return embeddings
 
-    def _ollama_embed(self, text: str) -> list[float]:
+    def _embed_many(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts in one request, trying each provider in the fallback chain."""
+        errors = []
+        providers = {
+            "ollama": self._ollama_embed,
+            "openrouter": self._openrouter_embed,
+            "openai": self._openai_embed,
+        }
+
+        for provider in self.fallback_chain:
+            embed = providers.get(provider)
+            if embed is None:
+                log.warning(f"Unknown embedding provider: {provider}")
+                continue
+            try:
+                embeddings = embed(texts)
+                if len(embeddings) != len(texts):
+                    raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+                return embeddings
+            except Exception as e:
+                log.warning(f"Embedding via {provider} failed: {e}")
+                errors.append(f"{provider}: {e}")
+                continue
+
+        raise EmbeddingUnavailableError(f"All embedding providers failed: {'; '.join(errors)}")
+
+    def _ollama_embed(self, texts: list[str]) -> list[list[float]]:
         """Local Ollama embedding ($0)."""
         cfg = self.config.get("embedding", {}).get("ollama", {})
         base_url = cfg.get("base_url", "http://localhost:11434")
         model = cfg.get("model", "nomic-embed-text")
 
-        response = requests.post(
+        response = _http_session.post(
             f"{base_url}/api/embed",
-            json={"model": model, "input": text},
+            json={"model": model, "input": texts},
             timeout=self.timeout,
         )
         response.raise_for_status()
@@ -143,14 +159,12 @@ class EmbeddingClient:
         if not embeddings:
             raise ValueError("No embeddings returned from Ollama")
 
-        embedding = embeddings[0]
-
-        if len(embedding) != self.dimensions:
-            log.warning(f"Dimension mismatch: got {len(embedding)}, expected {self.dimensions}")
+        if len(embeddings[0]) != self.dimensions:
+            log.warning(f"Dimension mismatch: got {len(embeddings[0])}, expected {self.dimensions}")
 
-        return embedding
+        return embeddings
 
-    def _openrouter_embed(self, text: str) -> list[float]:
+    def _openrouter_embed(self, texts: list[str]) -> list[list[float]]:
         """OpenRouter embedding (cloud fallback)."""
         cfg = self.config.get("embedding", {}).get("openrouter", {})
         api_key = cfg.get("api_key") or os.getenv("OPENROUTER_API_KEY", "")
@@ -159,7 +173,7 @@ class EmbeddingClient:
         if not api_key:
             raise ValueError("OpenRouter API key not configured")
 
-        response = requests.post(
+        response = _http_session.post(
             "https://openrouter.ai/api/v1/embeddings",
             headers={
                 "Authorization": f"Bearer {api_key}",
@@ -167,19 +181,18 @@ class EmbeddingClient:
             },
             json={
                 "model": model,
-                "input": text,
+                "input": texts,
             },
             timeout=self.timeout,
         )
         response.raise_for_status()
 
         result = response.json()
-        embedding = result["data"][0]["embedding"]
 
         # Truncate to configured dimensions if needed
-        return embedding[: self.dimensions]
+        return [item["embedding"][: self.dimensions] for item in _by_index(result["data"])]
 
-    def _openai_embed(self, text: str) -> list[float]:
+    def _openai_embed(self, texts: list[str]) -> list[list[float]]:
         """OpenAI embedding (alternative fallback)."""
         cfg = self.config.get("embedding", {}).get("openai", {})
         api_key = cfg.get("api_key") or os.getenv("OPENAI_API_KEY", "")
@@ -188,7 +201,7 @@ class EmbeddingClient:
         if not api_key:
             raise ValueError("OpenAI API key not configured")
 
-        response = requests.post(
+        response = _http_session.post(
             "https://api.openai.com/v1/embeddings",
             headers={
                 "Authorization": f"Bearer {api_key}",
@@ -196,7 +209,7 @@ class EmbeddingClient:
             },
             json={
                 "model": model,
-                "input": text,
+                "input": texts,
                 "dimensions": self.dimensions,
             },
             timeout=self.timeout,
@@ -204,7 +217,12 @@ class EmbeddingClient:
         response.raise_for_status()
 
         result = response.json()
-        return result["data"][0]["embedding"]
+        return [item["embedding"] for item in _by_index(result["data"])]
+
+
+def _by_index(data: list[dict]) -> list[dict]:
+    """OpenAI-style embedding items in input order (items carry an index)."""
+    return sorted(data, key=lambda item: item.get("index", 0))
 
 
 # Singleton instance
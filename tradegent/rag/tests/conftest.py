@@ -51,7 +51,7 @@ def mock_database():
 @pytest.fixture
 def mock_embedding_client():
     """Mock embedding client for tests."""
-    with patch("rag.embedding_client.requests.post") as mock_post:
+    with patch("rag.embedding_client._http_session.post") as mock_post:
         mock_response = MagicMock()
         mock_response.json.return_value = {"embeddings": [[0.1] * 1536]}
         mock_post.return_value = mock_response
@@ -11,6 +11,7 @@ from rag.embed import (
     _parse_date,
     delete_document,
     embed_document,
+    embed_documents,
     embed_text,
     reembed_all,
 )
@@ -145,6 +146,39 @@ class TestEmbedDocument:
         mock_store.assert_called_once()
 
 
+class TestEmbedDocuments:
+    """Tests for batch embedding over one connection."""
+
+    @patch("rag.embed.embed_document")
+    @patch("psycopg.connect")
+    def test_shares_one_connection(self, mock_connect, mock_embed):
+        mock_embed.side_effect = [MagicMock(doc_id="a"), EmbedError("bad"), MagicMock(doc_id="c")]
+
+        results = list(embed_documents(["a.yaml", "b.yaml", "c.yaml"], force=True))
+
+        mock_connect.assert_called_once()
+        conn = mock_connect.return_value
+        assert all(call.args[2] is conn for call in mock_embed.call_args_list)
+        assert isinstance(results[1][1], EmbedError)
+        assert [f for f, _ in results] == ["a.yaml", "b.yaml", "c.yaml"]
+        conn.close.assert_called_once()
+
+    @patch("rag.embed.embed_document")
+    @patch("psycopg.connect")
+    def test_workers_get_own_connections(self, mock_connect, mock_embed):
+        conns = [MagicMock(), MagicMock()]
+        mock_connect.side_effect = conns
+        mock_embed.side_effect = lambda f, force, conn: MagicMock(doc_id=f)
+
+        results = dict(embed_documents(["a.yaml", "b.yaml", "c.yaml"], workers=2))
+
+        assert sorted(results) == ["a.yaml", "b.yaml", "c.yaml"]
+        assert mock_connect.call_count == 2
+        assert {call.args[2] for call in mock_embed.call_args_list} <= set(conns)
+        for conn in conns:
+            conn.close.assert_called_once()
+
+
 class TestEmbedText:
     """Tests for text embedding."""
 
@@ -39,7 +39,7 @@ class TestEmbeddingClient:
 class TestOllamaEmbedding:
     """Tests for Ollama embedding."""
 
-    @patch("requests.post")
+    @patch("rag.embedding_client._http_session.post")
     def test_ollama_embed_success(self, mock_post):
         mock_response = MagicMock()
         mock_response.json.return_value = {
@@ -65,7 +65,7 @@ class TestOllamaEmbedding:
         call_args = mock_post.call_args
         assert "api/embed" in call_args[0][0]
 
-    @patch("requests.post")
+    @patch("rag.embedding_client._http_session.post")
     def test_ollama_embed_empty_response(self, mock_post):
         mock_response = MagicMock()
         mock_response.json.return_value = {"embeddings": []}
@@ -86,7 +86,7 @@ class TestOllamaEmbedding:
 class TestOpenRouterEmbedding:
     """Tests for OpenRouter embedding fallback."""
 
-    @patch("requests.post")
+    @patch("rag.embedding_client._http_session.post")
     @patch.dict("os.environ", {"OPENROUTER_API_KEY": "test-key"})
     def test_openrouter_embed_success(self, mock_post):
         mock_response = MagicMock()
@@ -114,7 +114,7 @@ class TestOpenRouterEmbedding:
 class TestFallbackChain:
     """Tests for embedding fallback behavior."""
 
-    @patch("requests.post")
+    @patch("rag.embedding_client._http_session.post")
     def test_fallback_on_error(self, mock_post):
         # First call (ollama) fails, second call (openrouter) succeeds
         ollama_response = MagicMock()
@@ -141,7 +141,7 @@ class TestFallbackChain:
         assert len(embedding) == 768
         assert mock_post.call_count == 2
 
-    @patch("requests.post")
+    @patch("rag.embedding_client._http_session.post")
     def test_all_providers_fail(self, mock_post):
         mock_post.side_effect = Exception("All down")
 
@@ -161,10 +161,13 @@ class TestFallbackChain:
 class TestBatchEmbedding:
     """Tests for batch embedding."""
 
-    @patch("requests.post")
+    @patch("rag.embedding_client._http_session.post")
     def test_batch_embedding(self, mock_post):
         mock_response = MagicMock()
-        mock_response.json.return_value = {"embeddings": [[0.1] * 768]}
+        mock_response.json.side_effect = [
+            {"embeddings": [[0.1] * 768, [0.2] * 768]},
+            {"embeddings": [[0.3] * 768]},
+        ]
         mock_post.return_value = mock_response
 
         config = {
@@ -174,10 +177,35 @@ class TestBatchEmbedding:
             }
         }
         client = EmbeddingClient(config=config)
-        embeddings = client.get_embeddings_batch(["text1", "text2", "text3"])
+        embeddings = client.get_embeddings_batch(["text1", "text2", "text3"], batch_size=2)
+
+        assert [e[0] for e in embeddings] == [0.1, 0.2, 0.3]
+        # One request per batch, carrying every text in it
+        assert mock_post.call_count == 2
+        assert mock_post.call_args_list[0][1]["json"]["input"] == ["text1", "text2"]
+
+    @patch("rag.embedding_client._http_session.post")
+    def test_short_batch_falls_back(self, mock_post):
+        """A provider returning fewer vectors than inputs counts as a failure."""
+        short = MagicMock()
+        short.json.return_value = {"embeddings": [[0.1] * 768]}
+        full = MagicMock()
+        full.json.return_value = {
+            "data": [{"index": 1, "embedding": [0.2] * 768}, {"index": 0, "embedding": [0.1] * 768}]
+        }
+        mock_post.side_effect = [short, full]
+
+        config = {
+            "embedding": {
+                "fallback_chain": ["ollama", "openrouter"],
+                "dimensions": 768,
+                "openrouter": {"api_key": "test-key"},
+            }
+        }
+        client = EmbeddingClient(config=config)
+        embeddings = client.get_embeddings_batch(["text1", "text2"])
 
-        assert len(embeddings) == 3
-        assert mock_post.call_count == 3
+        assert [e[0] for e in embeddings] == [0.1, 0.2]
 
 
 class TestSingleton:
@@ -190,7 +218,7 @@ class TestSingleton:
         client2 = get_embedding_client()
         assert client1 is client2
 
-    @patch("requests.post")
+    @patch("rag.embedding_client._http_session.post")
     @patch("rag.embedding_client._client", None)
     def test_convenience_get_embedding(self, mock_post):
         mock_response = MagicMock()
@@ -9,6 +9,7 @@ Usage:
     python scripts/visualize_combined.py TICKER
     python scripts/visualize_combined.py TICKER --output custom.svg
     python scripts/visualize_combined.py --stock stock.yaml --earnings earnings.yaml
+    python scripts/visualize_combined.py --server   # one ticker per stdin line
 """
 
 import sys
@@ -17,7 +18,6 @@ import json
 import math
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
 
 import yaml
 
@@ -28,7 +28,7 @@ def load_analysis(file_path: str) -> dict:
         return yaml.safe_load(f)
 
 
-def find_latest_analysis(ticker: str, analysis_type: str) -> Optional[Path]:
+def find_latest_analysis(ticker: str, analysis_type: str) -> Path | None:
     """Find the latest analysis file for a ticker."""
     base_path = Path(__file__).parent.parent.parent / "tradegent_knowledge" / "knowledge" / "analysis"
     folder = base_path / analysis_type
@@ -714,52 +714,52 @@ def generate_combined_svg(stock_data: dict, earnings_data: dict,
     return '\n'.join(svg_parts)
 
 
-def main():
-    parser = argparse.ArgumentParser(description='Generate combined stock + earnings SVG')
-    parser.add_argument('ticker', nargs='?', help='Ticker symbol (auto-finds latest analyses)')
-    parser.add_argument('--stock', help='Path to stock analysis YAML')
-    parser.add_argument('--earnings', help='Path to earnings analysis YAML')
-    parser.add_argument('--output', '-o', help='Output SVG path')
-    parser.add_argument('--json', action='store_true', help='Output path as JSON')
-    args = parser.parse_args()
+class VisualizationError(Exception):
+    """Raised when the requested analyses cannot be rendered."""
+
 
+def render(
+    ticker: str | None = None,
+    stock: str | None = None,
+    earnings: str | None = None,
+    output: str | None = None,
+) -> dict:
+    """Render the SVG for a ticker (or explicit YAML files) and describe the result."""
     # Find or load analyses
     stock_file = None
     earnings_file = None
     stock_data = None
     earnings_data = None
 
-    if args.stock:
-        stock_file = Path(args.stock)
+    if stock:
+        stock_file = Path(stock)
         stock_data = load_analysis(str(stock_file))
 
-    if args.earnings:
-        earnings_file = Path(args.earnings)
+    if earnings:
+        earnings_file = Path(earnings)
         earnings_data = load_analysis(str(earnings_file))
 
-    if args.ticker and not args.stock:
-        stock_file = find_latest_analysis(args.ticker, 'stock')
+    if ticker and not stock:
+        stock_file = find_latest_analysis(ticker, 'stock')
         if stock_file:
             stock_data = load_analysis(str(stock_file))
         else:
-            print(f"Error: No stock analysis found for {args.ticker}", file=sys.stderr)
-            sys.exit(1)
+            raise VisualizationError(f"No stock analysis found for {ticker}")
 
-    if args.ticker and not args.earnings:
-        earnings_file = find_latest_analysis(args.ticker, 'earnings')
+    if ticker and not earnings:
+        earnings_file = find_latest_analysis(ticker, 'earnings')
         if earnings_file:
             earnings_data = load_analysis(str(earnings_file))
 
     if not stock_data:
-        print("Error: Stock analysis required. Provide --stock or ticker.", file=sys.stderr)
-        sys.exit(1)
+        raise VisualizationError("Stock analysis required. Provide --stock or ticker.")
 
     # Determine output path
-    ticker = stock_data.get('ticker', args.ticker or 'UNKNOWN')
+    ticker = stock_data.get('ticker', ticker or 'UNKNOWN')
     timestamp = datetime.now().strftime('%Y%m%dT%H%M')
 
-    if args.output:
-        output_path = Path(args.output)
+    if output:
+        output_path = Path(output)
     elif earnings_data:
         # Combined output goes to a combined folder
         base = Path(__file__).parent.parent.parent / "tradegent_knowledge" / "knowledge" / "analysis" / "combined"
@@ -785,15 +785,56 @@ def main():
     # Write output
     output_path.write_text(svg_content)
 
+    return {
+        'svg_path': str(output_path),
+        'type': viz_type,
+        'stock_file': str(stock_file) if stock_file else None,
+        'earnings_file': str(earnings_file) if earnings_file else None
+    }
+
+
+def serve():
+    """Render one ticker per stdin line, answering with one JSON line on stdout.
+
+    Used by the orchestrator to keep a single warm interpreter across a
+    watchlist/scanner run instead of spawning this script per ticker.
+    """
+    for line in sys.stdin:
+        ticker = line.strip()
+        if not ticker:
+            continue
+        try:
+            result = render(ticker)
+        except Exception as e:
+            result = {'error': str(e), 'svg_path': None}
+        print(json.dumps(result), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate combined stock + earnings SVG')
+    parser.add_argument('ticker', nargs='?', help='Ticker symbol (auto-finds latest analyses)')
+    parser.add_argument('--stock', help='Path to stock analysis YAML')
+    parser.add_argument('--earnings', help='Path to earnings analysis YAML')
+    parser.add_argument('--output', '-o', help='Output SVG path')
+    parser.add_argument('--json', action='store_true', help='Output path as JSON')
+    parser.add_argument('--server', action='store_true',
+                        help='Read tickers from stdin, write one JSON result per line')
+    args = parser.parse_args()
+
+    if args.server:
+        serve()
+        return
+
+    try:
+        result = render(args.ticker, args.stock, args.earnings, args.output)
+    except VisualizationError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
     if args.json:
-        print(json.dumps({
-            'svg_path': str(output_path),
-            'type': viz_type,
-            'stock_file': str(stock_file) if stock_file else None,
-            'earnings_file': str(earnings_file) if earnings_file else None
-        }))
+        print(json.dumps(result))
     else:
-        print(f"Generated ({viz_type}): {output_path}")
+        print(f"Generated ({result['type']}): {result['svg_path']}")
 
 
 if __name__ == '__main__':
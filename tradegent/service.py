@@ -328,8 +328,7 @@ class NexusService:
         except Exception as e:
             log.error(f"Fatal error in main loop: {e}", exc_info=True)
             self._db.heartbeat("error", current_task=str(e)[:200])
-            self._db.increment_service_counter("errors_total")
-            self._db.increment_service_counter("today_errors")
+            self._db.increment_service_counters(["errors_total", "today_errors"])
         finally:
             self._shutdown()
 
@@ -356,8 +355,7 @@ class NexusService:
                 # Database connection issue - attempt reconnect
                 log.error(f"Database connection error: {e}")
                 consecutive_db_errors += 1
-                self._db.increment_service_counter("errors_total")
-                self._db.increment_service_counter("today_errors")
+                self._db.increment_service_counters(["errors_total", "today_errors"])
 
                 if consecutive_db_errors >= max_consecutive_db_errors:
                     log.critical(f"Too many consecutive DB errors ({consecutive_db_errors}), stopping")
@@ -371,8 +369,7 @@ class NexusService:
                 continue  # Skip normal sleep, retry immediately
             except Exception as e:
                 log.error(f"Tick error: {e}", exc_info=True)
-                self._db.increment_service_counter("errors_total")
-                self._db.increment_service_counter("today_errors")
+                self._db.increment_service_counters(["errors_total", "today_errors"])
 
             tick_ms = int((time.monotonic() - tick_start) * 1000)
             try:
@@ -47,6 +47,30 @@ class TestNexusDBConnection:
 
             mock_conn.close.assert_called_once()
 
+    def test_pooled_connection_reused(self, mock_db_connection):
+        """Test pooled instances hand their connection back for reuse."""
+        import psycopg
+
+        mock_conn, _ = mock_db_connection
+        mock_conn.closed = False
+        mock_conn.info.transaction_status = psycopg.pq.TransactionStatus.INERROR
+
+        with patch("db_layer.psycopg.connect", return_value=mock_conn) as mock_connect, \
+                patch("db_layer._pool", None):
+            import db_layer
+
+            db_layer._pool = db_layer._ConnectionPool(max_idle=1)
+            from db_layer import NexusDB
+
+            with NexusDB(dsn="pool-test", pooled=True):
+                pass
+            mock_conn.rollback.assert_called_once()
+            mock_conn.close.assert_not_called()
+
+            with NexusDB(dsn="pool-test", pooled=True) as db:
+                assert db._conn is mock_conn
+            mock_connect.assert_called_once()
+
     def test_health_check_healthy(self, mock_nexus_db, mock_db_connection):
         """Test health check when database is healthy."""
         _, mock_cursor = mock_db_connection
@@ -193,6 +217,16 @@ class TestScheduleOperations:
 
         assert isinstance(result, list)
 
+    def test_schedule_idempotent_flag(self, mock_nexus_db):
+        """Custom output reuse is opt-in: rows without the column are not idempotent."""
+        row = {
+            "id": 1, "name": "Morning brief", "is_enabled": True, "task_type": "custom",
+            "frequency": "interval", "custom_prompt": "Summarize the tape",
+        }
+
+        assert mock_nexus_db._row_to_schedule(row).idempotent is False
+        assert mock_nexus_db._row_to_schedule({**row, "idempotent": True}).idempotent is True
+
 
 class TestServiceStatus:
     """Test service status operations."""
@@ -237,6 +271,31 @@ class TestServiceStatus:
 
         # Since "invalid_counter" is not in the valid set, execute should not be called
 
+    def test_increment_counters_single_update(self, mock_nexus_db, mock_db_connection):
+        """Test several counters are incremented in one UPDATE and one commit."""
+        mock_conn, mock_cursor = mock_db_connection
+
+        mock_nexus_db.increment_service_counters(["analyses_total", "today_analyses", "bogus"])
+
+        mock_cursor.execute.assert_called_once()
+        sql = mock_cursor.execute.call_args[0][0]
+        assert "analyses_total = analyses_total + %s" in sql
+        assert "today_analyses = today_analyses + %s" in sql
+        assert "bogus" not in sql
+        assert mock_cursor.execute.call_args[0][1] == [1, 1]
+        mock_conn.commit.assert_called_once()
+
+    def test_add_service_counters_applies_deltas(self, mock_nexus_db, mock_db_connection):
+        """Test accumulated deltas are added in one parameterized UPDATE."""
+        _, mock_cursor = mock_db_connection
+
+        mock_nexus_db.add_service_counters({"analyses_total": 3, "today_errors": 0})
+
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "analyses_total = analyses_total + %s" in sql
+        assert "today_errors" not in sql
+        assert params == [3]
+
 
 class TestRunHistory:
     """Test run history operations."""
@@ -258,6 +317,265 @@ class TestRunHistory:
         mock_cursor.execute.assert_called()
 
 
+class TestGraphExtractionLedger:
+    """Test Phase 2 graph extraction content-hash ledger."""
+
+    def test_get_graph_extraction(self, mock_nexus_db, mock_db_connection):
+        """Test ledger lookup by content hash returns the recorded counts."""
+        _, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {"entities": 4, "relations": 2}
+
+        assert mock_nexus_db.get_graph_extraction("a" * 64) == {"entities": 4, "relations": 2}
+
+        mock_cursor.fetchone.return_value = None
+        assert mock_nexus_db.get_graph_extraction("b" * 64) is None
+
+    def test_mark_graph_extracted(self, mock_nexus_db, mock_db_connection):
+        """Test recording an extraction is idempotent and committed."""
+        mock_conn, mock_cursor = mock_db_connection
+
+        mock_nexus_db.mark_graph_extracted("a" * 64, "NVDA_stock_20260301T0930", 4, 2)
+
+        sql = mock_cursor.execute.call_args[0][0]
+        assert "ON CONFLICT (doc_hash) DO NOTHING" in sql
+        mock_conn.commit.assert_called()
+
+    def test_clear_graph_extracted(self, mock_nexus_db, mock_db_connection):
+        """Test clearing the ledger removes every row and reports the count."""
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.rowcount = 3
+
+        assert mock_nexus_db.clear_graph_extracted() == 3
+
+        assert mock_cursor.execute.call_args[0][0] == "DELETE FROM nexus.graph_extracted"
+        mock_conn.commit.assert_called()
+
+
+class TestRagIngestLedger:
+    """Test RAG ingest content-hash ledger."""
+
+    def test_is_content_ingested(self, mock_nexus_db, mock_db_connection):
+        """Test ledger lookup by content hash."""
+        _, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {"?column?": 1}
+
+        assert mock_nexus_db.is_content_ingested("a" * 32) is True
+
+        mock_cursor.fetchone.return_value = None
+        assert mock_nexus_db.is_content_ingested("b" * 32) is False
+
+    def test_mark_content_ingested(self, mock_nexus_db, mock_db_connection):
+        """Test recording an ingest is idempotent and committed."""
+        mock_conn, mock_cursor = mock_db_connection
+
+        mock_nexus_db.mark_content_ingested("a" * 32, "NVDA", "/tmp/NVDA_stock.md")
+
+        sql = mock_cursor.execute.call_args[0][0]
+        assert "ON CONFLICT (content_hash) DO NOTHING" in sql
+        mock_conn.commit.assert_called()
+
+    def test_clear_rag_ingested(self, mock_nexus_db, mock_db_connection):
+        """Test clearing all ledger rows or only those for one document's file."""
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.rowcount = 2
+
+        assert mock_nexus_db.clear_rag_ingested() == 2
+        assert mock_cursor.execute.call_args[0][0] == "DELETE FROM nexus.rag_ingested"
+
+        mock_nexus_db.clear_rag_ingested("NVDA_stock_20260301T0930")
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "SELECT file_path FROM nexus.rag_documents WHERE doc_id = %s" in sql
+        assert params == ["NVDA_stock_20260301T0930"]
+        assert mock_conn.commit.call_count == 2
+
+
+class TestTaskOutcomes:
+    """Test batched task outcome bookkeeping."""
+
+    def test_mark_tasks_completed_batches_outcomes_and_retries(self, mock_nexus_db, mock_db_connection):
+        """Outcomes go through executemany and retries through ANY(), one commit."""
+        mock_conn, mock_cursor = mock_db_connection
+
+        mock_nexus_db.mark_tasks_completed([(1, None), (2, "boom")], [2], delay_minutes=10)
+
+        _, rows = mock_cursor.executemany.call_args[0]
+        assert rows == [["completed", None, 1], ["failed", "boom", 2]]
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "id = ANY(%s)" in sql
+        assert params == [10, [2]]
+        mock_conn.commit.assert_called_once()
+
+
+class TestWatchlistBatch:
+    """Test batched watchlist lookups and inserts."""
+
+    def test_get_active_watchlist_tickers(self, mock_nexus_db, mock_db_connection):
+        """Existing active tickers come back from one ANY() query."""
+        _, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [{"ticker": "NVDA"}]
+
+        found = mock_nexus_db.get_active_watchlist_tickers(["nvda", "AAPL"], watchlist_id=7)
+
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "ticker = ANY(%s)" in sql
+        assert params == [["NVDA", "AAPL"], 7]
+        assert found == {"NVDA"}
+
+    def test_add_watchlist_entries_single_commit(self, mock_nexus_db, mock_db_connection):
+        """Entries are inserted with executemany and committed once."""
+        mock_conn, mock_cursor = mock_db_connection
+
+        count = mock_nexus_db.add_watchlist_entries([{"ticker": "nvda"}, {"ticker": "aapl"}])
+
+        _, rows = mock_cursor.executemany.call_args[0]
+        assert [r["ticker"] for r in rows] == ["NVDA", "AAPL"]
+        assert rows[0]["priority"] == "medium"
+        assert count == 2
+        mock_conn.commit.assert_called_once()
+
+        assert mock_nexus_db.add_watchlist_entries([]) == 0
+
+    def test_bulk_mark_watchlist_expired(self, mock_nexus_db, mock_db_connection):
+        """Expired entries are flipped by one ANY() UPDATE with RETURNING."""
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [{"id": 3, "ticker": "NVDA"}]
+
+        updated = mock_nexus_db.bulk_mark_watchlist_expired([3, 4])
+
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "id = ANY(%s)" in sql
+        assert "RETURNING id, ticker" in sql
+        assert params == [[3, 4]]
+        assert updated == [{"id": 3, "ticker": "NVDA"}]
+        mock_conn.commit.assert_called_once()
+
+        assert mock_nexus_db.bulk_mark_watchlist_expired([]) == []
+
+
+class TestCopyCsv:
+    """Test COPY-based CSV export."""
+
+    def test_copy_csv_streams_chunks(self, mock_nexus_db, mock_db_connection):
+        """The SELECT is wrapped in COPY ... TO STDOUT and every chunk is written out."""
+        import io
+
+        _, mock_cursor = mock_db_connection
+        copy = mock_cursor.copy.return_value.__enter__.return_value
+        copy.__iter__.return_value = iter([b"id,ticker\r\n", b"1,NVDA\r\n"])
+        out = io.BytesIO()
+
+        mock_nexus_db.copy_csv("SELECT id, ticker FROM nexus.trades WHERE status = %s", ["open"], out)
+
+        sql, params = mock_cursor.copy.call_args[0]
+        assert sql.startswith("COPY (SELECT id, ticker FROM nexus.trades")
+        assert "TO STDOUT WITH (FORMAT csv, HEADER true)" in sql
+        assert params == ["open"]
+        assert out.getvalue() == b"id,ticker\r\n1,NVDA\r\n"
+
+
+class TestCloseTrade:
+    """Test closing trades."""
+
+    def test_close_trade_returns_db_pnl(self, mock_nexus_db, mock_db_connection):
+        """P&L comes back from the UPDATE itself; a missing trade returns None."""
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {"ticker": "NVDA", "pnl_pct": 12.5}
+
+        closed = mock_nexus_db.close_trade(4, 135.0, "target")
+
+        sql = mock_cursor.execute.call_args[0][0]
+        assert "RETURNING ticker, pnl_pct" in sql
+        assert closed == {"ticker": "NVDA", "pnl_pct": 12.5}
+        mock_conn.commit.assert_called_once()
+
+        mock_cursor.fetchone.return_value = None
+        assert mock_nexus_db.close_trade(99, 135.0, "target") is None
+
+    def test_confirm_detected_trade_guards_in_where(self, mock_nexus_db, mock_db_connection):
+        """Confirmation is one guarded UPDATE; optional fields fall back via COALESCE."""
+        _, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {"source_type": "detected", "id": 4, "ticker": "NVDA"}
+
+        row = mock_nexus_db.confirm_detected_trade(4, thesis="breakout")
+
+        assert mock_cursor.execute.call_count == 1
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "source_type = 'detected'" in sql
+        assert "SELECT target.source_type, confirmed.id, confirmed.ticker" in sql
+        assert params == [4, "breakout", None, 4]
+        assert row == {"source_type": "detected", "id": 4, "ticker": "NVDA"}
+
+    def test_reject_detected_trade_archives_in_one_statement(self, mock_nexus_db, mock_db_connection):
+        """Rejection deletes and archives through a single CTE statement."""
+        _, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = None
+
+        assert mock_nexus_db.reject_detected_trade(9, reason="noise") is None
+
+        assert mock_cursor.execute.call_count == 1
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "DELETE FROM nexus.trades" in sql
+        assert "INSERT INTO nexus.trades_archive" in sql
+        assert "SELECT target.source_type, archived.id, archived.ticker" in sql
+        assert params == [9, 9, "noise"]
+
+
+class TestQueueTasksBulk:
+    """Test batched task queueing."""
+
+    def test_queue_tasks_bulk_single_commit(self, mock_nexus_db, mock_db_connection):
+        """Tasks go through one executemany with RETURNING and one commit."""
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.side_effect = [{"id": 11}, {"id": 12}]
+        mock_cursor.nextset.side_effect = [True, None]
+
+        task_ids = mock_nexus_db.queue_tasks_bulk([
+            ("report_validation", "nvda", "prior_file: a.yaml", 6),
+            ("report_validation", None, "prior_file: b.yaml", 6),
+        ])
+
+        _, rows = mock_cursor.executemany.call_args[0]
+        assert rows == [
+            ["report_validation", "NVDA", "prior_file: a.yaml", 6],
+            ["report_validation", None, "prior_file: b.yaml", 6],
+        ]
+        assert mock_cursor.executemany.call_args[1] == {"returning": True}
+        assert task_ids == [11, 12]
+        mock_conn.commit.assert_called_once()
+
+        assert mock_nexus_db.queue_tasks_bulk([]) == []
+
+
+class TestTaskQueueOrdering:
+    """Test pending task ordering."""
+
+    def test_get_pending_tasks_ages_priority(self, mock_nexus_db, mock_db_connection):
+        """Pending tasks are ordered by priority plus a capped age bonus."""
+        _, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [{"id": 1, "priority": 5}]
+
+        tasks = mock_nexus_db.get_pending_tasks(limit=3)
+
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "LEAST(EXTRACT(EPOCH FROM (now() - created_at)) / 3600.0, 5)" in sql
+        assert params == [3]
+        assert tasks == [{"id": 1, "priority": 5}]
+
+    def test_get_pending_or_retryable_tasks_ages_priority(self, mock_nexus_db, mock_db_connection):
+        """The queue processor's fetch uses the same aged ordering, so low priority cannot starve."""
+        _, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = []
+
+        mock_nexus_db.get_pending_or_retryable_tasks(limit=4)
+
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "status = 'failed'" in sql
+        assert "LEAST(EXTRACT(EPOCH FROM (now() - created_at)) / 3600.0, 5) DESC" in sql
+        assert "ORDER BY priority DESC" not in sql
+        assert sql.rstrip().endswith("LIMIT %s")
+        assert params == [4]
+
+
 class TestKBStockUpsert:
     """Test KB stock-analysis upsert field normalization."""
 
@@ -317,6 +635,26 @@ class TestKBStockUpsert:
         mock_cursor.execute.assert_called()
 
 
+class TestKBScannerRunUpsert:
+    """Test KB scanner-run top-candidate derivation."""
+
+    def test_top_candidate_is_first_highest_score(self, mock_nexus_db, mock_db_connection):
+        _, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {"id": 9}
+        candidates = [
+            {"ticker": "AMD", "score": 6.0},
+            {"ticker": "NVDA", "score": 8.2},
+            {"ticker": "AVGO", "score": 8.2},
+        ]
+
+        run_id = mock_nexus_db.upsert_kb_scanner_run({"scanner_name": "momentum", "candidates": candidates})
+
+        params = mock_cursor.execute.call_args[0][1]
+        assert params[17:20] == ["NVDA", 8.2, "analyze"]
+        assert [c["ticker"] for c in candidates] == ["AMD", "NVDA", "AVGO"]
+        assert run_id == 9
+
+
 class TestKBEarningsUpsert:
     """Test KB earnings-analysis upsert field normalization."""
 
@@ -172,6 +172,36 @@ class TestExpirationMonitor:
         assert len(db.queued_tasks) == 1
         assert db.queued_tasks[0]["task_type"] == "expiration_review"
 
+    def test_process_expirations_batch_prices(self):
+        """Verify the batch price function is called once per distinct underlying."""
+        db = MockDB()
+        mock_cursor = MagicMock()
+        mock_cursor.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_cursor.__exit__ = MagicMock(return_value=False)
+        mock_cursor.fetchall.return_value = [
+            {
+                "id": i,
+                "ticker": "NVDA",
+                "full_symbol": f"NVDA  240315C00{strike}000",
+                "option_underlying": "NVDA",
+                "option_strike": float(strike),
+                "option_type": "call",
+                "entry_price": 5.0,
+            }
+            for i, strike in ((3, 500), (4, 600))
+        ]
+        db._conn.cursor.return_value = mock_cursor
+
+        monitor = ExpirationMonitor(db)
+        get_prices = MagicMock(return_value={"NVDA": 550.0})
+
+        result = monitor.process_expirations(get_stock_prices_fn=get_prices)
+
+        get_prices.assert_called_once_with(["NVDA"])
+        assert result["needs_review"] == 1
+        assert result["expired_worthless"] == 1
+        assert 4 in db.closed_trades
+
     def test_process_expirations_fallback_high_premium(self):
         """Verify high premium options are flagged for review without price function."""
         db = MockDB()
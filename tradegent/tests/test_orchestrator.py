@@ -59,6 +59,21 @@ class TestSettings:
             assert settings.dry_run_mode is True
             assert settings.max_daily_analyses == 25
 
+    def test_skill_flags_coerce_strings(self, mock_nexus_db):
+        """Test skill flags accept DB string values and fall back to defaults."""
+        mock_nexus_db.get_all_settings = MagicMock(
+            return_value={"skill_use_claude_code": "True", "invalidation_alerts_enabled": "false"}
+        )
+
+        with patch("orchestrator.NexusDB", return_value=mock_nexus_db):
+            from orchestrator import Settings
+
+            settings = Settings(mock_nexus_db)
+
+            assert settings.skill_use_claude_code is True
+            assert settings.invalidation_alerts_enabled is False
+            assert settings.detected_position_auto_create_trade is True
+
 
 class TestAgentEngineValidation:
     """Test AGENT_ENGINE validation behavior."""
@@ -128,6 +143,155 @@ Analysis complete.
         assert result.get("gate_passed") is False
 
 
+    def test_extract_json_slice_last_block(self):
+        """Test fenced JSON slice extraction from raw bytes."""
+        from orchestrator import _extract_json_slice
+
+        data = b'# A\n```json\n{"a": 1}\n```\ntext\n```json\n{"gate_passed":false}\n```\n'
+        assert _extract_json_slice(data) == b'{"gate_passed":false}\n'
+        assert _extract_json_slice(b"no json here") is None
+        assert _extract_json_slice(b'```json\n{"open": true') is None
+
+    def test_json_loads_accepts_bytes_and_nan(self):
+        """Test the fast JSON loader keeps stdlib-compatible results."""
+        import math
+
+        from orchestrator import _json_loads, parse_json_block
+
+        assert _json_loads(b'{"gate_passed": false}') == {"gate_passed": False}
+        assert math.isnan(_json_loads('{"ev": NaN}')["ev"])
+        assert parse_json_block('```json\n{"ticker": "NVDA", "ev": NaN}\n```')["ticker"] == "NVDA"
+
+    def test_extract_ids_and_review_path(self):
+        """Test precompiled prompt/output extractors."""
+        from orchestrator import _extract_review_path, _extract_trade_id_from_prompt
+
+        assert _extract_trade_id_from_prompt("Review Trade_ID: 42 for NVDA") == 42
+        assert _extract_trade_id_from_prompt("no id here") is None
+        out = "Done. Saved to: /x/tradegent_knowledge/knowledge/reviews/NVDA.yaml"
+        assert _extract_review_path(out) == "tradegent_knowledge/knowledge/reviews/NVDA.yaml"
+        assert _extract_review_path("Review saved /tmp/r.yaml") == "/tmp/r.yaml"
+        assert _extract_review_path("nothing") is None
+
+    def test_as_analysis_type(self):
+        """Test dict-backed AnalysisType lookup keeps the Enum's ValueError."""
+        from orchestrator import AnalysisType, _as_analysis_type
+
+        assert _as_analysis_type("earnings") is AnalysisType.EARNINGS
+        with pytest.raises(ValueError):
+            _as_analysis_type("bogus")
+
+    def test_prompt_kv_lines(self):
+        """Test task-prompt key/value lines are parsed in one pass."""
+        from orchestrator import _PROMPT_KV_RE
+
+        prompt = "Validate NVDA\nprior_file: /a.yaml\nnew_file:\ntrigger: forecast_expiry\r\n  trigger: x"
+        kv = {m.group(1): m.group(2).strip() for m in _PROMPT_KV_RE.finditer(prompt)}
+        assert kv == {"prior_file": "/a.yaml", "trigger": "forecast_expiry"}
+
+    def test_ts_minute_formats_once_per_minute(self):
+        """Test the minute stamp is cached until the minute changes."""
+        import orchestrator
+
+        with patch("orchestrator.time.time", return_value=1_767_225_600.0):
+            first = orchestrator._ts_minute()
+            with patch("orchestrator.datetime") as mock_dt:
+                assert orchestrator._ts_minute() == first
+                mock_dt.fromtimestamp.assert_not_called()
+        with patch("orchestrator.time.time", return_value=1_767_225_660.0):
+            assert orchestrator._ts_minute() != first
+        assert len(first) == len("20260101T0000")
+
+
+class TestRunExecutionGate:
+    """Test Stage 2 gate short-circuit."""
+
+    def test_gate_failed_from_json_block_skips_execution(self, tmp_path):
+        """Compact JSON (no space after colon) still short-circuits."""
+        from orchestrator import run_execution
+
+        path = tmp_path / "NVDA_stock_20260301T0930.md"
+        path.write_text('# NVDA\n```json\n{"ticker": "NVDA", "gate_passed":false}\n```\n')
+        db = MagicMock()
+
+        with patch("orchestrator.call_claude_code") as mock_call:
+            result = run_execution(db, path)
+
+        assert result.order_placed is False
+        assert result.reason == "Do Nothing gate failed"
+        mock_call.assert_not_called()
+        db.get_stock.assert_not_called()
+
+    def test_gate_fail_marker_skips_execution(self, tmp_path):
+        """Markdown gate marker short-circuits without a JSON block."""
+        from orchestrator import run_execution
+
+        path = tmp_path / "NVDA_stock_20260301T0930.md"
+        path.write_text("# NVDA\nGATE: ❌ FAIL\n", encoding="utf-8")
+
+        with patch("orchestrator.call_claude_code") as mock_call:
+            result = run_execution(MagicMock(), path)
+
+        assert result.reason == "Do Nothing gate failed"
+        mock_call.assert_not_called()
+
+    def test_gate_failed_in_tail_skips_full_read(self, tmp_path):
+        """A failed gate in the trailing JSON block is decided from the tail alone."""
+        from orchestrator import run_execution
+
+        path = tmp_path / "NVDA_stock_20260301T0930.md"
+        body = "# NVDA\n" + "x" * 100_000 + '\n```json\n{"gate_passed": false}\n```\n'
+        path.write_text(body)
+
+        with patch.object(type(path), "read_bytes", side_effect=AssertionError("full read")):
+            result = run_execution(MagicMock(), path)
+
+        assert result.reason == "Do Nothing gate failed"
+
+    def test_gate_fail_marker_outside_tail_skips_execution(self, tmp_path):
+        """Markers beyond the tail window still short-circuit via the full read."""
+        from orchestrator import run_execution
+
+        path = tmp_path / "NVDA_stock_20260301T0930.md"
+        path.write_text("# NVDA\nGATE: ❌ FAIL\n" + "x" * 100_000 + "\n", encoding="utf-8")
+
+        with patch("orchestrator.call_claude_code") as mock_call:
+            result = run_execution(MagicMock(), path)
+
+        assert result.reason == "Do Nothing gate failed"
+        mock_call.assert_not_called()
+
+
+class TestPipelineContext:
+    """Test per-pipeline stock lookup sharing."""
+
+    def test_pipeline_reads_stock_once(self, tmp_path):
+        """Analysis, watchlist check and execution share one get_stock call."""
+        from orchestrator import AnalysisResult, AnalysisType, run_pipeline
+
+        path = tmp_path / "NVDA_stock_20260301T0930.md"
+        path.write_text('```json\n{"gate_passed": true}\n```\n')
+        db = MagicMock()
+        db.get_stock.return_value = MagicMock(state="paper")
+
+        def fake_analysis(db, ticker, analysis_type, schedule_id, prefetched=None, ctx=None):
+            assert ctx.stock is db.get_stock.return_value
+            return AnalysisResult(
+                ticker=ticker, type=analysis_type, filepath=path, gate_passed=True,
+                recommendation="BUY", confidence=70, expected_value=8.0, raw_output="",
+            )
+
+        with patch("orchestrator.run_analysis", side_effect=fake_analysis), \
+                patch("orchestrator.cfg") as mock_cfg, \
+                patch("orchestrator.call_claude_code", return_value="") as mock_call:
+            mock_cfg.auto_execute_enabled = True
+            run_pipeline(db, "NVDA", AnalysisType.STOCK)
+
+        mock_call.assert_called_once()  # reached execution
+        db.get_stock.assert_called_once_with("NVDA")
+        db.upsert_stock.assert_not_called()
+
+
 class TestAnalysisResult:
     """Test AnalysisResult data class."""
 
@@ -440,6 +604,801 @@ class TestScannerRuntimeSelection:
         mock_adk_scan.assert_called_once()
         mock_cli.assert_not_called()
 
+    def test_run_scanners_auto_analyze_uses_pipeline_parallelism(self, mock_nexus_db, tmp_path):
+        """Scanner auto-analyze batches pass scanner_pipeline_parallelism as worker count."""
+        scanner = MagicMock(
+            scanner_code="HOT_BY_VOLUME",
+            display_name="Hot by Volume",
+            auto_add_to_watchlist=False,
+            auto_analyze=True,
+            analysis_type="stock",
+            max_candidates=5,
+        )
+        mock_nexus_db.get_enabled_scanners = MagicMock(return_value=[scanner])
+        mock_nexus_db.start_scanner_run = MagicMock(return_value=12)
+        mock_nexus_db.complete_scanner_run = MagicMock()
+
+        from orchestrator import ParallelBatchResult, run_scanners
+
+        output = '```json\n{"scanner": "HOT_BY_VOLUME", "candidates": [{"ticker": "NVDA"}, {"ticker": "AMD"}]}\n```'
+        with patch("orchestrator.cfg") as mock_cfg:
+            mock_cfg.scanners_enabled = True
+            mock_cfg.analyses_dir = tmp_path
+            mock_cfg.scanner_pipeline_parallelism = 4
+            with patch("orchestrator.validate_agent_engine", return_value="adk"), \
+                    patch("orchestrator._run_adk_scan_generation", return_value=output), \
+                    patch("orchestrator.run_analyses_parallel",
+                          return_value=ParallelBatchResult(total=2, succeeded=2)) as mock_parallel:
+                run_scanners(mock_nexus_db)
+
+        tasks = mock_parallel.call_args[0][0]
+        assert [t[0] for t in tasks] == ["NVDA", "AMD"]
+        assert mock_parallel.call_args.kwargs["max_workers"] == 4
+
+
+class TestWatchlistPriority:
+    """Test watchlist slot allocation order."""
+
+    def test_upcoming_earnings_outrank_higher_base_priority(self):
+        """Earnings-window stocks get remaining slots ahead of higher base priority."""
+        from datetime import date, timedelta
+
+        from orchestrator import ParallelBatchResult, run_watchlist
+
+        def stock(ticker, priority, earnings_in=None):
+            return MagicMock(
+                ticker=ticker,
+                priority=priority,
+                default_analysis_type="stock",
+                days_to_earnings=earnings_in,
+                next_earnings_date=date.today() + timedelta(days=earnings_in) if earnings_in is not None else None,
+            )
+
+        db = MagicMock()
+        db.get_today_run_count.return_value = 8
+        db.get_enabled_stocks.return_value = [
+            stock("AAPL", 8),
+            stock("MSFT", 7),
+            stock("NVDA", 6, earnings_in=3),
+            stock("AMD", 6, earnings_in=-2),
+        ]
+
+        with patch("orchestrator.cfg") as mock_cfg, \
+                patch("orchestrator.run_analyses_parallel",
+                      return_value=ParallelBatchResult(total=2)) as mock_parallel:
+            mock_cfg.max_daily_analyses = 10
+            mock_cfg.watchlist_parallelism = 0
+            run_watchlist(db)
+
+        tasks = mock_parallel.call_args[0][0]
+        assert [t[0] for t in tasks] == ["NVDA", "AAPL"]
+        assert tasks[0][1].value == "earnings"
+
+    def test_batch_by_analysis_type_groups_tasks(self):
+        """Opt-in grouping keeps types contiguous and slot order within a type."""
+        from orchestrator import AnalysisType, _group_by_analysis_type
+
+        e, st = AnalysisType.EARNINGS, AnalysisType.STOCK
+        tasks = [("NVDA", e, False), ("AAPL", st, False), ("AMD", e, False), ("MSFT", st, False)]
+
+        assert [t[0] for t in _group_by_analysis_type(tasks)] == ["NVDA", "AMD", "AAPL", "MSFT"]
+
+    def test_no_slots_skips_stock_lookup(self):
+        """With the daily limit reached the watchlist is not loaded at all."""
+        from orchestrator import run_watchlist
+
+        db = MagicMock()
+        db.get_today_run_count.return_value = 10
+
+        with patch("orchestrator.cfg") as mock_cfg, \
+                patch("orchestrator.run_analyses_parallel") as mock_parallel:
+            mock_cfg.max_daily_analyses = 10
+            run_watchlist(db)
+
+        db.get_enabled_stocks.assert_not_called()
+        mock_parallel.assert_not_called()
+
+
+class TestScannerRouting:
+    """Test score-based routing of scanner results."""
+
+    def test_high_scores_queue_best_first_and_overflow_to_watchlist(self):
+        """Queue slots go to the best scores; cooldown skips don't use a slot."""
+        from orchestrator import ScanResult, _route_scanner_results
+
+        results = [
+            ScanResult("LOW", 3.0, "momentum"),
+            ScanResult("MID", 6.0, "momentum"),
+            ScanResult("B", 8.0, "momentum"),
+            ScanResult("A", 9.5, "momentum"),
+            ScanResult("COOL", 9.0, "momentum"),
+            ScanResult("C", 7.6, "momentum"),
+        ]
+        db = MagicMock()
+        db.queue_analysis.side_effect = lambda t, *a, **k: None if t == "COOL" else 1
+        db.get_or_create_watchlist.return_value = {"id": 1, "name": "momentum"}
+        db.get_active_watchlist_tickers.return_value = set()
+
+        with patch("orchestrator.cfg") as mock_cfg:
+            mock_cfg.scanner_auto_route = True
+            mock_cfg.max_concurrent_runs = 2
+            stats = _route_scanner_results(db, "momentum", results)
+
+        queued = [c.args[0] for c in db.queue_analysis.call_args_list]
+        assert queued == ["A", "COOL", "B"]
+        db.get_or_create_watchlist.assert_called_once()
+        (entries,) = db.add_watchlist_entries.call_args.args
+        assert {e["ticker"] for e in entries} == {"C", "MID"}
+        assert stats == {"analyzed": 2, "watchlisted": 2, "skipped": 2}
+
+    def test_scan_result_is_slotted_and_hashable(self):
+        """ScanResult carries no per-instance __dict__ and can be deduplicated."""
+        from orchestrator import ScanResult
+
+        r = ScanResult("NVDA", 8.0, "momentum")
+        assert not hasattr(r, "__dict__")
+        assert len({r, ScanResult("NVDA", 8.0, "momentum")}) == 1
+
+    def test_partition_scan_results_single_pass(self):
+        """Tiers split at 7.5 and 5.5; the high tier pops best first."""
+        import heapq
+
+        from orchestrator import ScanResult, _partition_scan_results
+
+        results = [ScanResult(t, sc, "m") for t, sc in [("A", 7.5), ("B", 5.5), ("C", 5.4), ("D", 9.0)]]
+        high, medium, skipped = _partition_scan_results(results)
+
+        assert [heapq.heappop(high)[2].ticker for _ in range(2)] == ["D", "A"]
+        assert [r.ticker for r in medium] == ["B"]
+        assert skipped == 1
+
+    def test_medium_tier_skips_existing_and_duplicate_tickers(self):
+        """Existing entries and repeats within one scan are not inserted again."""
+        from orchestrator import ScanResult, _route_scanner_results
+
+        results = [
+            ScanResult("OLD", 6.0, "momentum"),
+            ScanResult("NEW", 6.5, "momentum"),
+            ScanResult("new", 7.0, "momentum"),
+        ]
+        db = MagicMock()
+        db.get_or_create_watchlist.return_value = {"id": 1, "name": "momentum"}
+        db.get_active_watchlist_tickers.return_value = {"OLD"}
+
+        with patch("orchestrator.cfg") as mock_cfg:
+            mock_cfg.scanner_auto_route = True
+            mock_cfg.max_concurrent_runs = 2
+            stats = _route_scanner_results(db, "momentum", results)
+
+        db.get_active_watchlist_tickers.assert_called_once_with(["OLD", "NEW", "new"], watchlist_id=1)
+        (entries,) = db.add_watchlist_entries.call_args.args
+        assert [e["ticker"] for e in entries] == ["NEW"]
+        assert stats["watchlisted"] == 1
+
+
+class TestTaskQueue:
+    """Test task queue dispatch."""
+
+    def test_dispatches_by_task_type(self):
+        """Known types go to their handler; unknown types fail and are retried."""
+        import orchestrator
+
+        db = MagicMock()
+        db.recover_stuck_tasks.return_value = 0
+        db.get_service_status.return_value = {"today_analyses": 0}
+        db.get_pending_or_retryable_tasks.return_value = [
+            {"id": 1, "task_type": "analysis", "ticker": "NVDA"},
+            {"id": 2, "task_type": "fill_analysis", "ticker": "AAPL"},
+            {"id": 3, "task_type": "bogus", "ticker": None},
+        ]
+        analysis, fill = MagicMock(), MagicMock()
+
+        with patch("orchestrator.cfg") as mock_cfg, \
+                patch.object(orchestrator, "_service_counters"), \
+                patch.dict(orchestrator._TASK_HANDLERS, {"analysis": analysis, "fill_analysis": fill}):
+            mock_cfg.task_queue_enabled = True
+            mock_cfg._get.side_effect = lambda key, env, default: default
+            results = orchestrator.process_task_queue(db)
+
+        analysis.assert_called_once_with(db, db.get_pending_or_retryable_tasks.return_value[0])
+        fill.assert_called_once()
+        db.mark_tasks_completed.assert_called_once_with(
+            [(1, None), (2, None), (3, "Unknown task type: bogus")], [3], 15
+        )
+        assert (results["succeeded"], results["failed"]) == (2, 1)
+
+    def test_defers_analysis_beyond_daily_budget(self):
+        """Only the remaining daily budget of analysis tasks runs; others always do."""
+        import orchestrator
+
+        db = MagicMock()
+        db.recover_stuck_tasks.return_value = 0
+        db.get_service_status.return_value = {"today_analyses": 19}
+        db.get_pending_or_retryable_tasks.return_value = [
+            {"id": 1, "task_type": "analysis", "ticker": "NVDA"},
+            {"id": 2, "task_type": "analysis", "ticker": "AMD"},
+            {"id": 3, "task_type": "fill_analysis", "ticker": "AAPL"},
+            {"id": 4, "task_type": "analysis", "ticker": "MSFT"},
+        ]
+        analysis, fill = MagicMock(), MagicMock()
+
+        with patch("orchestrator.cfg") as mock_cfg, \
+                patch.object(orchestrator, "_service_counters"), \
+                patch.dict(orchestrator._TASK_HANDLERS, {"analysis": analysis, "fill_analysis": fill}):
+            mock_cfg.task_queue_enabled = True
+            mock_cfg._get.side_effect = lambda key, env, default: default
+            results = orchestrator.process_task_queue(db)
+
+        assert [c.args[1]["id"] for c in analysis.call_args_list] == [1]
+        fill.assert_called_once()
+        assert (results["processed"], results["skipped"]) == (2, 2)
+        assert [c.args[0] for c in db.mark_task_started.call_args_list] == [1, 3]
+
+
+class TestCustomOutputCache:
+    """Test per-day memoization of custom schedule prompts."""
+
+    def test_reuses_non_empty_output_same_day(self):
+        """Identical prompts hit the cache; empty output is retried."""
+        import orchestrator
+
+        day = datetime(2026, 3, 2, 9, 30)
+        with patch.dict(orchestrator._custom_output_cache, clear=True), \
+                patch.object(orchestrator, "now_tradegent", return_value=day), \
+                patch.object(orchestrator, "call_claude_code", side_effect=["", "report", "other"]) as call:
+            assert orchestrator._call_claude_cached("p", "tools", "CUSTOM-1") == ""
+            assert orchestrator._call_claude_cached("p", "tools", "CUSTOM-1") == "report"
+            assert orchestrator._call_claude_cached("p", "tools", "CUSTOM-1") == "report"
+            assert orchestrator._call_claude_cached("p", "tools", "CUSTOM-2") == "other"
+            assert ("p", "tools", "CUSTOM-1", day.date()) in orchestrator._custom_output_cache
+
+        assert call.call_count == 3
+
+    def test_next_day_calls_again(self):
+        """The day key comes from now_tradegent(), so a new day misses."""
+        import orchestrator
+
+        days = [datetime(2026, 3, 2, 23, 59), datetime(2026, 3, 3, 0, 1)]
+        with patch.dict(orchestrator._custom_output_cache, clear=True), \
+                patch.object(orchestrator, "now_tradegent", side_effect=days), \
+                patch.object(orchestrator, "call_claude_code", side_effect=["mon", "tue"]) as call:
+            assert orchestrator._call_claude_cached("p", "tools", "CUSTOM-1") == "mon"
+            assert orchestrator._call_claude_cached("p", "tools", "CUSTOM-1") == "tue"
+
+        assert call.call_count == 2
+
+
+class TestSkillDispatch:
+    """Test the Claude/Python skill spec table."""
+
+    def _run(self, skill, use_claude, python_result=None, claude_error=None, gate=True):
+        import orchestrator
+
+        py = MagicMock(return_value=python_result or {})
+        claude = MagicMock(return_value={"output": "x"}, side_effect=claude_error)
+        with patch("orchestrator.cfg") as mock_cfg, \
+                patch("skill_handlers.invoke_skill_python", py), \
+                patch("skill_handlers.invoke_skill_claude", claude):
+            mock_cfg.skill_use_claude_code = use_claude
+            mock_cfg.detected_position_auto_create_trade = gate
+            context = {"ticker": "NVDA"}
+            _, path = orchestrator._run_skill(MagicMock(), skill, context, 1)
+        return path, py, claude, context
+
+    def test_either_mode(self):
+        """Claude when enabled, else Python unless its gate is off."""
+        assert self._run("options-management", True)[0] == "claude"
+        path, py, claude, _ = self._run("options-management", False)
+        assert path == "python" and claude.call_count == 0
+        path, py, _, _ = self._run("detected-position", False, gate=False)
+        assert path == "skipped" and py.call_count == 0
+
+    def test_enhance_mode(self):
+        """Python always runs; Claude gets its fields only on an eligible result."""
+        path, py, claude, context = self._run(
+            "expiration-review", True, {"status": "reviewed", "outcome": "expired", "pnl": 5}
+        )
+        assert path == "claude" and py.call_count == 1
+        assert context["outcome"] == "expired" and context["pnl"] == 5
+
+        path, _, claude, _ = self._run("expiration-review", True, {"status": "error"})
+        assert path == "python" and claude.call_count == 0
+
+        path, *_ = self._run(
+            "fill-analysis", True, {"status": "analyzed"}, claude_error=ValueError("limit")
+        )
+        assert path == "enhance_failed"
+
+    def test_claude_mode_skipped_when_disabled(self):
+        """Claude-only skills do nothing when Claude is disabled."""
+        path, py, claude, _ = self._run("report-validation", False)
+        assert path == "skipped" and py.call_count == claude.call_count == 0
+
+
+class TestPendingReviews:
+    """Test chaining of trades pending review."""
+
+    def test_chains_in_parallel_on_worker_connections(self):
+        """Each worker thread uses its own connection, closed afterwards."""
+        import orchestrator
+
+        db = MagicMock()
+        db.get_trades_pending_review.return_value = [{"id": i} for i in range(5)]
+        chained = []
+
+        def chain(worker_db, trade_id):
+            chained.append(trade_id)
+            return trade_id != 3
+
+        with patch("orchestrator.cfg") as mock_cfg, \
+                patch("orchestrator.NexusDB") as mock_nexus, \
+                patch.object(orchestrator, "_chain_to_post_trade_review", side_effect=chain):
+            mock_cfg.max_concurrent_runs = 2
+            count = orchestrator.process_pending_reviews(db)
+
+        assert count == 4
+        assert sorted(chained) == [0, 1, 2, 3, 4]
+        worker_db = mock_nexus.return_value.connect.return_value
+        assert worker_db.close.call_count == mock_nexus.call_count <= 2
+
+
+class TestDetectedTradeCommands:
+    """Test trade confirm/reject messages."""
+
+    def test_missing_and_non_detected_trades_are_reported_separately(self, capsys):
+        from types import SimpleNamespace
+
+        from orchestrator import _handle_trade_command
+
+        db = MagicMock()
+        confirm = SimpleNamespace(trade_cmd="confirm", thesis=None, price=None)
+        reject = SimpleNamespace(trade_cmd="reject", reason=None)
+
+        db.confirm_detected_trade.return_value = None
+        _handle_trade_command(SimpleNamespace(**vars(confirm), trade_id=1), db)
+        not_detected = {"id": None, "ticker": None}
+        db.confirm_detected_trade.return_value = {"source_type": "manual", **not_detected}
+        _handle_trade_command(SimpleNamespace(**vars(confirm), trade_id=2), db)
+        db.reject_detected_trade.return_value = {"source_type": "confirmed", **not_detected}
+        _handle_trade_command(SimpleNamespace(**vars(reject), trade_id=3), db)
+        db.reject_detected_trade.return_value = dict(source_type="detected", id=4, ticker="NVDA")
+        _handle_trade_command(SimpleNamespace(**vars(reject), trade_id=4), db)
+
+        assert capsys.readouterr().out.splitlines() == [
+            "Trade 1 not found",
+            "Trade 2 is not a detected trade (source: manual)",
+            "Trade 3 is not a detected trade (source: confirmed)",
+            "Rejected and archived trade 4: NVDA",
+        ]
+        db.complete_task_by_type.assert_called_once_with("review_detected_position", "NVDA")
+
+
+class TestHealthCheck:
+    """Test the service health report."""
+
+    def test_probes_print_in_fixed_order(self, capsys):
+        """Concurrent probes still print in the declared order."""
+        import time
+
+        import orchestrator
+
+        def slow():
+            time.sleep(0.05)
+            return ["pgvector"]
+
+        with patch.object(orchestrator, "_health_pgvector", slow), \
+                patch.object(orchestrator, "_health_neo4j", lambda: ["neo4j"]), \
+                patch.object(orchestrator, "_health_ollama", lambda: ["ollama", "models"]), \
+                patch.object(orchestrator, "_health_ib_gateway", lambda: ["ib"]):
+            orchestrator._check_all_health()
+
+        out = capsys.readouterr().out
+        assert out.index("pgvector") < out.index("neo4j") < out.index("models") < out.index("ib")
+
+    def test_corrupt_pending_log_is_reported(self, capsys, tmp_path, monkeypatch):
+        """A truncated pending-commit record is reported instead of crashing health."""
+        import orchestrator
+
+        (tmp_path / "logs").mkdir()
+        (tmp_path / "logs" / "pending_commits.jsonl").write_text('{"doc": "a"}\n{"doc": "b"')
+        monkeypatch.chdir(tmp_path)
+
+        with patch.object(orchestrator, "_health_pgvector", lambda: []), \
+                patch.object(orchestrator, "_health_neo4j", lambda: []), \
+                patch.object(orchestrator, "_health_ollama", lambda: []), \
+                patch.object(orchestrator, "_health_ib_gateway", lambda: []):
+            orchestrator._check_all_health()
+
+        assert "pending_commits.jsonl is corrupt" in capsys.readouterr().out
+
+    def test_ib_probe_has_event_loop_off_main_thread(self):
+        """The IB probe gets its own event loop when run in a health-probe worker."""
+        import asyncio
+        import sys
+        import types
+        from concurrent.futures import ThreadPoolExecutor
+
+        import orchestrator
+
+        class FakeIB:
+            def connect(self, *args, **kwargs):
+                asyncio.get_event_loop()  # what ib_insync does; raises without a loop
+
+            def disconnect(self):
+                pass
+
+        fake = types.ModuleType("ib_insync")
+        fake.IB = FakeIB
+        with patch.dict(sys.modules, {"ib_insync": fake}), ThreadPoolExecutor(1) as ex:
+            lines = ex.submit(orchestrator._health_ib_gateway).result()
+
+        assert lines == ["✅ IB Gateway: Connected"]
+
+
+class TestRetryPendingCommits:
+    """Test the graph pending-commit retry queue."""
+
+    def test_appends_outcomes_without_rewriting(self, tmp_path, monkeypatch, capsys):
+        """Only `limit` items are retried; outcomes are appended to the log."""
+        import json
+
+        from orchestrator import _load_pending_commits, _retry_pending_commits
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "logs").mkdir()
+        doc = tmp_path / "doc.yaml"
+        doc.write_text("x")
+        original = (
+            json.dumps({"doc": "A", "file_path": str(doc)}) + "\n"
+            + json.dumps({"doc": "B", "file_path": str(doc), "retry_count": 1}) + "\n\n"
+            + '{"doc": "C",   "file_path": "/nope"}\n'
+        )
+        pending = tmp_path / "logs" / "pending_commits.jsonl"
+        pending.write_text(original)
+        outcomes = [MagicMock(committed=True), MagicMock(committed=False, error_message="down")]
+
+        with patch("graph.extract.extract_document", side_effect=outcomes) as extract, \
+                patch("orchestrator._get_graph") as get_graph:
+            _retry_pending_commits(limit=2)
+
+        assert all(c.kwargs["graph"] is get_graph.return_value for c in extract.call_args_list)
+
+        assert pending.read_text().startswith(original)
+        live, records = _load_pending_commits(pending)
+        assert records == 5
+        assert list(live) == ["B", "C"]
+        assert live["B"]["retry_count"] == 2 and live["B"]["reason"] == "down"
+        assert "1 succeeded, 2 remaining" in capsys.readouterr().out
+
+    def test_compacts_past_threshold(self, tmp_path, monkeypatch):
+        """A log dominated by settled records is rewritten to its live items."""
+        import json
+
+        import orchestrator
+        from orchestrator import _retry_pending_commits
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(orchestrator, "_PENDING_COMPACT_MIN", 2)
+        (tmp_path / "logs").mkdir()
+        pending = tmp_path / "logs" / "pending_commits.jsonl"
+        pending.write_text(
+            json.dumps({"doc": "A", "file_path": "/gone"}) + "\n"
+            + json.dumps({"doc": "A", "op": "retry", "retry_count": 3}) + "\n"
+            + json.dumps({"doc": "B", "file_path": "/gone"}) + "\n"
+        )
+
+        with patch("graph.extract.extract_document") as extract, patch("orchestrator._get_graph"):
+            _retry_pending_commits(limit=1)
+
+        extract.assert_not_called()
+        assert [json.loads(line)["doc"] for line in pending.read_text().splitlines()] == ["B"]
+        assert not list((tmp_path / "logs").glob("*.tmp"))
+
+
+    def test_graph_down_leaves_queue_untouched(self, tmp_path, monkeypatch, capsys):
+        """No extraction is attempted while Neo4j is unreachable."""
+        from graph.exceptions import GraphUnavailableError
+        from orchestrator import _retry_pending_commits
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "logs").mkdir()
+        pending = tmp_path / "logs" / "pending_commits.jsonl"
+        pending.write_text('{"doc": "A", "file_path": "/x"}\n')
+
+        with patch("graph.extract.extract_document") as extract, \
+                patch("orchestrator._get_graph", side_effect=GraphUnavailableError("down")):
+            _retry_pending_commits()
+
+        extract.assert_not_called()
+        assert pending.read_text() == '{"doc": "A", "file_path": "/x"}\n'
+        assert "1 pending commits left queued" in capsys.readouterr().out
+
+
+class TestFindYamlFiles:
+    """Test the doc-tree walk used by graph extract / rag embed."""
+
+    def test_matches_recursive_glob(self, tmp_path):
+        """Same files as the two recursive globs, hidden entries skipped."""
+        import glob
+
+        from orchestrator import _find_yaml_files
+
+        for rel in ["a.yaml", "b.yml", "c.md", "sub/d.yaml", "sub/deep/e.yml", ".hidden/f.yaml", "sub/.g.yaml"]:
+            path = tmp_path / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x")
+
+        expected = glob.glob(f"{tmp_path}/**/*.yaml", recursive=True)
+        expected += glob.glob(f"{tmp_path}/**/*.yml", recursive=True)
+        assert sorted(_find_yaml_files(str(tmp_path))) == sorted(expected)
+
+
+class TestCliFastPath:
+    """Test the argument-free commands that skip the full parser."""
+
+    def test_fast_commands_match_full_parser(self):
+        """The full parser yields nothing beyond cmd for each fast command."""
+        from orchestrator import _FAST_COMMANDS, _build_parser
+
+        parser = _build_parser()
+        for cmd in _FAST_COMMANDS:
+            assert vars(parser.parse_args([cmd])) == {"cmd": cmd}
+
+    def test_every_command_has_a_handler(self):
+        """Each top-level subcommand dispatches through _COMMAND_HANDLERS."""
+        import argparse
+
+        from orchestrator import _COMMAND_HANDLERS, _build_parser
+
+        sub = next(
+            a for a in _build_parser()._actions if isinstance(a, argparse._SubParsersAction)
+        )
+        assert set(sub.choices) == set(_COMMAND_HANDLERS)
+
+
+class TestGraphStatus:
+    """Test the graph status printer."""
+
+    def test_top_edges_match_full_sort(self, capsys):
+        """nlargest keeps the same top 10 (ties in insertion order) as sorted()[:10]."""
+        from types import SimpleNamespace
+
+        from orchestrator import _handle_graph_command
+
+        edges = {f"R{i}": i % 4 for i in range(12)}
+        stats = SimpleNamespace(
+            total_nodes=3, total_edges=sum(edges.values()), node_counts={"A": 1, "B": 2}, edge_counts=edges
+        )
+        with patch("orchestrator._get_graph") as get_graph:
+            get_graph.return_value.get_stats.return_value = stats
+            _handle_graph_command(SimpleNamespace(graph_cmd="status"), MagicMock())
+
+        out = capsys.readouterr().out
+        expected = sorted(edges.items(), key=lambda x: -x[1])[:10]
+        assert out.split("Relationship Types:\n")[1] == "".join(
+            f"  {rel:<25} {count:>6}\n" for rel, count in expected
+        )
+        assert out.index("  B ") < out.index("  A ")
+
+    def test_reset_clears_extraction_ledger(self, capsys):
+        """A graph reset also forgets extracted content so Phase 2 rebuilds it."""
+        from types import SimpleNamespace
+
+        from orchestrator import _handle_graph_command
+
+        db = MagicMock()
+        db.clear_graph_extracted.return_value = 7
+        with (
+            patch("graph.schema.reset_schema") as reset_schema,
+            patch("builtins.input", return_value="yes"),
+        ):
+            _handle_graph_command(SimpleNamespace(graph_cmd="reset"), db)
+
+        reset_schema.assert_called_once_with(confirm=True)
+        db.clear_graph_extracted.assert_called_once_with()
+        assert "Cleared 7 graph extraction ledger entries" in capsys.readouterr().out
+
+
+class TestGraphPrinters:
+    """Test the peers / biases row printers."""
+
+    def test_peers_and_biases(self, capsys):
+        from types import SimpleNamespace
+
+        from orchestrator import _handle_graph_command
+
+        with patch("orchestrator._get_graph") as get_graph:
+            g = get_graph.return_value
+            g.get_sector_peers.return_value = [
+                {"peer": "AMD", "company": "Advanced Micro Devices", "sector": "Semis"},
+                {"peer": "INTC", "company": None, "sector": None},
+            ]
+            g.get_bias_history.return_value = [{"bias": "anchoring", "occurrences": 3}]
+            _handle_graph_command(SimpleNamespace(graph_cmd="peers", ticker="nvda"), MagicMock())
+            _handle_graph_command(SimpleNamespace(graph_cmd="biases", name=None), MagicMock())
+
+        out = capsys.readouterr().out
+        assert f"  {'AMD':<8} {'Advanced Micro Devices':<30} (Semis)\n" in out
+        assert f"  {'INTC':<8} {'':<30} ()\n" in out
+        assert f"  {'anchoring':<25}    3 occurrences\n" in out
+
+
+class TestSharedGraph:
+    """Test the process-wide Neo4j connection."""
+
+    def test_connects_once_and_retries_after_failure(self, monkeypatch):
+        import orchestrator
+        from graph.exceptions import GraphUnavailableError
+
+        monkeypatch.setattr(orchestrator, "_graph", None)
+        with patch("graph.layer.TradingGraph") as graph_cls:
+            graph_cls.return_value.connect.side_effect = [GraphUnavailableError("down"), None]
+            with pytest.raises(GraphUnavailableError):
+                orchestrator._get_graph()
+            first = orchestrator._get_graph()
+            assert orchestrator._get_graph() is first
+        assert graph_cls.return_value.connect.call_count == 2
+
+
+class TestRagPrinters:
+    """Test the single-write rag result printers."""
+
+    def test_show_output_unchanged(self, capsys):
+        """Buffered chunk listing matches the old per-line prints."""
+        from types import SimpleNamespace
+
+        from orchestrator import _handle_rag_command
+
+        chunks = [
+            {"section_label": "Thesis", "content_tokens": 12, "content": "short"},
+            {"section_label": "Risks", "content_tokens": 99, "content": "x" * 301},
+        ]
+        with patch("rag.search.get_document_chunks", return_value=chunks):
+            _handle_rag_command(SimpleNamespace(rag_cmd="show", doc_id="D1"), MagicMock())
+
+        assert capsys.readouterr().out == (
+            "\nChunks for D1:\n"
+            "\n[Thesis] (12 tokens)\nshort\n"
+            f"\n[Risks] (99 tokens)\n{'x' * 300}\n...\n"
+        )
+
+    def test_list_widens_id_column(self, capsys):
+        """Short ids keep the 30-wide column; a longer id widens every row."""
+        from types import SimpleNamespace
+
+        from orchestrator import _handle_rag_command
+
+        docs = [
+            {"doc_id": "short", "doc_type": "earnings", "ticker": None, "chunk_count": 3},
+            {"doc_id": "x" * 34, "doc_type": "stock", "ticker": "NVDA", "chunk_count": 12},
+        ]
+        with patch("rag.search.list_documents", return_value=docs):
+            _handle_rag_command(SimpleNamespace(rag_cmd="list"), MagicMock())
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[2] == "─" * 74
+        assert lines[3] == f"{'short':<34} {'earnings':<20} {'—':<8} 3"
+        assert lines[4].startswith("x" * 34 + " stock")
+
+    def test_reset_and_delete_clear_ingest_ledger(self, capsys):
+        """Reset clears every ledger row; delete clears the document's rows before deleting it."""
+        from types import SimpleNamespace
+
+        from orchestrator import _handle_rag_command
+
+        db = MagicMock()
+        db.clear_rag_ingested.return_value = 5
+        with (
+            patch("rag.schema.reset_schema") as reset_schema,
+            patch("builtins.input", return_value="yes"),
+        ):
+            _handle_rag_command(SimpleNamespace(rag_cmd="reset"), db)
+        reset_schema.assert_called_once_with(confirm=True)
+        db.clear_rag_ingested.assert_called_once_with()
+        assert "Cleared 5 RAG ingest ledger entries" in capsys.readouterr().out
+
+        db.reset_mock()
+        calls = []
+        db.clear_rag_ingested.side_effect = lambda doc_id: calls.append(("ledger", doc_id))
+
+        def delete_document(doc_id):
+            calls.append(("delete", doc_id))
+            return True
+
+        with patch("rag.embed.delete_document", side_effect=delete_document):
+            _handle_rag_command(SimpleNamespace(rag_cmd="delete", doc_id="D1"), db)
+        assert calls == [("ledger", "D1"), ("delete", "D1")]
+
+    def test_search_result_format(self):
+        from types import SimpleNamespace
+
+        from orchestrator import _format_rag_result
+
+        r = SimpleNamespace(
+            similarity=0.91234, doc_id="D1", doc_type="earnings", section_label="Thesis",
+            content="line one\nline two",
+        )
+        assert _format_rag_result(r, 3) == (
+            "\n[0.912] D1 (earnings)\nSection: Thesis\n  line one line two..."
+        )
+
+
+class TestCliRowTemplates:
+    """Test the precompiled table row templates."""
+
+    def test_option_row_matches_fstring(self):
+        """Decimal columns format like the float() casts they replace."""
+        from decimal import Decimal
+
+        from orchestrator import _option_row
+
+        opt = {
+            "id": 7, "full_symbol": "NVDA 250117C00150000", "option_type": "call",
+            "option_strike": Decimal("150"), "option_expiration": "2025-01-17", "days_to_expiry": 3,
+            "current_size": None, "entry_size": Decimal("2"),
+        }
+        assert _option_row(opt) == (
+            f"{7:>4} {'NVDA 250117C00150000':<25} {'C':<4} ${150.0:>7.2f} {'2025-01-17':<12} {3:>5} {2.0:>6.0f}"
+        )
+
+    def test_lineage_lines_use_sql_rendered_dates(self):
+        """Streamed lineage lines format the text columns and end in a newline."""
+        from orchestrator import _LINEAGE_ACTIVE_LINE, _LINEAGE_INVALIDATED_LINE
+
+        row = {
+            "ticker": "NVDA", "analysis_type": "stock", "analysis_date": "2025-01-02",
+            "valid_until": "—", "earnings": "—",
+        }
+        assert _LINEAGE_ACTIVE_LINE(row) == f"{'NVDA':<8} {'stock':<10} {'2025-01-02':<12} {'—':<12} —\n"
+
+        row = {
+            "ticker": "AAPL", "analysis_type": "earnings", "result": "—",
+            "analysis_date": "2025-01-02", "invalidated_date": "2025-02-03",
+        }
+        assert _LINEAGE_INVALIDATED_LINE(row) == (
+            f"{'AAPL':<8} {'earnings':<10} {'—':<12} {'2025-01-02':<12} 2025-02-03\n"
+        )
+
+    def test_lineage_active_counts_rows_after_streaming(self, capsys):
+        """Active lineage streams every row, then reports how many it printed."""
+        from types import SimpleNamespace
+        from unittest.mock import MagicMock
+
+        from orchestrator import _handle_lineage_command
+
+        rows = [
+            {"ticker": t, "analysis_type": "stock", "analysis_date": "2025-01-02",
+             "valid_until": "—", "earnings": "—"}
+            for t in ("NVDA", "AAPL", "MSFT")
+        ]
+        cur = MagicMock()
+        cur.fetchone.return_value = rows[0]
+        cur.__iter__.return_value = iter(rows[1:])
+        db = MagicMock()
+        db.conn.cursor.return_value.__enter__.return_value = cur
+
+        _handle_lineage_command(SimpleNamespace(lineage_cmd="active"), db)
+
+        sql = cur.execute.call_args[0][0]
+        assert "OVER ()" not in sql
+        out = capsys.readouterr().out
+        assert all(t in out for t in ("NVDA", "AAPL", "MSFT"))
+        assert out.rstrip().endswith("3 active analyses")
+
+
+class TestParseSettingValue:
+    """Test CLI settings value parsing."""
+
+    def test_json_and_plain_values(self):
+        from orchestrator import _parse_setting_value
+
+        assert _parse_setting_value("0.5") == 0.5
+        assert _parse_setting_value("true") is True
+        assert _parse_setting_value('{"a": [1]}') == {"a": [1]}
+        assert _parse_setting_value("foo") == "foo"
+        assert _parse_setting_value("tomorrow") == "tomorrow"
+        assert _parse_setting_value("") == ""
+
 
 class TestRateLimiting:
     """Test rate limiting logic."""
@@ -472,6 +1431,27 @@ class TestRateLimiting:
         assert status["today_analyses"] >= 15
 
 
+    def test_analysis_bucket_paces_across_day(self):
+        """Tokens are a burst plus the day's pro-rated share, never past the cap."""
+        from datetime import datetime
+
+        from orchestrator import _daily_analysis_bucket
+
+        def bucket_at(hour, used, max_analyses=24, burst=4):
+            with patch("orchestrator.now_tradegent", return_value=datetime(2026, 3, 2, hour)):
+                return _daily_analysis_bucket(used, max_analyses, burst)
+
+        assert bucket_at(0, 0).tokens == 4
+        assert bucket_at(6, 6).tokens == 4
+        assert bucket_at(6, 9).tokens == 1
+        assert bucket_at(6, 12).tokens == 0
+        assert bucket_at(23, 24).tokens == 0
+
+        bucket = bucket_at(6, 9)
+        assert bucket.try_consume() is True
+        assert bucket.try_consume() is False
+
+
 class TestCircuitBreaker:
     """Test circuit breaker functionality."""
 
@@ -0,0 +1,453 @@
+"""Phase 4 synthesis helper tests for orchestrator 4-phase pipeline."""
+
+from __future__ import annotations
+
+import importlib
+import json
+import sys
+import types
+
+
+def _load_orchestrator():
+    """Import orchestrator lazily with minimal dependency stubs for this unit test."""
+    sys.modules.pop("orchestrator", None)
+
+    if "shared.observability" not in sys.modules:
+        shared_obs = types.ModuleType("shared.observability")
+        shared_obs.setup_logging = lambda *args, **kwargs: None
+        sys.modules["shared.observability"] = shared_obs
+
+    if "structlog" not in sys.modules:
+        structlog_stub = types.ModuleType("structlog")
+        structlog_stub.get_logger = lambda *args, **kwargs: types.SimpleNamespace(
+            info=lambda *a, **k: None,
+            warning=lambda *a, **k: None,
+            error=lambda *a, **k: None,
+            debug=lambda *a, **k: None,
+        )
+        sys.modules["structlog"] = structlog_stub
+
+    return importlib.import_module("orchestrator")
+
+
+def _context(module, **overrides):
+    fields = {
+        "ticker": "NVDA",
+        "past_analyses": [],
+        "graph_context": {},
+        "bias_warnings": [],
+        "strategy_recommendations": [],
+        "has_history": False,
+        "history_count": 0,
+        "has_graph_data": False,
+    }
+    fields.update(overrides)
+    return module.SynthesisContext(**fields)
+
+
+def test_format_synthesis_first_analysis() -> None:
+    orch = _load_orchestrator()
+
+    section = orch._format_synthesis_section(
+        ticker="NVDA",
+        current={"recommendation": "BULLISH"},
+        historical=_context(orch),
+        original_confidence=70,
+        adjusted_confidence=55,
+        modifiers={"first_analysis": -10, "no_graph": -5},
+    )
+
+    lines = section.split("\n")
+    assert lines[:4] == ["", "---", "", "## Historical Comparison (Auto-Generated)"]
+    assert "*This is the first analysis for NVDA*" in lines
+    assert "*No graph context available yet.*" in lines
+    assert "| First Analysis | -10% |" in lines
+    assert lines[-1] == "**Historical Pattern**: First analysis - establishing baseline"
+
+
+def test_format_synthesis_with_history() -> None:
+    orch = _load_orchestrator()
+
+    historical = _context(
+        orch,
+        past_analyses=[
+            {"date": "2026-02-01", "recommendation": "BULLISH", "confidence": 65},
+            {"date": "2026-01-15", "recommendation": "NEUTRAL", "confidence": "N/A"},
+        ],
+        graph_context={"peers": [{"peer": "AMD"}, {"peer": "INTC"}], "risks": [{"risk": "Export"}]},
+        bias_warnings=[{"bias": "anchoring", "occurrences": 2}],
+        strategy_recommendations=[{"strategy": "call_spread", "win_rate": 0.6, "trades": 5}],
+        has_history=True,
+        history_count=2,
+        has_graph_data=True,
+    )
+
+    section = orch._format_synthesis_section(
+        ticker="NVDA",
+        current={"recommendation": "BULLISH"},
+        historical=historical,
+        original_confidence=70,
+        adjusted_confidence=64,
+        modifiers={"sparse_history": -5, "bias_warnings": -6, "pattern_confirms": 5},
+    )
+
+    lines = section.split("\n")
+    assert "| 2026-02-01 | BULLISH | 65% |" in lines
+    assert "| 2026-01-15 | NEUTRAL | N/A |" in lines
+    assert "- **anchoring**: 2 occurrences (-6%)" in lines
+    assert "- **call_spread**: 60% win rate (5 trades)" in lines
+    assert "AMD, INTC" in lines
+    assert "Export" in lines
+    assert "| Pattern Confirms | +5% |" in lines
+    assert "**Adjusted Confidence**: 64% (was 70%)" in lines
+    assert not section.endswith("\n")
+
+
+def test_phase4_synthesize_appends_to_analysis_file(tmp_path, monkeypatch) -> None:
+    orch = _load_orchestrator()
+    monkeypatch.setattr(orch, "_sync_latest_knowledge_confidence", lambda **kwargs: None)
+
+    analysis_path = tmp_path / "NVDA_stock_20260301T0930.md"
+    analysis_path.write_text("# Fresh analysis\n", encoding="utf-8")
+    result = orch.AnalysisResult(
+        ticker="NVDA",
+        type=orch.AnalysisType.STOCK,
+        filepath=analysis_path,
+        gate_passed=False,
+        recommendation="BULLISH",
+        confidence=70,
+        expected_value=0.0,
+        raw_output="",
+        parsed_json={"recommendation": "BULLISH", "confidence": 70},
+    )
+
+    orch._phase4_synthesize(result, _context(orch))
+
+    content = analysis_path.read_text(encoding="utf-8")
+    assert content.startswith("# Fresh analysis\n\n---\n")
+    assert content.endswith("**Historical Pattern**: First analysis - establishing baseline")
+    assert result.confidence == 55
+
+
+def test_update_analysis_confidence_uses_returning(mock_db_connection) -> None:
+    from unittest.mock import MagicMock
+
+    orch = _load_orchestrator()
+    mock_conn, mock_cursor = mock_db_connection
+    mock_cursor.fetchone.return_value = {"run_id": 42}
+    db = MagicMock(conn=mock_conn)
+
+    assert orch._update_analysis_confidence(db, 42, 55, {"no_graph": -5}) is True
+
+    sql = mock_cursor.execute.call_args[0][0]
+    assert "RETURNING run_id" in sql
+    mock_conn.commit.assert_called_once()
+
+    mock_cursor.fetchone.return_value = None
+    assert orch._update_analysis_confidence(db, 43, 55, {}) is False
+
+
+def test_update_analysis_confidence_bulk_commits_once(mock_db_connection) -> None:
+    from unittest.mock import MagicMock
+
+    orch = _load_orchestrator()
+    mock_conn, mock_cursor = mock_db_connection
+    mock_cursor.rowcount = 2
+    db = MagicMock(conn=mock_conn)
+
+    updated = orch._update_analysis_confidence_bulk(
+        db, [(1, 60, {"no_graph": -5}), (2, 45, {"first_analysis": -10})]
+    )
+
+    assert updated == 2
+    params = mock_cursor.executemany.call_args[0][1]
+    assert [p[2] for p in params] == [1, 2]
+    assert json.loads(params[0][1]) == {"no_graph": -5}
+    mock_conn.commit.assert_called_once()
+    assert orch._update_analysis_confidence_bulk(db, []) == 0
+
+
+def test_kb_callable_caches_missing_modules(monkeypatch) -> None:
+    orch = _load_orchestrator()
+    calls = []
+
+    def fake_import(name):
+        calls.append(name)
+        raise ImportError(name)
+
+    monkeypatch.setattr(orch.importlib, "import_module", fake_import)
+
+    assert orch._kb_callable("rag.hybrid", "get_hybrid_context") is None
+    assert orch._kb_callable("rag.hybrid", "get_hybrid_context") is None
+    assert calls == ["rag.hybrid"]
+
+    historical = orch._phase3_retrieve_history("NVDA", orch.AnalysisType.STOCK)
+    assert historical.is_first_analysis
+
+
+def test_extract_graph_once_skips_known_content(monkeypatch) -> None:
+    from unittest.mock import MagicMock
+
+    orch = _load_orchestrator()
+    ledger = MagicMock()
+    ledger.connect.return_value = ledger
+    monkeypatch.setattr(orch, "NexusDB", lambda **kwargs: ledger)
+    extracted = types.SimpleNamespace(entities=[1, 2], relations=[3], error_message=None)
+    extract = MagicMock(return_value=extracted)
+
+    ledger.get_graph_extraction.return_value = {"entities": 4, "relations": 2}
+    graph = orch._extract_graph_once("abc", "NVDA_stock_1", extract)
+    assert graph == {"entities": 4, "relations": 2, "cached": True}
+    extract.assert_not_called()
+
+    ledger.get_graph_extraction.return_value = None
+    graph = orch._extract_graph_once("abc", "NVDA_stock_1", extract)
+    assert graph == {"entities": 2, "relations": 1}
+    ledger.mark_graph_extracted.assert_called_once_with("abc", "NVDA_stock_1", 2, 1)
+    assert ledger.close.call_count == 2
+
+
+def test_extract_graph_once_runs_without_ledger(monkeypatch) -> None:
+    orch = _load_orchestrator()
+
+    def unavailable(**kwargs):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(orch, "NexusDB", unavailable)
+    extracted = types.SimpleNamespace(entities=[1], relations=[], error_message=None)
+
+    graph = orch._extract_graph_once("abc", "NVDA_stock_1", lambda: extracted)
+    assert graph == {"entities": 1, "relations": 0}
+
+
+def test_kb_ingest_once_skips_known_content(tmp_path, monkeypatch) -> None:
+    from unittest.mock import MagicMock
+
+    orch = _load_orchestrator()
+    monkeypatch.setattr(orch, "cfg", types.SimpleNamespace(kb_ingest_enabled=True))
+    ingest = MagicMock(return_value=True)
+    monkeypatch.setattr(orch, "kb_ingest_analysis", ingest)
+    db = MagicMock()
+    path = tmp_path / "NVDA_stock_20260301T0930.md"
+
+    db.is_content_ingested.return_value = True
+    orch._kb_ingest_once(db, path, "same output", {"ticker": "NVDA"})
+    ingest.assert_not_called()
+
+    db.is_content_ingested.return_value = False
+    orch._kb_ingest_once(db, path, "same output", {"ticker": "NVDA"})
+    ingest.assert_called_once_with(path, {"ticker": "NVDA"})
+    content_hash = db.mark_content_ingested.call_args[0][0]
+    assert len(content_hash) == 32
+    assert db.is_content_ingested.call_args[0][0] == content_hash
+
+    ingest.return_value = False
+    db.mark_content_ingested.reset_mock()
+    orch._kb_ingest_once(db, path, "other output", {"ticker": "NVDA"})
+    db.mark_content_ingested.assert_not_called()
+
+
+def test_analysis_result_from_output_defaults(tmp_path) -> None:
+    orch = _load_orchestrator()
+    path = tmp_path / "NVDA_stock_20260301T0930.md"
+
+    empty = orch._analysis_result_from_output("NVDA", orch.AnalysisType.STOCK, path, "no json")
+    assert (empty.gate_passed, empty.gate_result, empty.recommendation) == (False, "FAIL", "UNKNOWN")
+    assert (empty.confidence, empty.expected_value, empty.parsed_json) == (0, 0.0, None)
+
+    output = '```json\n{"ticker": "NVDA", "gate_passed": true, "confidence": 72}\n```'
+    result = orch._analysis_result_from_output("NVDA", orch.AnalysisType.STOCK, path, output)
+    assert result.gate_passed is True
+    assert result.confidence == 72
+    assert result.parsed_json["ticker"] == "NVDA"
+    assert empty.chain_data is None
+    assert result.chain_data.ticker == "NVDA"
+    assert result.chain_data.confidence == 72
+
+
+def test_post_analysis_workflow_reuses_chain_data(tmp_path, monkeypatch) -> None:
+    from unittest.mock import MagicMock
+
+    orch = _load_orchestrator()
+    path = tmp_path / "NVDA_stock_20260301T0930.md"
+    output = '```json\n{"ticker": "NVDA", "recommendation": "WATCH", "trade_plan": {"entry": {"price": 120}}}\n```'
+    result = orch._analysis_result_from_output("NVDA", orch.AnalysisType.STOCK, path, output)
+    chained = []
+
+    monkeypatch.setattr(orch, "_generate_visualization", lambda *a, **k: None)
+    monkeypatch.setattr(orch, "extract_chain_data", MagicMock(side_effect=AssertionError("re-read")))
+    monkeypatch.setattr(orch, "_chain_to_watchlist", lambda db, t, p, rec, entry, inv: chained.append((rec, entry)))
+
+    orch._post_analysis_workflow(MagicMock(), "NVDA", path, result)
+
+    assert chained == [("WATCH", 120.0)]
+
+
+def test_adjusted_confidence_cold_start(monkeypatch) -> None:
+    orch = _load_orchestrator()
+    monkeypatch.setattr(
+        orch, "_check_pattern_consistency", lambda *a: (_ for _ in ()).throw(AssertionError)
+    )
+
+    assert orch._calculate_adjusted_confidence(70, "BULLISH", _context(orch)) == (
+        55, {"first_analysis": -10, "no_graph": -5}
+    )
+    assert orch._calculate_adjusted_confidence(10, "BULLISH", _context(orch))[0] == 0
+
+    _, modifiers = orch._calculate_adjusted_confidence(
+        70, "BULLISH", _context(orch, bias_warnings=[{"bias": "anchoring", "occurrences": 2}])
+    )
+    assert list(modifiers) == ["first_analysis", "no_graph", "bias_warnings"]
+
+
+def test_queue_git_push_coalesces_requests(monkeypatch) -> None:
+    orch = _load_orchestrator()
+    pushes = []
+    monkeypatch.setattr(orch, "_GIT_PUSH_COALESCE_SECONDS", 0.05)
+    monkeypatch.setattr(orch, "git_push_knowledge_repo", lambda: pushes.append(1) or True)
+
+    for _ in range(3):
+        orch.queue_git_push()
+    orch._git_push_queue.join()
+
+    assert pushes == [1]
+
+
+def test_submit_post_analysis_runs_in_background(tmp_path, monkeypatch) -> None:
+    import threading
+    from unittest.mock import MagicMock
+
+    orch = _load_orchestrator()
+    release = threading.Event()
+    seen = {}
+    post_db = MagicMock()
+
+    def workflow(db, ticker, path, result):
+        assert release.wait(timeout=5)
+        seen["args"] = (db, ticker, path)
+        raise RuntimeError("viz failed")
+
+    monkeypatch.setattr(orch, "NexusDB", lambda **kwargs: post_db)
+    monkeypatch.setattr(orch, "_post_analysis_workflow", workflow)
+    path = tmp_path / "NVDA_stock_20260301T0930.md"
+
+    future = orch._submit_post_analysis("NVDA", path, MagicMock(), "t")
+    assert not future.done()  # caller is not blocked on the workflow
+    release.set()
+
+    assert isinstance(future.exception(timeout=5), RuntimeError)
+    assert seen["args"] == (post_db, "NVDA", path)
+    post_db.close.assert_called_once()
+    assert orch._submit_post_analysis("SCAN", path, MagicMock()) is None
+
+
+def test_service_counter_buffer_batches_deltas(monkeypatch) -> None:
+    from unittest.mock import MagicMock
+
+    orch = _load_orchestrator()
+    counter_db = MagicMock()
+    counter_db.connect.return_value = counter_db
+    monkeypatch.setattr(orch, "NexusDB", lambda **kwargs: counter_db)
+    buffer = orch._ServiceCounterBuffer()
+    monkeypatch.setattr(buffer, "FLUSH_SECONDS", 60.0)
+
+    for _ in range(3):
+        buffer.add("analyses_total", "today_analyses")
+    buffer.flush()
+    buffer.flush()  # nothing pending: no second connection
+
+    counter_db.add_service_counters.assert_called_once_with(
+        {"analyses_total": 3, "today_analyses": 3}
+    )
+    counter_db.close.assert_called_once()
+
+    counter_db.add_service_counters.side_effect = RuntimeError("db down")
+    buffer.add("executions_total")
+    buffer.flush()
+    assert buffer._pending == {"executions_total": 1}
+
+
+def test_run_git_avoids_cwd(tmp_path, monkeypatch) -> None:
+    from unittest.mock import MagicMock
+
+    orch = _load_orchestrator()
+    run = MagicMock()
+    monkeypatch.setattr(orch.subprocess, "run", run)
+
+    orch._run_git(tmp_path, ["status", "--porcelain"], timeout=30)
+
+    args, kwargs = run.call_args
+    assert args[0][1:] == ["-C", str(tmp_path), "status", "--porcelain"]
+    assert "cwd" not in kwargs
+    assert kwargs["close_fds"] is False
+
+
+def test_phase3_overlaps_phase2(tmp_path, monkeypatch) -> None:
+    import threading
+    from unittest.mock import MagicMock
+
+    orch = _load_orchestrator()
+    ingest_started = threading.Event()
+    history_seen = threading.Event()
+    calls = {}
+
+    result = orch.AnalysisResult(
+        ticker="NVDA",
+        type=orch.AnalysisType.STOCK,
+        filepath=tmp_path / "NVDA_stock_20260301T0930.md",
+        gate_passed=False,
+        recommendation="BULLISH",
+        confidence=70,
+        expected_value=0.0,
+        raw_output="",
+    )
+
+    def phase2(filepath):
+        ingest_started.set()
+        # Phase 3 must be able to finish while Phase 2 is still running
+        assert history_seen.wait(timeout=5)
+        return {"doc_id": filepath.stem, "rag": {"chunks": 1}}
+
+    def phase3(ticker, analysis_type, exclude_doc_id, db):
+        calls["exclude"] = exclude_doc_id
+        history_seen.set()
+        return _context(orch)
+
+    monkeypatch.setattr(orch, "_phase1_fresh_analysis", lambda *a, **k: result)
+    monkeypatch.setattr(orch, "_phase2_dual_ingest", phase2)
+    monkeypatch.setattr(orch, "_phase3_retrieve_history", phase3)
+    monkeypatch.setattr(orch, "_phase4_synthesize", lambda *a, **k: None)
+    monkeypatch.setattr(orch, "_submit_post_analysis", lambda *a, **k: None)
+
+    out = orch._run_analysis_4phase_untraced(
+        MagicMock(), "NVDA", orch.AnalysisType.STOCK, None, "t", None, "runtime"
+    )
+
+    assert out is result
+    assert ingest_started.is_set()
+    assert calls["exclude"] == "NVDA_stock_20260301T0930"
+
+
+def test_legacy_run_analysis_saves_parsed_result(tmp_path, monkeypatch) -> None:
+    from unittest.mock import MagicMock
+
+    orch = _load_orchestrator()
+    monkeypatch.setattr(
+        orch,
+        "cfg",
+        types.SimpleNamespace(analyses_dir=tmp_path, kb_query_enabled=False, allowed_tools_analysis=""),
+    )
+    output = '```json\n{"ticker": "NVDA", "gate_passed": true, "confidence": 72}\n```'
+    monkeypatch.setattr(orch, "_pipeline_stock", lambda db, ticker, ctx: None)
+    monkeypatch.setattr(orch, "build_analysis_prompt", lambda *a, **k: "prompt")
+    monkeypatch.setattr(orch, "_generate_analysis_output", lambda *a, **k: output)
+    monkeypatch.setattr(orch, "_kb_ingest_once", MagicMock())
+    monkeypatch.setattr(orch, "_service_counters", MagicMock())
+    monkeypatch.setattr(orch, "_submit_post_analysis", MagicMock())
+    db = MagicMock()
+
+    result = orch._legacy_run_analysis(db, "NVDA", orch.AnalysisType.STOCK)
+
+    assert result.confidence == 72
+    assert result.filepath.read_text() == output
+    db.save_analysis_result.assert_called_once_with(None, "NVDA", "stock", result.parsed_json)
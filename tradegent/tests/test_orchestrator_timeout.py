@@ -66,3 +66,27 @@ def test_run_with_timeout_returns_error_on_exception() -> None:
 
     assert result is None
     assert error == "boom"
+
+
+def test_run_with_timeout_reuses_pool_threads() -> None:
+    import threading
+
+    run_with_timeout = _load_timeout_helper()
+    names = {run_with_timeout(lambda: threading.current_thread().name, 1, "t")[0] for _ in range(5)}
+
+    assert all(name.startswith("phase-pool") for name in names)
+    assert len(names) <= 2
+
+
+def test_run_with_timeout_nested_call_does_not_use_shared_pool() -> None:
+    import threading
+
+    run_with_timeout = _load_timeout_helper()
+
+    def outer() -> tuple:
+        return run_with_timeout(lambda: threading.current_thread().name, 1, "inner")
+
+    (inner_name, inner_error), error = run_with_timeout(outer, 1, "outer")
+
+    assert error is None and inner_error is None
+    assert not inner_name.startswith("phase-pool")
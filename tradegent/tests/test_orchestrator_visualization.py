@@ -0,0 +1,99 @@
+"""Persistent visualization worker tests for orchestrator post-analysis workflow."""
+
+from __future__ import annotations
+
+import importlib
+import subprocess
+import sys
+import types
+
+import pytest
+
+
+def _load_orchestrator():
+    """Import orchestrator lazily with minimal dependency stubs for this unit test."""
+    sys.modules.pop("orchestrator", None)
+
+    if "shared.observability" not in sys.modules:
+        shared_obs = types.ModuleType("shared.observability")
+        shared_obs.setup_logging = lambda *args, **kwargs: None
+        sys.modules["shared.observability"] = shared_obs
+
+    if "structlog" not in sys.modules:
+        structlog_stub = types.ModuleType("structlog")
+        structlog_stub.get_logger = lambda *args, **kwargs: types.SimpleNamespace(
+            info=lambda *a, **k: None,
+            warning=lambda *a, **k: None,
+            error=lambda *a, **k: None,
+            debug=lambda *a, **k: None,
+        )
+        sys.modules["structlog"] = structlog_stub
+
+    return importlib.import_module("orchestrator")
+
+
+FAKE_SERVER = """
+import json, sys, os, time
+for line in sys.stdin:
+    ticker = line.strip()
+    if ticker == "SLOW":
+        time.sleep(5)
+    print(json.dumps({"svg_path": f"{ticker}.svg", "pid": os.getpid()}), flush=True)
+"""
+
+
+def test_viz_worker_reuses_process(tmp_path) -> None:
+    orch = _load_orchestrator()
+    script = tmp_path / "viz_server.py"
+    script.write_text(FAKE_SERVER)
+    worker = orch._VizWorker(script)
+    try:
+        first = worker.render("NVDA", timeout=10)
+        second = worker.render("AAPL", timeout=10)
+    finally:
+        worker.close()
+
+    assert first["svg_path"] == "NVDA.svg"
+    assert second["svg_path"] == "AAPL.svg"
+    assert first["pid"] == second["pid"]
+
+
+def test_viz_worker_restarts_after_timeout(tmp_path) -> None:
+    orch = _load_orchestrator()
+    script = tmp_path / "viz_server.py"
+    script.write_text(FAKE_SERVER)
+    worker = orch._VizWorker(script)
+    try:
+        first = worker.render("NVDA", timeout=10)
+        with pytest.raises(subprocess.TimeoutExpired):
+            worker.render("SLOW", timeout=0.2)
+        after = worker.render("AAPL", timeout=10)
+    finally:
+        worker.close()
+
+    assert after["svg_path"] == "AAPL.svg"
+    assert after["pid"] != first["pid"]
+
+
+def test_viz_worker_logs_stderr_on_crash(tmp_path, monkeypatch) -> None:
+    from unittest.mock import MagicMock
+
+    orch = _load_orchestrator()
+    log = MagicMock()
+    monkeypatch.setattr(orch, "log", log)
+    script = tmp_path / "viz_server.py"
+    script.write_text(
+        "import sys\n"
+        "sys.stdin.readline()\n"
+        "raise ValueError('bad ticker data')\n"
+    )
+    worker = orch._VizWorker(script)
+    try:
+        with pytest.raises(RuntimeError, match="worker exited"):
+            worker.render("NVDA", timeout=10)
+    finally:
+        worker.close()
+
+    logged = "\n".join(call.args[0] for call in log.warning.call_args_list)
+    assert "Traceback" in logged
+    assert "ValueError: bad ticker data" in logged
@@ -136,6 +136,61 @@ class TestRunAnalysesParallel:
         assert result.skipped == 2
 
 
+class TestWatchlistParallelism:
+    """Tests for the watchlist worker-count override."""
+
+    @patch('orchestrator.cfg')
+    @patch('orchestrator.run_pipeline')
+    @patch('orchestrator.NexusDB')
+    def test_max_workers_override_skips_setting_lookup(self, mock_db_class, mock_pipeline, mock_cfg):
+        from orchestrator import run_analyses_parallel, AnalysisType
+
+        mock_cfg.parallel_execution_enabled = True
+        mock_db_instance = MagicMock()
+        mock_db_class.return_value = mock_db_instance
+        mock_db_instance.claim_analysis_slot.return_value = True
+
+        max_concurrent = [0]
+        current = [0]
+        lock = threading.Lock()
+
+        def mock_run(*args, **kwargs):
+            with lock:
+                current[0] += 1
+                max_concurrent[0] = max(max_concurrent[0], current[0])
+            time.sleep(0.05)
+            with lock:
+                current[0] -= 1
+
+        mock_pipeline.side_effect = mock_run
+
+        tasks = [('NVDA', AnalysisType.STOCK, False)] * 6
+        result = run_analyses_parallel(tasks, max_workers=3)
+
+        assert result.succeeded == 6
+        assert 1 < max_concurrent[0] <= 3
+        mock_db_instance.get_setting.assert_not_called()
+
+    @patch('orchestrator.cfg')
+    @patch('orchestrator.run_analyses_parallel')
+    def test_run_watchlist_passes_parallelism(self, mock_parallel, mock_cfg):
+        from orchestrator import run_watchlist, ParallelBatchResult
+
+        mock_cfg.max_daily_analyses = 10
+        mock_cfg.watchlist_parallelism = 4
+        mock_parallel.return_value = ParallelBatchResult(total=1, succeeded=1)
+
+        db = MagicMock()
+        db.get_today_run_count.return_value = 0
+        db.get_enabled_stocks.return_value = [
+            MagicMock(ticker='NVDA', default_analysis_type='stock', days_to_earnings=None)
+        ]
+
+        run_watchlist(db)
+
+        assert mock_parallel.call_args.kwargs['max_workers'] == 4
+
+
 class TestRunAnalysesSequential:
     """Tests for _run_analyses_sequential function."""
 
@@ -178,6 +233,79 @@ class TestRunAnalysesSequential:
         assert result.failed == 1
 
 
+class TestRunAnalysesOverlapped:
+    """Tests for the Phase 1 / Phase 2 overlapped batch driver."""
+
+    @patch('orchestrator.cfg')
+    @patch('orchestrator._phase2_dual_ingest')
+    @patch('orchestrator._phase1_fresh_analysis')
+    @patch('orchestrator.run_pipeline')
+    @patch('orchestrator.NexusDB')
+    def test_single_worker_overlaps_phase1_and_phase2(
+        self, mock_db_class, mock_pipeline, mock_phase1, mock_phase2, mock_cfg
+    ):
+        from pathlib import Path
+        from orchestrator import run_analyses_parallel, AnalysisResult, AnalysisType
+
+        mock_cfg.parallel_execution_enabled = True
+        mock_cfg.four_phase_analysis_enabled = True
+        mock_cfg.phase_overlap_enabled = True
+        mock_cfg.phase2_timeout = 5
+
+        mock_db_instance = MagicMock()
+        mock_db_class.return_value = mock_db_instance
+        mock_db_instance.get_setting.return_value = '1'
+        mock_db_instance.claim_analysis_slot.return_value = True
+
+        events = []
+
+        def phase1(db, ticker, analysis_type):
+            events.append(('p1', ticker))
+            time.sleep(0.05)
+            return AnalysisResult(
+                ticker=ticker, type=analysis_type, filepath=Path(f"{ticker}.md"),
+                gate_passed=False, recommendation="NEUTRAL", confidence=50,
+                expected_value=0.0, raw_output="",
+            )
+
+        def phase2(filepath):
+            events.append(('p2_start', filepath.stem))
+            time.sleep(0.1)
+            events.append(('p2_end', filepath.stem))
+            return {"doc_id": filepath.stem}
+
+        mock_phase1.side_effect = phase1
+        mock_phase2.side_effect = phase2
+
+        tasks = [('NVDA', AnalysisType.STOCK, False), ('AAPL', AnalysisType.STOCK, False)]
+        result = run_analyses_parallel(tasks)
+
+        assert result.succeeded == 2
+        # Phase 1 for AAPL starts while Phase 2 for NVDA is still running
+        assert events.index(('p1', 'AAPL')) < events.index(('p2_end', 'NVDA'))
+        prefetched = mock_pipeline.call_args_list[0].kwargs['prefetched']
+        assert prefetched.ingest_result == {"doc_id": "NVDA"}
+
+    @patch('orchestrator.cfg')
+    @patch('orchestrator._phase1_fresh_analysis')
+    @patch('orchestrator.run_pipeline')
+    @patch('orchestrator.NexusDB')
+    def test_daily_limit_skips_tasks(self, mock_db_class, mock_pipeline, mock_phase1, mock_cfg):
+        from orchestrator import _run_analyses_overlapped, AnalysisType
+
+        mock_db_instance = MagicMock()
+        mock_db_class.return_value = mock_db_instance
+        mock_db_instance.claim_analysis_slot.side_effect = [True, False]
+        mock_phase1.return_value = None
+
+        tasks = [('NVDA', AnalysisType.STOCK, False), ('AAPL', AnalysisType.STOCK, False)]
+        result = _run_analyses_overlapped(tasks)
+
+        assert result.failed == 1
+        assert result.skipped == 1
+        mock_pipeline.assert_not_called()
+
+
 class TestClaimAnalysisSlot:
     """Tests for claim_analysis_slot database method."""
 